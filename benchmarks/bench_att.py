@@ -0,0 +1,84 @@
+"""
+Benchmark for ATT code.json analysis on generated files of growing size:
+a first analysis (parse, writing the decoded sidecar) and a repeat one
+(served from the sidecar).
+
+Usage:
+    python benchmarks/bench_att.py [--rows 100000 1000000] [--memory]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rocm_perf_lab.analysis.att_analysis import analyze_att  # noqa: E402
+
+_ISA = [
+    "s_load_dwordx4 s[0:3], s[4:5], 0x0",
+    "v_mov_b32 v1, s0",
+    "global_load_dwordx4 v[2:5], v0, s[0:1]",
+    "s_waitcnt vmcnt(0)",
+    "v_fma_f32 v6, v2, v3, v6",
+    "ds_write_b128 v7, v[2:5]",
+    "s_cbranch_scc1 0x40",
+    "global_store_dwordx4 v0, v[2:5], s[2:3]",
+]
+
+
+def _write_code_json(path: Path, n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    isa = rng.integers(0, len(_ISA), n_rows).tolist()
+    stats = rng.integers(0, 1000, (n_rows, 4)).tolist()
+    with open(path, "w") as f:
+        f.write('{"version": 2, "code": [')
+        for i in range(n_rows):
+            hits, latency, stall, idle = stats[i]
+            row = [_ISA[isa[i]], 0, i + 1, f"kernel.cpp:{i % 500}", 0, 0x1000 + 4 * i, hits, latency, stall, idle]
+            f.write(("," if i else "") + json.dumps(row))
+        f.write("]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--memory", action="store_true", help="Also report peak traced memory (slower).")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'file_mb':>10} {'analyze_s':>10} {'cached_s':>10} {'peak_mb':>10}")
+
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            dispatch_dir = Path(workdir)
+            _write_code_json(dispatch_dir / "code.json", n)
+            size_mb = (dispatch_dir / "code.json").stat().st_size / 1e6
+
+            t0 = time.perf_counter()
+            analyze_att(dispatch_dir)
+            elapsed = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            analyze_att(dispatch_dir)
+            cached = time.perf_counter() - t0
+
+            peak = float("nan")
+            if args.memory:
+                for sidecar in dispatch_dir.glob(".code.json.*"):
+                    sidecar.unlink()
+                tracemalloc.start()
+                analyze_att(dispatch_dir)
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+
+        print(f"{n:>12} {size_mb:>10.1f} {elapsed:>10.3f} {cached:>10.3f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Scaling benchmark for analyze_critical_path on synthetic rocpd databases.
+
+Usage:
+    python benchmarks/bench_critical_path.py [--sizes 1000 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rocm_perf_lab.analysis.critical_path import analyze_critical_path  # noqa: E402
+from tests.critical_path.utils import create_synthetic_db  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--queues", type=int, default=8)
+    parser.add_argument("--symbols", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'dispatches':>12} {'build_db_s':>12} {'analyze_s':>12} {'path_len':>10}")
+
+    for n in args.sizes:
+        t0 = time.perf_counter()
+        db = create_synthetic_db(n, n_queues=args.queues, n_symbols=args.symbols)
+        t1 = time.perf_counter()
+        try:
+            result = analyze_critical_path(db)
+            t2 = time.perf_counter()
+        finally:
+            os.unlink(db)
+
+        print(f"{n:>12} {t1 - t0:>12.3f} {t2 - t1:>12.3f} {len(result.critical_kernel_ids):>10}")
+
+
+if __name__ == "__main__":
+    main()
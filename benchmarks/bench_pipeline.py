@@ -0,0 +1,55 @@
+"""
+Load benchmark for the profiling pipeline on the synthetic profiler backend.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rocm_perf_lab.profiler.att_runner import run_att  # noqa: E402
+from rocm_perf_lab.profiler.backends import SyntheticBackend, set_backend  # noqa: E402
+from rocm_perf_lab.profiler.extended_pipeline import build_extended_profile  # noqa: E402
+from rocm_perf_lab.profiler.pipeline import build_profile  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queues", type=int, default=8)
+    parser.add_argument("--symbols", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'dispatches':>12} {'profile_s':>12} {'roofline_s':>12} {'extended_s':>12}")
+
+    for n in args.sizes:
+        set_backend(SyntheticBackend(n, n_queues=args.queues, n_symbols=args.symbols))
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+
+            t0 = time.perf_counter()
+            build_profile("./app", runs=args.runs, persist_rocpd=True, use_cache=False)
+            t1 = time.perf_counter()
+            profile = build_profile("./app", runs=1, roofline=True, persist_rocpd=True, use_cache=False)
+            t2 = time.perf_counter()
+            build_extended_profile(
+                profile,
+                att_dispatch_dir=run_att("./app", use_cache=False),
+                rocpd_db_paths=profile["rocpd_db_paths"],
+                use_cache=False,
+            )
+            t3 = time.perf_counter()
+
+        print(f"{n:>12} {t1 - t0:>12.3f} {t2 - t1:>12.3f} {t3 - t2:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 import json
-from dataclasses import dataclass
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
 
 
 @dataclass
@@ -8,9 +14,15 @@ class AttAnalysisResult:
     instruction_mix: dict
     stall_fraction: float
     idle_fraction: float
+    # Latency per VMEM instruction, not weighted by hits: an instruction run
+    # once counts as much as one in the hot loop. See memory_latency.
     avg_memory_latency: float
     ipc: float
     total_cycles: float
+    # Memory type -> cycles per issued operation (hit-weighted)
+    memory_latency: dict
+    # Memory type (waits on it) or "Other" -> fraction of stall cycles
+    stall_breakdown: dict
 
     @staticmethod
     def empty():
@@ -21,6 +33,8 @@ class AttAnalysisResult:
             avg_memory_latency=0.0,
             ipc=0.0,
             total_cycles=0.0,
+            memory_latency={},
+            stall_breakdown={},
         )
 
 
@@ -40,71 +54,649 @@ def _classify_instruction(isa: str) -> str:
     return "Other"
 
 
+def _memory_type(mnemonic: str) -> int:
+    """Index into MEMORY_TYPES of a memory operation, else -1."""
+    if mnemonic in _EXPORT_MNEMONICS:
+        return MEMORY_TYPES.index("Export")
+    for name, prefixes in _MEMORY_PREFIXES.items():
+        if mnemonic.startswith(prefixes):
+            return MEMORY_TYPES.index(name)
+    return -1
+
+
+def _waited_types(isa: str) -> int:
+    """Bit mask over MEMORY_TYPES of what a wait instruction waits on, else 0."""
+    mnemonic, _, operands = isa.partition(" ")
+    if mnemonic == "s_waitcnt":
+        names = _WAITCNT_OPERAND.findall(operands)
+        if not names:
+            # A raw immediate: treat it as waiting on every counter
+            return (1 << len(MEMORY_TYPES)) - 1
+    elif mnemonic.startswith("s_waitcnt_"):
+        names = [mnemonic[len("s_waitcnt_"):]]
+    elif mnemonic.startswith("s_wait_"):
+        names = mnemonic[len("s_wait_"):].split("_")
+    else:
+        return 0
+
+    mask = 0
+    for name in names:
+        for memory_type in _WAIT_COUNTERS.get(name[:-3] if name.endswith("cnt") else name, ()):
+            mask |= 1 << MEMORY_TYPES.index(memory_type)
+    return mask
+
+
+# Instruction classes reported in instruction_mix; class ids index this tuple
+INSTRUCTION_CLASSES = ("VALU", "SALU", "VMEM", "LDS", "Branch", "MFMA", "Other")
+
+# code.json rows parsed per AttCode block; bounds memory while streaming
+DEFAULT_BLOCK_ROWS = 1 << 16
+
+# Characters of code.json read at a time
+_CHUNK_CHARS = 1 << 20
+
+_CODE_KEY = re.compile(r'"code"\s*:\s*\[')
+_ROW_SEPARATOR = re.compile(r"[\s,]*")
+_ROW_BOUNDARY = re.compile(r'\]\s*,\s*\[\s*"')
+
+_VMEM = INSTRUCTION_CLASSES.index("VMEM")
+
+# Memory operation types that s_waitcnt stalls are attributed to
+MEMORY_TYPES = ("VMEM", "LDS", "SMEM", "Export")
+
+# Mnemonic prefixes of each memory type's operations
+_MEMORY_PREFIXES = {
+    "VMEM": ("global_", "flat_", "buffer_", "tbuffer_", "scratch_", "image_"),
+    "LDS": ("ds_",),
+    "SMEM": ("s_load_", "s_buffer_load_", "s_store_", "s_buffer_store_", "s_scratch_", "s_atomic_", "s_buffer_atomic_"),
+}
+_EXPORT_MNEMONICS = ("exp", "export")
+
+# Wait counter (name without "cnt") -> memory types it counts: gfx9 s_waitcnt
+# operands, gfx10/11 s_waitcnt_<counter> and gfx12 s_wait_<counter>[_<counter>]
+_WAIT_COUNTERS = {
+    "vm": ("VMEM",),
+    "vs": ("VMEM",),
+    "load": ("VMEM",),
+    "store": ("VMEM",),
+    "sample": ("VMEM",),
+    "bvh": ("VMEM",),
+    "lgkm": ("LDS", "SMEM"),
+    "ds": ("LDS",),
+    "km": ("SMEM",),
+    "exp": ("Export",),
+}
+
+_WAITCNT_OPERAND = re.compile(r"([a-z]+)cnt\(")
+
+# rocprofv3 writes each traced dispatch's ATT output to a dir named with this prefix
+_DISPATCH_DIR_PREFIX = "ui_output_agent_"
+
+# Bumped whenever the decoded sidecar layout changes
+_SIDECAR_VERSION = 2
+
+# One decoded code.json row in the sidecar's fixed layout
+_SIDECAR_RECORD = np.dtype(
+    [
+        ("isa_id", "<i4"),
+        ("source_id", "<i4"),
+        ("class_id", "i1"),
+        ("address", "<i8"),
+        ("hits", "<f8"),
+        ("latency", "<f8"),
+        ("stall", "<f8"),
+        ("idle", "<f8"),
+    ]
+)
+
+# AttCode array -> sidecar record field
+_SIDECAR_COLUMNS = {
+    "isa_ids": "isa_id",
+    "source_ids": "source_id",
+    "class_ids": "class_id",
+    "addresses": "address",
+    "hits": "hits",
+    "latency": "latency",
+    "stall": "stall",
+    "idle": "idle",
+}
+
+
+@dataclass
+class AttCode:
+    """
+    code.json rows, columnar: row i of every array is one instruction.
+    isa_ids index into isa (unique instruction text) and source_ids into
+    sources (unique "file:line" text, "" without line info); both tables
+    are shared by every block of one file. class_ids index into
+    INSTRUCTION_CLASSES.
+    """
+
+    isa: list
+    sources: list
+    isa_ids: np.ndarray
+    source_ids: np.ndarray
+    class_ids: np.ndarray
+    addresses: np.ndarray
+    hits: np.ndarray
+    latency: np.ndarray
+    stall: np.ndarray
+    idle: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.isa_ids)
+
+
+def _last_row_end(buf: str, start: int) -> int:
+    """
+    Index just past the last row in buf[start:] that another row follows,
+    or 0. A row is a list opening with its ISA string, and '["' cannot
+    occur inside a JSON string, so '],["' only ever separates rows.
+    """
+    i = len(buf)
+    while True:
+        i = buf.rfind("]", start, i)
+        if i < 0:
+            return 0
+        if _ROW_BOUNDARY.match(buf, i):
+            return i + 1
+
+
+def _iter_code_rows(code_json: Path, chunk_chars: int = _CHUNK_CHARS):
+    """
+    Entries of the top-level "code" array, in lists of consecutive rows,
+    decoded from a window of the file so only about one chunk is in memory.
+    The complete rows of each window are decoded in a single call; rows
+    straddling the window edge (and the end of the array) one at a time.
+    """
+    decoder = json.JSONDecoder()
+    with open(code_json, encoding="utf-8") as f:
+        buf = ""
+        while True:
+            more = f.read(chunk_chars)
+            match = _CODE_KEY.search(buf + more)
+            if match is not None:
+                buf = (buf + more)[match.end():]
+                break
+            if not more:
+                return
+            # Keep enough tail for a key split across chunks
+            buf = (buf + more)[-16:]
+
+        pos = 0
+        while True:
+            end = _last_row_end(buf, pos)
+            if end:
+                try:
+                    rows = json.loads("[" + buf[pos:end] + "]")
+                except ValueError:
+                    # The array ends inside this window; the loop below stops there
+                    rows = None
+                if rows is not None:
+                    yield rows
+                    pos = end
+
+            while True:
+                pos = _ROW_SEPARATOR.match(buf, pos).end()
+                if pos < len(buf) and buf[pos] == "]":
+                    return
+                try:
+                    row, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    break
+                yield [row]
+
+            more = f.read(chunk_chars)
+            if not more:
+                raise ValueError(f"{code_json} ends inside the code array")
+            buf = buf[pos:] + more
+            pos = 0
+
+
+def iter_att_code(code_json: Path, block_rows: int = DEFAULT_BLOCK_ROWS, chunk_chars: int = _CHUNK_CHARS):
+    """
+    Stream code.json as AttCode blocks of up to block_rows instructions,
+    reading chunk_chars characters at a time. Each distinct mnemonic is
+    classified once.
+    """
+    isa_index = {}
+    isa = []
+    isa_class = []
+    mnemonic_class = {}
+    source_index = {}
+    sources = []
+
+    def block(rows):
+        cols = list(zip(*rows))
+        # New texts get ids in order of first appearance, whatever the block size
+        for text in [t for t in dict.fromkeys(cols[0]) if t not in isa_index]:
+            mnemonic = text.split(" ", 1)[0]
+            if mnemonic not in mnemonic_class:
+                mnemonic_class[mnemonic] = INSTRUCTION_CLASSES.index(_classify_instruction(mnemonic))
+            isa_index[text] = len(isa)
+            isa.append(text)
+            isa_class.append(mnemonic_class[mnemonic])
+        ids = np.fromiter(map(isa_index.__getitem__, cols[0]), dtype=np.int32, count=len(rows))
+
+        for text in [t for t in dict.fromkeys(cols[3]) if t not in source_index]:
+            source_index[text] = len(sources)
+            sources.append(text)
+
+        return AttCode(
+            isa=isa,
+            sources=sources,
+            isa_ids=ids,
+            source_ids=np.fromiter(map(source_index.__getitem__, cols[3]), dtype=np.int32, count=len(rows)),
+            class_ids=np.asarray(isa_class, dtype=np.int8)[ids],
+            addresses=np.asarray(cols[5], dtype=np.int64),
+            hits=np.asarray(cols[6], dtype=np.float64),
+            latency=np.asarray(cols[7], dtype=np.float64),
+            stall=np.asarray(cols[8], dtype=np.float64),
+            idle=np.asarray(cols[9], dtype=np.float64),
+        )
+
+    pending = []
+    for rows in _iter_code_rows(code_json, chunk_chars):
+        pending += rows
+        while len(pending) >= block_rows:
+            yield block(pending[:block_rows])
+            del pending[:block_rows]
+    if pending:
+        yield block(pending)
+
+
+def _empty_att_code() -> AttCode:
+    records = np.empty(0, dtype=_SIDECAR_RECORD)
+    return AttCode(isa=[], sources=[], **{name: records[column] for name, column in _SIDECAR_COLUMNS.items()})
+
+
+def _sidecar_paths(code_json: Path):
+    """
+    Decoded rows and their metadata, hidden next to code.json so they
+    travel with the dispatch dir without changing its digest.
+    """
+    return code_json.with_name(f".{code_json.name}.bin"), code_json.with_name(f".{code_json.name}.meta.json")
+
+
+def _source_stamp(code_json: Path) -> dict:
+    st = code_json.stat()
+    return {"version": _SIDECAR_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _load_sidecar(code_json: Path) -> Optional[AttCode]:
+    """code.json's decoded rows, memory-mapped, or None if missing or stale."""
+    bin_path, meta_path = _sidecar_paths(code_json)
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get("source") != _source_stamp(code_json):
+            return None
+        if meta["rows"] == 0:
+            return _empty_att_code()
+        records = np.memmap(bin_path, dtype=_SIDECAR_RECORD, mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+    if len(records) != meta["rows"]:
+        return None
+
+    return AttCode(
+        isa=meta["isa"],
+        sources=meta["sources"],
+        **{name: records[column] for name, column in _SIDECAR_COLUMNS.items()},
+    )
+
+
+def _iter_and_store(code_json: Path, block_rows: int = DEFAULT_BLOCK_ROWS):
+    """
+    iter_att_code, also appending each block to the sidecar so the next
+    load skips parsing. Failing to write the sidecar only loses the cache.
+    """
+    bin_path, meta_path = _sidecar_paths(code_json)
+    stamp = _source_stamp(code_json)
+    tmp_bin = bin_path.with_name(f"{bin_path.name}.{os.getpid()}.tmp")
+    tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+
+    try:
+        out = open(tmp_bin, "wb")
+    except OSError as e:
+        print(f"[CACHE WARNING] Cannot write ATT sidecar for {code_json}: {e}")
+        out = None
+
+    rows = 0
+    isa = []
+    sources = []
+    try:
+        for code in iter_att_code(code_json, block_rows):
+            if out is not None:
+                records = np.empty(len(code), dtype=_SIDECAR_RECORD)
+                for name, column in _SIDECAR_COLUMNS.items():
+                    records[column] = getattr(code, name)
+                try:
+                    out.write(records.tobytes())
+                except OSError as e:
+                    print(f"[CACHE WARNING] Cannot write ATT sidecar for {code_json}: {e}")
+                    out.close()
+                    out = None
+            rows += len(code)
+            isa, sources = code.isa, code.sources
+            yield code
+
+        if out is not None:
+            out.close()
+            out = None
+            # Rows first, then the metadata that validates them
+            os.replace(tmp_bin, bin_path)
+            tmp_meta.write_text(json.dumps({"source": stamp, "rows": rows, "isa": isa, "sources": sources}))
+            os.replace(tmp_meta, meta_path)
+    except OSError as e:
+        print(f"[CACHE WARNING] Cannot write ATT sidecar for {code_json}: {e}")
+    finally:
+        if out is not None:
+            out.close()
+        for tmp in (tmp_bin, tmp_meta):
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+
+def read_att_code(code_json: Path, use_sidecar: bool = True) -> AttCode:
+    """
+    All of code.json as one AttCode. With use_sidecar, a previous decode
+    is memory-mapped from the sidecar when code.json is unchanged (same
+    size and mtime), and a fresh decode is stored for next time.
+    """
+    if use_sidecar:
+        cached = _load_sidecar(code_json)
+        if cached is not None:
+            return cached
+        blocks = list(_iter_and_store(code_json))
+    else:
+        blocks = list(iter_att_code(code_json))
+
+    if not blocks:
+        return _empty_att_code()
+    return AttCode(
+        isa=blocks[-1].isa,
+        sources=blocks[-1].sources,
+        **{name: np.concatenate([getattr(b, name) for b in blocks]) for name in _SIDECAR_COLUMNS},
+    )
+
+
+def _memory_rows(code: AttCode) -> tuple:
+    """
+    (memory types, waited-on type masks, hits, latency, stall) of code's
+    memory operations and memory waits, the rows wait stall attribution
+    needs.
+    """
+    types = np.full(len(code.isa), -1, dtype=np.int8)
+    waits = np.zeros(len(code.isa), dtype=np.int8)
+    mnemonic_type = {}
+    for i in np.unique(code.isa_ids):
+        text = code.isa[i]
+        mnemonic = text.split(" ", 1)[0]
+        if mnemonic not in mnemonic_type:
+            mnemonic_type[mnemonic] = _memory_type(mnemonic)
+        types[i] = mnemonic_type[mnemonic]
+        if mnemonic.startswith("s_wait"):
+            waits[i] = _waited_types(text)
+
+    row_types = types[code.isa_ids]
+    row_waits = waits[code.isa_ids]
+    keep = (row_types >= 0) | (row_waits != 0)
+    return tuple(np.asarray(a)[keep] for a in (row_types, row_waits, code.hits, code.latency, code.stall))
+
+
+class _WaitAttribution:
+    """
+    Hits and latency of each memory type's operations, and the stall
+    cycles of the waits on it, for one code.json fed block by block in file
+    order (program order, as the decoder writes it). A wait drains the
+    operations of its types issued since the previous wait on them and its
+    stall is split in proportion to their latency; a wait with none in
+    between (e.g. loop-carried) goes by the kernel's latency of its types.
+
+    Only per-type sums cross blocks: the latency still pending on each type,
+    and the stall of waits with nothing pending per wait mask, split once
+    the whole file's latencies are known.
+    """
+
+    def __init__(self):
+        n_types = len(MEMORY_TYPES)
+        self.type_hits = np.zeros(n_types)
+        self.type_latency = np.zeros(n_types)
+        self._stall = np.zeros(n_types)
+        # Latency of each type's operations issued since the last wait on it
+        self._pending = np.zeros(n_types)
+        # Stall of waits with nothing pending, indexed by wait mask
+        self._deferred = np.zeros(1 << n_types)
+
+    def add(self, types, waits, hits, latency, stall):
+        """One block's _memory_rows."""
+        n_types = len(MEMORY_TYPES)
+        is_op = types >= 0
+        self.type_hits += np.bincount(types[is_op], weights=hits[is_op], minlength=n_types)
+        self.type_latency += np.bincount(types[is_op], weights=latency[is_op], minlength=n_types)
+
+        wait_rows = np.flatnonzero(waits)
+        masks = waits[wait_rows].astype(np.int64) & (len(self._deferred) - 1)
+        weights = np.zeros((len(wait_rows), n_types))
+        for t in range(n_types):
+            on_t = np.flatnonzero((masks >> t) & 1)
+            ops = np.flatnonzero(types == t)
+            # Each operation is drained by the first wait on its type after it
+            drained_by = np.searchsorted(wait_rows[on_t], ops)
+            drained = drained_by < len(on_t)
+            if len(on_t):
+                weights[on_t, t] = np.bincount(drained_by[drained], weights=latency[ops[drained]], minlength=len(on_t))
+                weights[on_t[0], t] += self._pending[t]
+                self._pending[t] = 0.0
+            self._pending[t] += float(latency[ops[~drained]].sum())
+
+        empty = weights.sum(axis=1) == 0
+        self._deferred += np.bincount(masks[empty], weights=stall[wait_rows[empty]], minlength=len(self._deferred))
+        shares = weights[~empty] / weights[~empty].sum(axis=1, keepdims=True)
+        self._stall += (shares * stall[wait_rows[~empty], None]).sum(axis=0)
+
+    def wait_stall(self) -> np.ndarray:
+        """Stall cycles per memory type waited on, once every block is added."""
+        masks = np.flatnonzero(self._deferred)
+        mask_bits = ((masks[:, None] >> np.arange(len(MEMORY_TYPES))) & 1).astype(float)
+        weights = mask_bits * self.type_latency
+        unknown = weights.sum(axis=1) == 0
+        weights[unknown] = mask_bits[unknown]
+        shares = weights / weights.sum(axis=1, keepdims=True)
+        return self._stall + (shares * self._deferred[masks, None]).sum(axis=0)
+
+
+@dataclass
+class AttTotals:
+    """
+    Additive sums behind an AttAnalysisResult. Totals of several code.json
+    files (dispatches, shader engines) merge exactly, so the combined ratios
+    are hit- and cycle-weighted rather than averages of averages. The one
+    exception is avg_memory_latency, kept a per-instruction mean over all
+    VMEM rows (the bottleneck classifier's thresholds assume it); only
+    memory_latency is per issued operation.
+    """
+
+    rows: int = 0
+    class_rows: np.ndarray = field(default_factory=lambda: np.zeros(len(INSTRUCTION_CLASSES)))
+    class_hits: np.ndarray = field(default_factory=lambda: np.zeros(len(INSTRUCTION_CLASSES)))
+    latency: float = 0.0
+    stall: float = 0.0
+    idle: float = 0.0
+    vmem_latency: float = 0.0
+    memory_hits: np.ndarray = field(default_factory=lambda: np.zeros(len(MEMORY_TYPES)))
+    memory_latency: np.ndarray = field(default_factory=lambda: np.zeros(len(MEMORY_TYPES)))
+    # Stall cycles of waits, per memory type waited on
+    wait_stall: np.ndarray = field(default_factory=lambda: np.zeros(len(MEMORY_TYPES)))
+
+    def add(self, code: AttCode):
+        n_classes = len(INSTRUCTION_CLASSES)
+        self.rows += len(code)
+        self.class_rows += np.bincount(code.class_ids, minlength=n_classes)
+        self.class_hits += np.bincount(code.class_ids, weights=code.hits, minlength=n_classes)
+        self.latency += float(code.latency.sum())
+        self.stall += float(code.stall.sum())
+        self.idle += float(code.idle.sum())
+        self.vmem_latency += float(code.latency[code.class_ids == _VMEM].sum())
+
+    def add_waits(self, waits: _WaitAttribution):
+        """Wait stall attribution of one whole code.json."""
+        self.memory_hits += waits.type_hits
+        self.memory_latency += waits.type_latency
+        self.wait_stall += waits.wait_stall()
+
+    def merge(self, other: "AttTotals") -> "AttTotals":
+        return AttTotals(
+            rows=self.rows + other.rows,
+            class_rows=self.class_rows + other.class_rows,
+            class_hits=self.class_hits + other.class_hits,
+            latency=self.latency + other.latency,
+            stall=self.stall + other.stall,
+            idle=self.idle + other.idle,
+            vmem_latency=self.vmem_latency + other.vmem_latency,
+            memory_hits=self.memory_hits + other.memory_hits,
+            memory_latency=self.memory_latency + other.memory_latency,
+            wait_stall=self.wait_stall + other.wait_stall,
+        )
+
+    def result(self) -> AttAnalysisResult:
+        if self.rows == 0:
+            return AttAnalysisResult.empty()
+
+        total_hits = self.class_hits.sum()
+        total_cycles = self.latency + self.stall + self.idle
+
+        instruction_mix = {
+            INSTRUCTION_CLASSES[k]: (float(self.class_hits[k] / total_hits) if total_hits > 0 else 0.0)
+            for k in np.flatnonzero(self.class_rows)
+        }
+
+        stall_fraction = self.stall / total_cycles if total_cycles > 0 else 0.0
+        idle_fraction = self.idle / total_cycles if total_cycles > 0 else 0.0
+        ipc = total_hits / total_cycles if total_cycles > 0 else 0.0
+
+        # Mean over VMEM instructions of every file, not weighted by hits
+        memory_access_count = self.class_rows[_VMEM]
+        avg_memory_latency = (
+            self.vmem_latency / memory_access_count
+            if memory_access_count > 0
+            else 0.0
+        )
+
+        memory_latency = {
+            MEMORY_TYPES[t]: float(self.memory_latency[t] / self.memory_hits[t])
+            for t in np.flatnonzero(self.memory_hits)
+        }
+
+        stall_breakdown = {}
+        if self.stall > 0:
+            stall_breakdown = {
+                MEMORY_TYPES[t]: float(self.wait_stall[t] / self.stall) for t in np.flatnonzero(self.wait_stall)
+            }
+            other = self.stall - self.wait_stall.sum()
+            if other > 0:
+                stall_breakdown["Other"] = float(other / self.stall)
+
+        return AttAnalysisResult(
+            instruction_mix=instruction_mix,
+            stall_fraction=float(stall_fraction),
+            idle_fraction=float(idle_fraction),
+            avg_memory_latency=float(avg_memory_latency),
+            ipc=float(ipc),
+            total_cycles=float(total_cycles),
+            memory_latency=memory_latency,
+            stall_breakdown=stall_breakdown,
+        )
+
+
+def att_totals(code_json: Path, use_sidecar: bool = True, block_rows: int = DEFAULT_BLOCK_ROWS) -> AttTotals:
+    """
+    Sums over one code.json: from its sidecar when one is current (see
+    read_att_code), else parsed block by block, holding one block at a time.
+    """
+    totals = AttTotals()
+    waits = _WaitAttribution()
+    cached = _load_sidecar(code_json) if use_sidecar else None
+    if cached is not None:
+        blocks = [cached]
+    elif use_sidecar:
+        blocks = _iter_and_store(code_json, block_rows)
+    else:
+        blocks = iter_att_code(code_json, block_rows)
+
+    for code in blocks:
+        totals.add(code)
+        waits.add(*_memory_rows(code))
+    totals.add_waits(waits)
+    return totals
+
+
 def analyze_att(dispatch_dir: Path) -> AttAnalysisResult:
     code_json = dispatch_dir / "code.json"
 
     if not code_json.exists():
         raise RuntimeError(f"code.json not found in {dispatch_dir}")
 
-    with open(code_json) as f:
-        data = json.load(f)
-
-    code_entries = data.get("code", [])
+    return att_totals(code_json).result()
 
-    total_hits = 0.0
-    total_latency = 0.0
-    total_stall = 0.0
-    total_idle = 0.0
 
-    class_hits = {}
+@dataclass
+class AttRunAnalysis:
+    """ATT results of a whole run: each dispatch's and all of them combined."""
 
-    memory_latency_sum = 0.0
-    memory_access_count = 0.0
+    # Dispatch dir name -> result
+    per_dispatch: Dict[str, AttAnalysisResult]
+    combined: AttAnalysisResult
 
-    if not code_entries:
-        return AttAnalysisResult.empty()
 
-    for entry in code_entries:
-        isa = entry[0]
-        hit = float(entry[6])
-        latency = float(entry[7])
-        stall = float(entry[8])
-        idle = float(entry[9])
+def find_att_dispatches(att_dir: Path) -> List[Path]:
+    """The dispatch dir itself, or every ui_output_agent_* dir of an ATT output dir."""
+    att_dir = Path(att_dir)
+    if att_dir.name.startswith(_DISPATCH_DIR_PREFIX) or (att_dir / "code.json").exists():
+        return [att_dir]
+    return sorted(p for p in att_dir.iterdir() if p.is_dir() and p.name.startswith(_DISPATCH_DIR_PREFIX))
 
-        total_hits += hit
-        total_latency += latency
-        total_stall += stall
-        total_idle += idle
 
-        cls = _classify_instruction(isa)
-        class_hits[cls] = class_hits.get(cls, 0.0) + hit
+def code_files(dispatch_dir: Path) -> List[Path]:
+    """
+    A dispatch's code.json, or with none at its top level the per-shader-
+    engine code.json files below it.
+    """
+    top = dispatch_dir / "code.json"
+    if top.exists():
+        return [top]
+    return sorted(dispatch_dir.rglob("code.json"))
 
-        if cls == "VMEM":
-            memory_latency_sum += latency
-            memory_access_count += 1
 
-    total_cycles = total_latency + total_stall + total_idle
+def analyze_att_dispatches(att_dir: Path, max_workers: Optional[int] = None) -> AttRunAnalysis:
+    """
+    Analyze every dispatch (and shader engine) of an ATT run, one code.json
+    per worker process, and merge their totals. att_dir is an ATT output
+    dir or a single dispatch dir.
+    """
+    dispatches = find_att_dispatches(att_dir)
+    units = [(d.name, f) for d in dispatches for f in code_files(d)]
+    if not units:
+        raise RuntimeError(f"code.json not found in {att_dir}")
 
-    instruction_mix = {
-        k: (v / total_hits if total_hits > 0 else 0.0)
-        for k, v in class_hits.items()
-    }
+    workers = min(len(units), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            totals = list(pool.map(att_totals, [f for _, f in units]))
+    else:
+        totals = [att_totals(f) for _, f in units]
 
-    stall_fraction = total_stall / total_cycles if total_cycles > 0 else 0.0
-    idle_fraction = total_idle / total_cycles if total_cycles > 0 else 0.0
-    ipc = total_hits / total_cycles if total_cycles > 0 else 0.0
+    per_dispatch = {}
+    for (name, _), t in zip(units, totals):
+        per_dispatch[name] = per_dispatch[name].merge(t) if name in per_dispatch else t
 
-    avg_memory_latency = (
-        memory_latency_sum / memory_access_count
-        if memory_access_count > 0
-        else 0.0
-    )
+    combined = AttTotals()
+    for t in per_dispatch.values():
+        combined = combined.merge(t)
 
-    return AttAnalysisResult(
-        instruction_mix=instruction_mix,
-        stall_fraction=stall_fraction,
-        idle_fraction=idle_fraction,
-        avg_memory_latency=avg_memory_latency,
-        ipc=ipc,
-        total_cycles=total_cycles,
+    return AttRunAnalysis(
+        per_dispatch={name: t.result() for name, t in per_dispatch.items()},
+        combined=combined.result(),
     )
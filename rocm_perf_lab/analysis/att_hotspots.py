@@ -0,0 +1,295 @@
+import re
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from rocm_perf_lab.analysis.att_analysis import AttCode, code_files, find_att_dispatches, read_att_code
+from rocm_perf_lab.profiler.symbol_cache import demangle_many
+
+
+# Entries kept per ranking (instructions, blocks, source lines, loops)
+DEFAULT_TOP_K = 20
+
+# Instructions after which control does not simply fall through to the next one
+_BLOCK_END_MNEMONICS = ("s_branch", "s_cbranch_", "s_setpc", "s_swappc", "s_endpgm", "s_trap", "s_rfe")
+
+# "file:line" or "file:line:column", as the ATT decoder reports debug line info
+_SOURCE_LINE = re.compile(r"^(?P<file>.+?):(?P<line>\d+)(?::\d+)?$")
+
+# Mangled symbol operands, e.g. a call target "_Z6helperPf@rel32@lo+4"
+_MANGLED_SYMBOL = re.compile(r"\b_Z[A-Za-z0-9_.$]+")
+
+
+@dataclass
+class InstructionHotspot:
+    address: int
+    isa: str
+    source: Optional[str]
+    hits: float
+    latency: float
+    stall: float
+    # Index of the containing BasicBlock, in address order
+    block: int
+
+
+@dataclass
+class BasicBlock:
+    index: int
+    # Addresses of the first and last instruction
+    start: int
+    end: int
+    instructions: int
+    hits: float
+    latency: float
+    stall: float
+    # Source line with the most stall cycles in the block
+    source: Optional[str]
+
+
+@dataclass
+class SourceLine:
+    file: str
+    line: int
+    hits: float
+    latency: float
+    stall: float
+
+
+@dataclass
+class Loop:
+    """Instructions from a backward branch's target up to the branch."""
+
+    start: int
+    end: int
+    hits: float
+    latency: float
+    stall: float
+    # Hottest first
+    lines: List[SourceLine]
+
+
+@dataclass
+class HotspotIndex:
+    """
+    Where a kernel's cycles go, per instruction: the top instructions by
+    stall and by latency, basic blocks, source lines and loops, each ranked
+    by stall cycles.
+    """
+
+    by_stall: List[InstructionHotspot]
+    by_latency: List[InstructionHotspot]
+    blocks: List[BasicBlock]
+    lines: List[SourceLine]
+    loops: List[Loop]
+    total_stall: float
+
+    def hot_loop(self) -> Optional[Loop]:
+        return self.loops[0] if self.loops else None
+
+    def for_source(self, source_name: str) -> "HotspotIndex":
+        """The index with source lines, overall and per loop, limited to the file named source_name."""
+
+        def keep(lines):
+            return [l for l in lines if Path(l.file).name == source_name]
+
+        return replace(self, lines=keep(self.lines), loops=[replace(loop, lines=keep(loop.lines)) for loop in self.loops])
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _merged_table(codes: List[AttCode], table: str, ids: str):
+    """One text table for several AttCodes and every row's id into it."""
+    merged = {}
+    out = []
+    for code in codes:
+        remap = np.array([merged.setdefault(t, len(merged)) for t in getattr(code, table)], dtype=np.int64)
+        out.append(remap[getattr(code, ids)] if len(remap) else np.zeros(0, dtype=np.int64))
+    return list(merged), (np.concatenate(out) if out else np.zeros(0, dtype=np.int64))
+
+
+def _demangle_operands(isa: List[str]) -> List[str]:
+    """ISA texts with mangled symbol operands demangled, through the shared symbol cache."""
+    names = {m for text in isa for m in _MANGLED_SYMBOL.findall(text)}
+    if not names:
+        return isa
+    demangled = demangle_many(names)
+    return [_MANGLED_SYMBOL.sub(lambda m: demangled[m.group(0)], text) for text in isa]
+
+
+def _branch_target(address: int, isa: str) -> Optional[int]:
+    """
+    Target of a SOPP branch printed as LLVM disassembles it: a signed
+    16-bit dword offset from the next instruction. None for labels and
+    indirect branches.
+    """
+    parts = isa.split()
+    if len(parts) < 2 or not parts[0].startswith(("s_branch", "s_cbranch_")):
+        return None
+    try:
+        simm16 = int(parts[1].rstrip(","), 0)
+    except ValueError:
+        return None
+    offset = simm16 - (1 << 16) if simm16 >= 1 << 15 else simm16
+    return address + 4 + 4 * offset
+
+
+def _parse_source(text: str):
+    m = _SOURCE_LINE.match(text or "")
+    return (m.group("file"), int(m.group("line"))) if m else None
+
+
+def _source_lines(sources: List[str]):
+    """Distinct (file, line) of a sources table and each entry's index into them, -1 without line info."""
+    keys = {}
+    line_ids = [
+        -1 if parsed is None else keys.setdefault(parsed, len(keys))
+        for parsed in map(_parse_source, sources)
+    ]
+    return list(keys), np.array(line_ids, dtype=np.int64)
+
+
+def _line_ranking(lines: list, line_ids, hits, latency, stall, top_k: int) -> List[SourceLine]:
+    known = line_ids >= 0
+    ids = line_ids[known]
+    n = len(lines)
+    line_hits, line_latency, line_stall = (
+        np.bincount(ids, weights=w[known], minlength=n) for w in (hits, latency, stall)
+    )
+    present = np.flatnonzero(np.bincount(ids, minlength=n))
+    ranked = present[np.lexsort((-line_latency[present], -line_stall[present]))][:top_k]
+    return [
+        SourceLine(
+            file=lines[k][0],
+            line=lines[k][1],
+            hits=float(line_hits[k]),
+            latency=float(line_latency[k]),
+            stall=float(line_stall[k]),
+        )
+        for k in ranked
+    ]
+
+
+def hotspot_index(codes: List[AttCode], top_k: int = DEFAULT_TOP_K) -> HotspotIndex:
+    """
+    Index several code.json decodes (dispatches or shader engines of one
+    kernel) together: instructions at the same address are summed.
+    """
+    isa, isa_ids = _merged_table(codes, "isa", "isa_ids")
+    isa = _demangle_operands(isa)
+    sources, source_ids = _merged_table(codes, "sources", "source_ids")
+    addresses = np.concatenate([c.addresses for c in codes]) if codes else np.zeros(0, dtype=np.int64)
+    if len(addresses) == 0:
+        return HotspotIndex([], [], [], [], [], 0.0)
+
+    # One row per instruction address, in address order
+    addr, first, inverse = np.unique(addresses, return_index=True, return_inverse=True)
+    n = len(addr)
+    hits, latency, stall = (
+        np.bincount(inverse, weights=np.concatenate([getattr(c, name) for c in codes]), minlength=n)
+        for name in ("hits", "latency", "stall")
+    )
+    text = [isa[i] for i in isa_ids[first]]
+    src_ids = source_ids[first]
+    lines, line_of_source = _source_lines(sources)
+    line_ids = line_of_source[src_ids]
+
+    # Basic blocks: split after control flow and at branch targets
+    targets = {}
+    block_end = np.zeros(n, dtype=bool)
+    for i, t in enumerate(text):
+        if t.startswith(_BLOCK_END_MNEMONICS):
+            block_end[i] = True
+            target = _branch_target(int(addr[i]), t)
+            if target is not None:
+                targets[i] = target
+    starts = np.zeros(n, dtype=bool)
+    starts[0] = True
+    starts[1:] |= block_end[:-1]
+    starts |= np.isin(addr, list(targets.values()))
+    block_of = np.cumsum(starts) - 1
+
+    def instruction(i):
+        return InstructionHotspot(
+            address=int(addr[i]),
+            isa=text[i],
+            source=sources[src_ids[i]] or None,
+            hits=float(hits[i]),
+            latency=float(latency[i]),
+            stall=float(stall[i]),
+            block=int(block_of[i]),
+        )
+
+    by_stall = [instruction(i) for i in np.lexsort((-latency, -stall))[:top_k] if stall[i] > 0]
+    by_latency = [instruction(i) for i in np.lexsort((-stall, -latency))[:top_k] if latency[i] > 0]
+
+    blocks = []
+    n_blocks = int(block_of[-1]) + 1
+    block_hits, block_latency, block_stall = (
+        np.bincount(block_of, weights=w, minlength=n_blocks) for w in (hits, latency, stall)
+    )
+    for b in np.lexsort((-block_latency, -block_stall))[:top_k]:
+        rows = np.flatnonzero(block_of == b)
+        hottest = rows[np.argmax(stall[rows])]
+        blocks.append(
+            BasicBlock(
+                index=int(b),
+                start=int(addr[rows[0]]),
+                end=int(addr[rows[-1]]),
+                instructions=len(rows),
+                hits=float(block_hits[b]),
+                latency=float(block_latency[b]),
+                stall=float(block_stall[b]),
+                source=sources[src_ids[hottest]] or None,
+            )
+        )
+
+    loops = []
+    for i, target in targets.items():
+        if target > addr[i]:
+            continue
+        rows = (addr >= target) & (addr <= addr[i])
+        loops.append(
+            Loop(
+                start=int(target),
+                end=int(addr[i]),
+                hits=float(hits[rows].sum()),
+                latency=float(latency[rows].sum()),
+                stall=float(stall[rows].sum()),
+                lines=_line_ranking(lines, line_ids[rows], hits[rows], latency[rows], stall[rows], top_k),
+            )
+        )
+    loops.sort(key=lambda loop: (-loop.stall, -loop.latency))
+
+    return HotspotIndex(
+        by_stall=by_stall,
+        by_latency=by_latency,
+        blocks=blocks,
+        lines=_line_ranking(lines, line_ids, hits, latency, stall, top_k),
+        loops=loops[:top_k],
+        total_stall=float(stall.sum()),
+    )
+
+
+def build_hotspot_index(att_dir: Path, top_k: int = DEFAULT_TOP_K) -> HotspotIndex:
+    """Hotspot index over every code.json of an ATT output dir or dispatch dir."""
+    codes = [read_att_code(f) for d in find_att_dispatches(att_dir) for f in code_files(d)]
+    return hotspot_index(codes, top_k)
+
+
+def hot_source_lines(hotspots: Optional[dict], source_name: str) -> List[int]:
+    """
+    Lines of the file named source_name worth optimizing first, hottest
+    first, from a HotspotIndex.to_dict(): the hottest loop's lines, else
+    the hottest lines overall.
+    """
+    if not hotspots:
+        return []
+    loops = hotspots.get("loops") or []
+    for lines in ([loops[0]["lines"]] if loops else []) + [hotspots.get("lines") or []]:
+        found = [entry["line"] for entry in lines if Path(entry["file"]).name == source_name]
+        if found:
+            return found
+    return []
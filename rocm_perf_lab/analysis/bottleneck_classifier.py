@@ -2,6 +2,29 @@ from dataclasses import dataclass
 from typing import Optional
 
 
+# Share of stall cycles a memory type's waits need to be called dominant
+_DOMINANT_WAIT_SHARE = 0.5
+
+# LDS cycles per access above which waits on LDS point at bank conflicts
+_LDS_CONFLICT_LATENCY = 128.0
+
+# Share of stall cycles that makes a memory type's waits the secondary bottleneck
+_SECONDARY_WAIT_SHARE = 0.2
+
+# Memory type waited on -> bottleneck it indicates
+_WAIT_BOTTLENECKS = {
+    "VMEM": "Memory Latency Bound",
+    "LDS": "LDS Latency Bound",
+    "SMEM": "Scalar Load Latency",
+}
+
+
+def _wait_bottleneck(kind: str, memory_latency: dict) -> str:
+    if kind == "LDS" and memory_latency.get("LDS", 0.0) > _LDS_CONFLICT_LATENCY:
+        return "LDS Bank Conflicts"
+    return _WAIT_BOTTLENECKS[kind]
+
+
 @dataclass
 class BottleneckResult:
     primary: str
@@ -15,7 +38,14 @@ def classify_bottleneck(
     instruction_mix: dict,
     roofline_bound: Optional[str],
     avg_memory_latency: float,
+    stall_breakdown: Optional[dict] = None,
+    memory_latency: Optional[dict] = None,
 ) -> BottleneckResult:
+    """
+    With stall_breakdown and memory_latency (see AttAnalysisResult), stalls
+    are attributed to the memory type they wait on, which tells global
+    memory latency from LDS bank conflicts and scalar load latency.
+    """
 
     reasoning = []
     primary = "Unknown"
@@ -27,8 +57,40 @@ def classify_bottleneck(
     vmem = instruction_mix.get("VMEM", 0.0)
     branch = instruction_mix.get("Branch", 0.0)
 
+    memory_latency = memory_latency or {}
+    waits = sorted(
+        ((share, kind) for kind, share in (stall_breakdown or {}).items() if kind in _WAIT_BOTTLENECKS),
+        reverse=True,
+    )
+    dominant_wait = waits[0][1] if waits and waits[0][0] >= _DOMINANT_WAIT_SHARE else None
+
+    # LDS bound: stalls mostly wait on LDS
+    if stall_fraction > 0.30 and dominant_wait == "LDS":
+        primary = _wait_bottleneck("LDS", memory_latency)
+        reasoning.append(f"{waits[0][0]:.0%} of stall cycles wait on LDS (lgkmcnt).")
+        if primary == "LDS Bank Conflicts":
+            confidence = 0.75
+            reasoning.append(
+                f"LDS accesses take {memory_latency['LDS']:.0f} cycles each, consistent with bank conflicts."
+            )
+        else:
+            confidence = 0.6
+
+    # Scalar load latency: stalls mostly wait on SMEM
+    elif stall_fraction > 0.30 and dominant_wait == "SMEM":
+        primary = "Scalar Load Latency"
+        confidence = 0.7
+        reasoning.append(f"{waits[0][0]:.0%} of stall cycles wait on scalar loads (lgkmcnt).")
+
     # Memory latency bound
-    if stall_fraction > 0.30 and avg_memory_latency > 200 and vmem < 0.20:
+    elif stall_fraction > 0.30 and dominant_wait == "VMEM" and vmem < 0.20:
+        primary = "Memory Latency Bound"
+        confidence = 0.85
+        reasoning.append(f"{waits[0][0]:.0%} of stall cycles wait on global memory (vmcnt).")
+        if "VMEM" in memory_latency:
+            reasoning.append(f"Global memory accesses take {memory_latency['VMEM']:.0f} cycles each.")
+
+    elif stall_fraction > 0.30 and stall_breakdown is None and avg_memory_latency > 200 and vmem < 0.20:
         primary = "Memory Latency Bound"
         confidence = 0.8
         reasoning.append("High stall fraction with high memory latency.")
@@ -62,6 +124,15 @@ def classify_bottleneck(
         confidence = 0.5
         reasoning.append("No dominant bottleneck detected.")
 
+    # Secondary: the largest other memory type stalls wait on
+    for share, kind in waits:
+        if share < _SECONDARY_WAIT_SHARE:
+            break
+        if _wait_bottleneck(kind, memory_latency) != primary:
+            secondary = _wait_bottleneck(kind, memory_latency)
+            reasoning.append(f"{share:.0%} of stall cycles wait on {kind}.")
+            break
+
     return BottleneckResult(
         primary=primary,
         secondary=secondary,
@@ -1,6 +1,11 @@
-import sqlite3
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from rocm_perf_lab.analysis.hsa_dependencies import TraceEdges, load_trace_edges
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery, connect_readonly
 
 
 @dataclass
@@ -16,221 +21,496 @@ class CriticalPathResult:
     symbol_contributions: Dict[str, float]
 
 
-def _get_table(conn, prefix: str) -> str:
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?;",
-        (f"{prefix}%",),
-    )
-    row = cur.fetchone()
-    if not row:
-        raise RuntimeError(f"Table with prefix {prefix} not found")
-    return row[0]
+@dataclass
+class DispatchTable:
+    """
+    Columnar dispatch table: one int64 entry per dispatch in each array,
+    ordered by start time. Kernel names are interned; `symbols` holds
+    indices into `symbol_names`. trace_edges holds dependencies recovered
+    from the HSA trace, when the DB has one.
+    """
+
+    ids: np.ndarray
+    kernel_ids: np.ndarray
+    queues: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    symbols: np.ndarray
+    symbol_names: List[str]
+    trace_edges: Optional[TraceEdges] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def durations(self) -> np.ndarray:
+        return self.ends - self.starts
 
 
-def analyze_critical_path(db_path: str) -> CriticalPathResult:
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+@dataclass
+class DispatchGraph:
+    """Dispatch DAG in CSR form: successors of i are indices[indptr[i]:indptr[i + 1]]."""
 
-    # Prefer modern ROCm 7.x schema (kernels table)
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='kernels';")
-    has_kernels_table = cur.fetchone() is not None
+    indptr: np.ndarray
+    indices: np.ndarray
+    indegree: np.ndarray
 
-    nodes = []
 
-    if has_kernels_table:
-        # Modern schema: dispatch timing in 'kernels' table
-        cur.execute(
-            "SELECT id, kernel_id, queue_id, start, end, name FROM kernels ORDER BY start;"
-        )
+@dataclass
+class DispatchLevels:
+    """
+    A DispatchGraph's nodes in topological levels, for level-synchronous DP:
+    level k is order[bounds[k]:bounds[k + 1]], grouping nodes by longest hop
+    distance from a source, so all predecessors of a node are in earlier
+    levels. The node at position p of order has predecessors
+    pred_src[pred_ptr[p]:pred_ptr[p + 1]] and successors
+    succ_dst[succ_ptr[p]:succ_ptr[p + 1]]; each level's edges are therefore
+    contiguous. A node without predecessors (successors) has the virtual node
+    len(order) instead, so no segment is empty.
+    """
 
-        for did, kid, queue, start, end, name in cur.fetchall():
-            nodes.append(
-                {
-                    "id": did,
-                    "kernel_id": kid,
-                    "queue": queue,
-                    "start": start,
-                    "end": end,
-                    "duration": end - start,
-                    "name": name or "unknown",
-                }
-            )
-    else:
-        # Legacy schema
-        dispatch_table = _get_table(conn, "rocpd_kernel_dispatch_")
-        symbol_table = _get_table(conn, "rocpd_info_kernel_symbol_")
-
-        # Load kernel names
-        cur.execute(f"SELECT id, display_name, kernel_name FROM {symbol_table};")
-        name_map = {}
-        for kid, display, mangled in cur.fetchall():
-            name_map[kid] = display or mangled or "unknown"
-
-        # Load dispatches
-        cur.execute(
-            f"SELECT id, kernel_id, queue_id, start, end FROM {dispatch_table} ORDER BY start;"
-        )
+    order: np.ndarray
+    bounds: np.ndarray
+    pred_ptr: np.ndarray
+    pred_src: np.ndarray
+    succ_ptr: np.ndarray
+    succ_dst: np.ndarray
 
-        for did, kid, queue, start, end in cur.fetchall():
-            nodes.append(
-                {
-                    "id": did,
-                    "kernel_id": kid,
-                    "queue": queue,
-                    "start": start,
-                    "end": end,
-                    "duration": end - start,
-                    "name": name_map.get(kid, "unknown"),
-                }
-            )
-
-    # Handle trivial / empty cases
-    if not nodes:
-        conn.close()
-        return CriticalPathResult(
-            critical_path_ns=0,
-            critical_kernel_ids=[],
-            critical_kernel_names=[],
-            dominant_dispatch_id=None,
-            dominant_dispatch_duration_ns=0,
-            dominant_symbol_name=None,
-            dominant_symbol_fraction=0.0,
-            dispatch_contributions={},
-            symbol_contributions={},
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+_FETCH_CHUNK = 65536
+
+# Edges (or nodes) handled per vectorized step when laying out level CSRs
+# and recovering DP parents, bounding temporaries independently of N
+_EDGE_CHUNK = 1 << 16
+
+
+def _empty_result() -> CriticalPathResult:
+    return CriticalPathResult(
+        critical_path_ns=0,
+        critical_kernel_ids=[],
+        critical_kernel_names=[],
+        dominant_dispatch_id=None,
+        dominant_dispatch_duration_ns=0,
+        dominant_symbol_name=None,
+        dominant_symbol_fraction=0.0,
+        dispatch_contributions={},
+        symbol_contributions={},
+    )
+
+
+def _infer_cross_queue_edges(queues, starts, ends, threshold_ns: int):
+    """
+    For every dispatch b, find the dispatch a on a different queue whose end
+    is the latest one not after b's start (ties broken by lower index), and
+    keep a -> b if the gap is within threshold_ns.
+
+    Candidates are indexed once, sorted by (end asc, index desc), so the
+    nearest predecessor is a binary search away. When that predecessor sits
+    on b's own queue, the nearest other-queue candidate is the entry just
+    before its same-queue run. Total cost is O(N log N).
+
+    Returns (src, dst) index arrays, ordered by dst.
+    """
+    queues = np.asarray(queues)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    n = len(starts)
+
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    order = np.lexsort((-np.arange(n), ends))
+    sorted_ends = ends[order]
+    sorted_queues = queues[order]
+
+    # Position just before the run of equal-queue entries ending at i
+    run_change = np.ones(n, dtype=bool)
+    run_change[1:] = sorted_queues[1:] != sorted_queues[:-1]
+    run_start = np.maximum.accumulate(np.where(run_change, np.arange(n), 0))
+    prev_other_queue = run_start - 1
+
+    pos = np.searchsorted(sorted_ends, starts, side="right") - 1
+    safe_pos = np.maximum(pos, 0)
+    cand = np.where(
+        sorted_queues[safe_pos] != queues,
+        safe_pos,
+        prev_other_queue[safe_pos],
+    )
+    cand = np.where(pos >= 0, cand, -1)
+
+    valid = cand >= 0
+    gap = starts - sorted_ends[np.maximum(cand, 0)]
+    valid &= gap <= threshold_ns
+
+    dst = np.nonzero(valid)[0]
+    src = order[cand[dst]]
+    return src, dst
+
+
+def iter_dispatch_chunks(conn, after_id: Optional[int] = None, intern: Optional[Dict[str, int]] = None,
+                         chunk_size: int = _FETCH_CHUNK, kernel_symbols: Optional[Dict[int, int]] = None):
+    """
+    Stream the dispatch trace as DispatchTable chunks of up to chunk_size
+    rows, in (start, id) order. Symbol ids come from one shared intern map
+    (name -> symbol id), extended in place, so they agree across chunks.
+
+    kernel_symbols (kernel id -> symbol id) is extended in place too; names
+    are only queried for kernel ids it does not already hold.
+    """
+    query = DispatchQuery(conn)
+    if intern is None:
+        intern = {}
+    if kernel_symbols is None:
+        kernel_symbols = {}
+
+    cur = query.ordered_dispatches(after_id=after_id)
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+
+        columns = np.ascontiguousarray(np.array(rows, dtype=np.int64).T)
+        ids, kernel_ids, queues, starts, ends = columns
+
+        # Intern names per distinct kernel id, then map rows vectorized
+        unique_kids, inverse = np.unique(kernel_ids, return_inverse=True)
+        unique_kids = unique_kids.tolist()
+        missing = [kid for kid in unique_kids if kid not in kernel_symbols]
+        if missing:
+            names = query.kernel_names(missing)
+            for kid in missing:
+                kernel_symbols[kid] = intern.setdefault(names.get(kid, "unknown"), len(intern))
+        kid_symbol = np.array([kernel_symbols[kid] for kid in unique_kids], dtype=np.int32)
+
+        yield DispatchTable(
+            ids=ids,
+            kernel_ids=kernel_ids,
+            queues=queues,
+            starts=starts,
+            ends=ends,
+            symbols=kid_symbol[inverse.reshape(-1)],
+            symbol_names=list(intern),
         )
 
-    # Build adjacency and indegree
-    adj = {n["id"]: [] for n in nodes}
-    indegree = {n["id"]: 0 for n in nodes}
 
-    # Serial edges (same queue)
-    from collections import defaultdict
+def concat_dispatch_tables(tables: List[DispatchTable], symbol_names: List[str]) -> DispatchTable:
+    """Concatenate chunks that share one intern map."""
+    if not tables:
+        empty = np.empty(0, dtype=np.int64)
+        return DispatchTable(empty, empty, empty, empty, empty, np.empty(0, dtype=np.int32), symbol_names)
+
+    return DispatchTable(
+        ids=np.concatenate([t.ids for t in tables]),
+        kernel_ids=np.concatenate([t.kernel_ids for t in tables]),
+        queues=np.concatenate([t.queues for t in tables]),
+        starts=np.concatenate([t.starts for t in tables]),
+        ends=np.concatenate([t.ends for t in tables]),
+        symbols=np.concatenate([t.symbols for t in tables]),
+        symbol_names=symbol_names,
+    )
 
-    by_queue = defaultdict(list)
-    for n in nodes:
-        by_queue[n["queue"]].append(n)
 
-    for qnodes in by_queue.values():
-        qnodes.sort(key=lambda x: x["start"])
-        for i in range(len(qnodes) - 1):
-            u = qnodes[i]["id"]
-            v = qnodes[i + 1]["id"]
-            adj[u].append(v)
-            indegree[v] += 1
+def load_dispatch_table(conn, after_id: Optional[int] = None, intern: Optional[Dict[str, int]] = None,
+                        kernel_symbols: Optional[Dict[int, int]] = None) -> DispatchTable:
+    """
+    Load the dispatch trace through DispatchQuery. SQLite does the ordering;
+    Python only drains int columns chunk-wise into arrays.
+
+    after_id restricts the load to dispatches with a larger id. Passing an
+    existing intern map (name -> symbol id), and the kernel id -> symbol id
+    map built alongside it, keeps symbol ids stable across loads and skips
+    name lookups for known kernels; both are extended in place.
+    """
+    if intern is None:
+        intern = {}
+    chunks = list(iter_dispatch_chunks(conn, after_id=after_id, intern=intern, kernel_symbols=kernel_symbols))
+    return concat_dispatch_tables(chunks, list(intern))
+
+
+def read_dispatch_table(db_path: str) -> DispatchTable:
+    conn = connect_readonly(db_path)
+    try:
+        table = load_dispatch_table(conn)
+        table.trace_edges = load_trace_edges(conn, table)
+        return table
+    finally:
+        conn.close()
 
-    # Cross-queue inferred deps (scale-aware threshold)
-    if nodes:
-        global_start = min(n["start"] for n in nodes)
-        global_end = max(n["end"] for n in nodes)
-        total_runtime = global_end - global_start
-    else:
-        total_runtime = 0
 
+def _threshold_for_runtime(total_runtime: int) -> int:
     # Allow up to max(50us, 1% of total runtime) as dependency gap
-    threshold_ns = max(50_000, int(0.01 * total_runtime))
-
-    for b in nodes:
-        best = None
-        best_gap = None
-        for a in nodes:
-            if a["queue"] == b["queue"]:
-                continue
-            if a["end"] <= b["start"]:
-                gap = b["start"] - a["end"]
-                if best_gap is None or gap < best_gap:
-                    best_gap = gap
-                    best = a
-        if best is not None and best_gap is not None and best_gap <= threshold_ns:
-            adj[best["id"]].append(b["id"])
-            indegree[b["id"]] += 1
-
-    # Longest path DP using proper topological order (Kahn's algorithm)
-    from collections import deque
-
-    dp = {n["id"]: n["duration"] for n in nodes}
-    parent = {n["id"]: None for n in nodes}
-
-    # Build quick lookup for node durations
-    duration_map = {n["id"]: n["duration"] for n in nodes}
-
-    # Kahn topo sort
-    indegree_copy = indegree.copy()
-    queue = deque([nid for nid, deg in indegree_copy.items() if deg == 0])
-    topo_order = []
+    return max(50_000, int(0.01 * total_runtime))
 
-    while queue:
-        u = queue.popleft()
-        topo_order.append(u)
-        for v in adj[u]:
-            indegree_copy[v] -= 1
-            if indegree_copy[v] == 0:
-                queue.append(v)
 
-    # DP over topo order
-    for u in topo_order:
-        for v in adj[u]:
-            if dp[u] + duration_map[v] > dp[v]:
-                dp[v] = dp[u] + duration_map[v]
-                parent[v] = u
+def _cross_queue_threshold_ns(table: DispatchTable) -> int:
+    total_runtime = int(table.ends.max() - table.starts.min()) if len(table) else 0
+    return _threshold_for_runtime(total_runtime)
 
-    # Find max
-    if not dp:
-        conn.close()
-        return CriticalPathResult(
-            critical_path_ns=0,
-            critical_kernel_ids=[],
-            critical_kernel_names=[],
-            dominant_dispatch_id=None,
-            dominant_dispatch_duration_ns=0,
-            dominant_symbol_name=None,
-            dominant_symbol_fraction=0.0,
-            dispatch_contributions={},
-            symbol_contributions={},
-        )
 
-    end_node = max(dp, key=lambda k: dp[k])
-    critical_length = dp[end_node]
+def _serial_edges(queues, starts):
+    n = len(starts)
+    perm = np.lexsort((np.arange(n), starts, queues))
+    same_queue = queues[perm[1:]] == queues[perm[:-1]]
+    return perm[:-1][same_queue], perm[1:][same_queue]
 
-    # Backtrack
-    path_ids = []
-    cur_id = end_node
-    while cur_id is not None:
-        path_ids.append(cur_id)
-        cur_id = parent[cur_id]
-    path_ids.reverse()
 
-    path_nodes = [next(n for n in nodes if n["id"] == pid) for pid in path_ids]
-    path_names = [n["name"] for n in path_nodes]
+def _to_csr(src, dst, n: int) -> DispatchGraph:
+    # Stable sort keeps each node's successors in insertion order
+    order = np.argsort(src, kind="stable")
+    indices = dst[order].astype(np.int64)
+    counts = np.bincount(src, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indegree = np.bincount(dst, minlength=n)
+    return DispatchGraph(indptr=indptr, indices=indices, indegree=indegree)
+
+
+def build_dispatch_graph(table: DispatchTable, threshold_ns: Optional[int] = None) -> DispatchGraph:
+    """
+    Serial edges link consecutive dispatches on the same queue. Cross-queue
+    edges come from host waits in the HSA trace, and from the gap heuristic
+    in _infer_cross_queue_edges for every pair no traced wait orders (see
+    TraceEdges).
+
+    threshold_ns overrides the heuristic's gap threshold, which otherwise
+    scales with the table's own runtime.
+    """
+    serial_src, serial_dst = _serial_edges(table.queues, table.starts)
+
+    # Cross-queue inferred deps (scale-aware threshold)
+    cross_src, cross_dst = _infer_cross_queue_edges(
+        table.queues, table.starts, table.ends,
+        _cross_queue_threshold_ns(table) if threshold_ns is None else threshold_ns,
+    )
+
+    trace_src = trace_dst = np.empty(0, dtype=np.int64)
+    if table.trace_edges is not None:
+        unexplained = ~table.trace_edges.explains(cross_src, cross_dst, table.ends)
+        cross_src, cross_dst = cross_src[unexplained], cross_dst[unexplained]
+        trace_src, trace_dst = table.trace_edges.src, table.trace_edges.dst
+
+    src = np.concatenate([serial_src, cross_src, trace_src]).astype(np.int64)
+    dst = np.concatenate([serial_dst, cross_dst, trace_dst]).astype(np.int64)
+    return _to_csr(src, dst, len(table))
+
+
+def _hop_levels(graph: DispatchGraph) -> np.ndarray:
+    """
+    Longest hop distance of every node from a source: one linear pass in
+    topological order (Kahn's algorithm). The CSR arrays are read through
+    memoryviews and indegrees are small cached ints, so the pass allocates
+    no per-node Python objects beyond the queue.
+    """
+    n = len(graph.indptr) - 1
+    indptr = memoryview(graph.indptr)
+    indices = memoryview(graph.indices)
+    indegree = graph.indegree.tolist()
+    hops_array = np.zeros(n, dtype=np.int64)
+    hops = memoryview(hops_array)
+
+    queue = deque(i for i, deg in enumerate(indegree) if deg == 0)
+    while queue:
+        u = queue.popleft()
+        next_hop = hops[u] + 1
+        for v in indices[indptr[u]:indptr[u + 1]]:
+            if hops[v] < next_hop:
+                hops[v] = next_hop
+            indegree[v] -= 1
+            if indegree[v] == 0:
+                queue.append(v)
+
+    return hops_array
+
+
+def _positional_csr(n: int, n_edges: int, keys_of, values_of):
+    """
+    CSR over positions 0..n-1: row p holds the values of the edges whose key
+    is p, in edge order, and the virtual node n when there are none.
+    keys_of(lo, hi) and values_of(lo, hi) give keys and values of edges
+    lo..hi-1; edges are streamed in chunks, so no per-edge array other than
+    the result is allocated.
+    """
+    chunks = [(lo, min(n_edges, lo + _EDGE_CHUNK)) for lo in range(0, n_edges, _EDGE_CHUNK)]
+
+    counts = np.zeros(n, dtype=np.int64)
+    for lo, hi in chunks:
+        np.add.at(counts, keys_of(lo, hi), 1)
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.maximum(counts, 1), out=ptr[1:])
+    values = np.full(int(ptr[-1]), n, dtype=np.int64)
+
+    # Next free slot per row; a stable sort keeps each row in edge order
+    fill = ptr[:-1].copy()
+    for lo, hi in chunks:
+        keys = keys_of(lo, hi)
+        by_key = np.argsort(keys, kind="stable")
+        keys = keys[by_key]
+        run_start = np.ones(len(keys), dtype=bool)
+        run_start[1:] = keys[1:] != keys[:-1]
+        first = np.flatnonzero(run_start)
+        rank = np.arange(len(keys)) - np.repeat(first, np.diff(np.append(first, len(keys))))
+        values[fill[keys] + rank] = values_of(lo, hi)[by_key]
+        fill[keys[first]] += np.diff(np.append(first, len(keys)))
+    return ptr, values
+
+
+def graph_levels(graph: DispatchGraph) -> DispatchLevels:
+    """Topological levels of graph, with predecessor and successor lists laid out by level."""
+    n = len(graph.indptr) - 1
+    n_edges = len(graph.indices)
+    hops = _hop_levels(graph)
+    order = np.argsort(hops, kind="stable")
+    bounds = np.searchsorted(hops[order], np.arange(int(hops.max(initial=-1)) + 2))
+    del hops
+
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+
+    def sources(lo, hi):
+        return np.searchsorted(graph.indptr, np.arange(lo, hi), side="right") - 1
+
+    def targets(lo, hi):
+        return graph.indices[lo:hi]
+
+    pred_ptr, pred_src = _positional_csr(n, n_edges, lambda lo, hi: position[targets(lo, hi)], sources)
+    succ_ptr, succ_dst = _positional_csr(n, n_edges, lambda lo, hi: position[sources(lo, hi)], targets)
+    return DispatchLevels(order, bounds, pred_ptr, pred_src, succ_ptr, succ_dst)
+
+
+def build_dispatch_levels(table: DispatchTable, threshold_ns: Optional[int] = None) -> DispatchLevels:
+    """The dispatch DAG of table (see build_dispatch_graph) in topological levels."""
+    return graph_levels(build_dispatch_graph(table, threshold_ns))
+
+
+def _longest_path(levels: DispatchLevels, durations: np.ndarray, initial_dp=None,
+                  reverse: bool = False, parents: bool = True):
+    """
+    Longest path DP over levels, one vectorized step per level. dp[i] is the
+    longest path ending at i (with reverse, starting at i), including i's
+    own duration; initial_dp seeds it (defaults to the durations).
+    Returns (dp, parent) arrays, or (dp, None) without parents; parent is
+    -1 for path heads and otherwise the first neighbour in graph order that
+    attains dp, found in one pass over all edges once dp is final.
+    """
+    n = len(levels)
+    durations = np.asarray(durations, dtype=np.int64)
+    order = levels.order
+    ptr, neighbours = (levels.succ_ptr, levels.succ_dst) if reverse else (levels.pred_ptr, levels.pred_src)
+
+    # Slot n is the virtual neighbour of nodes without a real one
+    dp = np.zeros(n + 1, dtype=np.int64)
+    dp[:n] = durations if initial_dp is None else initial_dp
+
+    ordered_durations = durations[order]
+    bounds = levels.bounds.tolist()
+    edge_bounds = ptr[levels.bounds].tolist()
+    steps = range(len(bounds) - 1)
+    for k in reversed(steps) if reverse else steps:
+        lo, hi = bounds[k], bounds[k + 1]
+        e_lo, e_hi = edge_bounds[k], edge_bounds[k + 1]
+        best = np.maximum.reduceat(dp[neighbours[e_lo:e_hi]], ptr[lo:hi] - e_lo)
+        nodes = order[lo:hi]
+        dp[nodes] = np.maximum(dp[nodes], best + ordered_durations[lo:hi])
+
+    if not parents:
+        return dp[:n], None
+
+    # First neighbour u with dp[u] + duration == dp, for nodes the DP improved
+    initial = durations if initial_dp is None else np.asarray(initial_dp)
+    parent = np.empty(n, dtype=np.int64)
+    for lo in range(0, n, _EDGE_CHUNK):
+        hi = min(n, lo + _EDGE_CHUNK)
+        nodes = order[lo:hi]
+        e_lo, e_hi = ptr[lo], ptr[hi]
+        hit = dp[neighbours[e_lo:e_hi]] == np.repeat(dp[nodes] - durations[nodes], np.diff(ptr[lo:hi + 1]))
+        first = np.minimum.reduceat(np.where(hit, np.arange(e_lo, e_hi), e_hi - 1), ptr[lo:hi] - e_lo)
+        parent[nodes] = np.where(dp[nodes] > initial[nodes], neighbours[first], -1)
+    return dp[:n], parent
+
+
+def _result_from_path(table: DispatchTable, path_idx: np.ndarray, critical_length: int) -> CriticalPathResult:
+    durations = table.durations[path_idx]
+    path_ids = table.ids[path_idx].tolist()
+    path_symbols = table.symbols[path_idx].tolist()
+    path_names = [table.symbol_names[s] for s in path_symbols]
 
     # Per-dispatch contributions
     dispatch_contributions = {
-        n["id"]: n["duration"] / critical_length for n in path_nodes
+        did: dur / critical_length for did, dur in zip(path_ids, durations.tolist())
     }
 
-    # Aggregate by kernel symbol
+    # Aggregate by kernel symbol (first-seen order breaks ties)
     symbol_totals = {}
-    for n in path_nodes:
-        symbol_totals.setdefault(n["name"], 0)
-        symbol_totals[n["name"]] += n["duration"]
+    for name, dur in zip(path_names, durations.tolist()):
+        symbol_totals[name] = symbol_totals.get(name, 0) + dur
 
     symbol_contributions = {
         name: dur / critical_length for name, dur in symbol_totals.items()
     }
 
-    dominant_dispatch = max(path_nodes, key=lambda n: n["duration"])
+    dominant = int(np.argmax(durations))
     dominant_symbol_name = max(symbol_contributions, key=lambda k: symbol_contributions[k])
 
-    conn.close()
-
     return CriticalPathResult(
-        critical_path_ns=critical_length,
+        critical_path_ns=int(critical_length),
         critical_kernel_ids=path_ids,
         critical_kernel_names=path_names,
-        dominant_dispatch_id=dominant_dispatch["id"],
-        dominant_dispatch_duration_ns=dominant_dispatch["duration"],
+        dominant_dispatch_id=path_ids[dominant],
+        dominant_dispatch_duration_ns=int(durations[dominant]),
         dominant_symbol_name=dominant_symbol_name,
         dominant_symbol_fraction=symbol_contributions[dominant_symbol_name],
         dispatch_contributions=dispatch_contributions,
         symbol_contributions=symbol_contributions,
     )
+
+
+def critical_path_indices(table: DispatchTable, threshold_ns: Optional[int] = None,
+                          levels: Optional[DispatchLevels] = None):
+    """
+    Row indices of the critical path in `table`, and its length in ns.
+    levels, when given, is the table's prebuilt DAG (build_dispatch_levels).
+    """
+    if levels is None:
+        levels = build_dispatch_levels(table, threshold_ns)
+    dp, parent = _longest_path(levels, table.durations)
+
+    end_node = int(np.argmax(dp))
+    critical_length = int(dp[end_node])
+
+    # Backtrack
+    path = []
+    cur = end_node
+    while cur != -1:
+        path.append(cur)
+        cur = int(parent[cur])
+    path.reverse()
+
+    return np.asarray(path, dtype=np.int64), critical_length
+
+
+def critical_path_from_table(table: DispatchTable, levels: Optional[DispatchLevels] = None) -> CriticalPathResult:
+    if len(table) == 0:
+        return _empty_result()
+
+    path, critical_length = critical_path_indices(table, levels=levels)
+    return _result_from_path(table, path, critical_length)
+
+
+def analyze_critical_path(db_path: str, checkpoint_dir: Optional[str] = None) -> CriticalPathResult:
+    """
+    Compute the critical path of a rocpd results DB.
+
+    With checkpoint_dir, the analysis is incremental: the DP frontier is
+    persisted there and later calls only ingest dispatches appended since
+    (see IncrementalCriticalPath).
+    """
+    if checkpoint_dir is not None:
+        from rocm_perf_lab.analysis.critical_path_incremental import IncrementalCriticalPath
+
+        return IncrementalCriticalPath(db_path, checkpoint_dir).refresh()
+
+    return critical_path_from_table(read_dispatch_table(db_path))
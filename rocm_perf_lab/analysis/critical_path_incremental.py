@@ -0,0 +1,335 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    CriticalPathResult,
+    DispatchTable,
+    _empty_result,
+    _infer_cross_queue_edges,
+    _longest_path,
+    _result_from_path,
+    _threshold_for_runtime,
+    _to_csr,
+    critical_path_from_table,
+    graph_levels,
+    load_dispatch_table,
+)
+from rocm_perf_lab.analysis.hsa_dependencies import load_trace_edges
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery, connect_readonly
+
+
+# Bumped whenever state.json or nodes.bin change meaning; older checkpoints are rebuilt
+CHECKPOINT_VERSION = 2
+
+# One fixed-size record per ingested dispatch, appended to nodes.bin
+NODE_DTYPE = np.dtype(
+    [
+        ("id", "<i8"),
+        ("kernel_id", "<i8"),
+        ("queue", "<i8"),
+        ("start", "<i8"),
+        ("end", "<i8"),
+        ("symbol", "<i4"),
+        ("parent", "<i8"),
+        ("dp", "<i8"),
+    ]
+)
+
+
+class IncrementalCriticalPath:
+    """
+    Critical path over a rocpd DB that keeps growing.
+
+    The checkpoint directory holds:
+      - nodes.bin: append-only NODE_DTYPE records (dp value and DP parent of
+        every ingested dispatch), memory-mapped on load
+      - state.json: last ingested dispatch id, time bounds, interned symbols
+        and their kernel ids, per-symbol trace totals, the smallest
+        cross-queue gap rejected so far, the best path end, and the open window:
+        the last node on each queue plus every node that can still be the
+        cross-queue predecessor of a future dispatch (O(queues + overlap))
+
+    refresh() loads only dispatches with id beyond the checkpoint, links them
+    to the window, runs the DP over the new nodes and appends them, so its
+    cost is proportional to the new dispatches (plus the reported path).
+
+    Dispatches are assumed to be appended in start order. The cross-queue
+    gap threshold grows with runtime (1% past the 50us floor); when it grows
+    past a gap that was rejected earlier, that edge would now exist, so the
+    checkpoint is rebuilt from scratch. Otherwise the result matches a
+    from-scratch analysis exactly.
+
+    A DB with an HSA/HIP host trace is analyzed from scratch on every
+    refresh, without touching the checkpoint: its wait edges can reach back
+    to any earlier dispatch, not just the open window.
+    """
+
+    def __init__(self, db_path, checkpoint_dir):
+        self.db_path = str(db_path)
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def _nodes_path(self) -> Path:
+        return self.checkpoint_dir / "nodes.bin"
+
+    @property
+    def _state_path(self) -> Path:
+        return self.checkpoint_dir / "state.json"
+
+    def _reset(self):
+        self.state = {
+            "version": CHECKPOINT_VERSION,
+            "db_path": self.db_path,
+            "node_count": 0,
+            "last_id": None,
+            "global_start": None,
+            "max_start": None,
+            "max_end": None,
+            "symbols": [],
+            "kernel_symbols": {},
+            "symbol_totals": {},
+            "min_rejected_gap": None,
+            "best": -1,
+            "best_dp": 0,
+            "queue_last": {},
+            "window": [],
+        }
+        self._nodes_path.write_bytes(b"")
+        self.nodes = np.empty(0, dtype=NODE_DTYPE)
+
+    def _load(self):
+        if not self._state_path.exists():
+            self._reset()
+            return
+
+        self.state = json.loads(self._state_path.read_text())
+        if self.state.get("version") != CHECKPOINT_VERSION or self.state.get("db_path") != self.db_path:
+            self._reset()
+            return
+
+        count = self.state["node_count"]
+
+        # Drop records appended by a refresh that died before saving state
+        if self._nodes_path.stat().st_size > count * NODE_DTYPE.itemsize:
+            with open(self._nodes_path, "r+b") as f:
+                f.truncate(count * NODE_DTYPE.itemsize)
+
+        self.nodes = self._map_nodes(count)
+
+    def _map_nodes(self, count: int) -> np.ndarray:
+        if count == 0:
+            return np.empty(0, dtype=NODE_DTYPE)
+        return np.memmap(self._nodes_path, dtype=NODE_DTYPE, mode="r", shape=(count,))
+
+    def _save(self, new_nodes: np.ndarray):
+        with open(self._nodes_path, "ab") as f:
+            new_nodes.tofile(f)
+
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state))
+        os.replace(tmp, self._state_path)
+
+        self.nodes = self._map_nodes(self.state["node_count"])
+
+    def refresh(self) -> CriticalPathResult:
+        # The profiler may still be writing, so no immutable=1 here
+        conn = connect_readonly(self.db_path, immutable=False)
+        try:
+            if DispatchQuery(conn).has_host_trace():
+                table = load_dispatch_table(conn)
+                table.trace_edges = load_trace_edges(conn, table)
+                return critical_path_from_table(table)
+
+            batch = self._load_batch(conn)
+            if len(batch) and self._threshold_drifted(batch):
+                self._reset()
+                batch = self._load_batch(conn)
+        finally:
+            conn.close()
+
+        if len(batch):
+            self._ingest(batch)
+
+        return self.result()
+
+    def _load_batch(self, conn) -> DispatchTable:
+        state = self.state
+        intern: Dict[str, int] = {name: i for i, name in enumerate(state["symbols"])}
+        kernel_symbols = {int(kid): sym for kid, sym in state["kernel_symbols"].items()}
+
+        batch = load_dispatch_table(conn, after_id=state["last_id"], intern=intern, kernel_symbols=kernel_symbols)
+        state["kernel_symbols"] = {str(kid): sym for kid, sym in kernel_symbols.items()}
+        return batch
+
+    def _runtime_threshold(self, batch: DispatchTable) -> int:
+        state = self.state
+        start = int(batch.starts.min())
+        end = int(batch.ends.max())
+        if state["global_start"] is not None:
+            start = min(start, state["global_start"])
+            end = max(end, state["max_end"])
+        return _threshold_for_runtime(end - start)
+
+    def _threshold_drifted(self, batch: DispatchTable) -> bool:
+        """True when the grown threshold admits a cross-queue edge rejected earlier."""
+        rejected = self.state["min_rejected_gap"]
+        return rejected is not None and self._runtime_threshold(batch) >= rejected
+
+    def _ingest(self, batch: DispatchTable):
+        state = self.state
+        base = state["node_count"]
+
+        threshold_ns = self._runtime_threshold(batch)
+        batch_start = int(batch.starts.min())
+        batch_end = int(batch.ends.max())
+        if state["global_start"] is None:
+            state["global_start"], state["max_end"] = batch_start, batch_end
+            state["max_start"] = batch_start
+        state["global_start"] = min(state["global_start"], batch_start)
+        state["max_end"] = max(state["max_end"], batch_end)
+
+        # Context: the open window from earlier refreshes, DP values fixed
+        window = np.asarray(state["window"], dtype=np.int64)
+        ctx = self.nodes[window] if len(window) else np.empty(0, dtype=NODE_DTYPE)
+        m = len(ctx)
+        k = len(batch)
+
+        queues = np.concatenate([ctx["queue"], batch.queues])
+        starts = np.concatenate([ctx["start"], batch.starts])
+        ends = np.concatenate([ctx["end"], batch.ends])
+        durations = ends - starts
+
+        # Serial edges: chain new dispatches per queue, first one hangs off
+        # the queue's last checkpointed dispatch
+        perm = np.lexsort((np.arange(k), batch.starts, batch.queues))
+        same_queue = batch.queues[perm[1:]] == batch.queues[perm[:-1]]
+        serial_src = [m + perm[:-1][same_queue]]
+        serial_dst = [m + perm[1:][same_queue]]
+
+        local_of_global = {g: i for i, g in enumerate(window.tolist())}
+        first_on_queue = perm[np.concatenate([[True], ~same_queue])]
+        for j in first_on_queue.tolist():
+            last = state["queue_last"].get(str(int(batch.queues[j])))
+            if last is not None and last in local_of_global:
+                serial_src.append(np.array([local_of_global[last]]))
+                serial_dst.append(np.array([m + j]))
+
+        # Cross-queue edges into new dispatches only. Candidates are picked
+        # independently of the threshold, so take them all and remember the
+        # smallest gap that did not make it
+        cross_src, cross_dst = _infer_cross_queue_edges(queues, starts, ends, np.iinfo(np.int64).max)
+        gaps = starts[cross_dst] - ends[cross_src]
+        keep = (cross_dst >= m) & (gaps <= threshold_ns)
+        rejected = gaps[(cross_dst >= m) & (gaps > threshold_ns)]
+        if len(rejected):
+            smallest = int(rejected.min())
+            if state["min_rejected_gap"] is None or smallest < state["min_rejected_gap"]:
+                state["min_rejected_gap"] = smallest
+
+        src = np.concatenate(serial_src + [cross_src[keep]]).astype(np.int64)
+        dst = np.concatenate(serial_dst + [cross_dst[keep]]).astype(np.int64)
+        levels = graph_levels(_to_csr(src, dst, m + k))
+
+        initial_dp = np.concatenate([ctx["dp"], durations[m:]])
+        dp, parent = _longest_path(levels, durations, initial_dp=initial_dp)
+
+        # Map local DP parents back to global node indices
+        local_to_global = np.concatenate([window, base + np.arange(k, dtype=np.int64)])
+        parent_local = parent[m:]
+        parent_global = np.where(parent_local >= 0, local_to_global[np.maximum(parent_local, 0)], -1)
+
+        new_nodes = np.empty(k, dtype=NODE_DTYPE)
+        new_nodes["id"] = batch.ids
+        new_nodes["kernel_id"] = batch.kernel_ids
+        new_nodes["queue"] = batch.queues
+        new_nodes["start"] = batch.starts
+        new_nodes["end"] = batch.ends
+        new_nodes["symbol"] = batch.symbols
+        new_nodes["parent"] = parent_global
+        new_nodes["dp"] = dp[m:]
+
+        best_new = int(np.argmax(new_nodes["dp"]))
+        if state["best"] < 0 or new_nodes["dp"][best_new] > state["best_dp"]:
+            state["best"] = base + best_new
+            state["best_dp"] = int(new_nodes["dp"][best_new])
+
+        totals = state["symbol_totals"]
+        n_symbols = len(batch.symbol_names)
+        counts = np.bincount(batch.symbols, minlength=n_symbols)
+        sums = np.bincount(batch.symbols, weights=batch.durations, minlength=n_symbols)
+        for sym in np.nonzero(counts)[0].tolist():
+            name = batch.symbol_names[sym]
+            count, total = totals.get(name, (0, 0))
+            totals[name] = (count + int(counts[sym]), total + int(sums[sym]))
+
+        queue_last = state["queue_last"]
+        last_on_queue = perm[np.concatenate([~same_queue, [True]])]
+        for j in last_on_queue.tolist():
+            queue_last[str(int(batch.queues[j]))] = base + j
+
+        state["max_start"] = max(state["max_start"], int(batch.starts.max()))
+        state["window"] = self._next_window(local_to_global, queues, ends, queue_last)
+
+        state["last_id"] = int(batch.ids.max())
+        state["symbols"] = batch.symbol_names
+        state["node_count"] = base + k
+
+        self._save(new_nodes)
+
+    def _next_window(self, local_to_global, queues, ends, queue_last) -> list:
+        """
+        Future dispatches start at or after max_start, so the only possible
+        cross-queue predecessors are dispatches still running at max_start and,
+        per queue, the latest-ending dispatch that finished before it.
+        """
+        max_start = self.state["max_start"]
+        running = ends > max_start
+
+        closed = np.nonzero(~running)[0]
+        keep = np.nonzero(running)[0]
+        if len(closed):
+            unique_queues, inverse = np.unique(queues[closed], return_inverse=True)
+            latest_end = np.full(len(unique_queues), np.iinfo(np.int64).min)
+            np.maximum.at(latest_end, inverse, ends[closed])
+            keep = np.concatenate([keep, closed[ends[closed] == latest_end[inverse]]])
+
+        return sorted(set(local_to_global[keep].tolist()) | set(queue_last.values()))
+
+    @property
+    def symbol_totals(self) -> Dict[str, tuple]:
+        """Per-symbol (dispatch count, total duration ns) over everything ingested."""
+        return {name: tuple(v) for name, v in self.state["symbol_totals"].items()}
+
+    def result(self) -> CriticalPathResult:
+        if self.state["best"] < 0:
+            return _empty_result()
+
+        nodes = self.nodes
+
+        # Backtrack through the persisted parent chain
+        parents = nodes["parent"]
+        path = []
+        cur = self.state["best"]
+        while cur != -1:
+            path.append(cur)
+            cur = int(parents[cur])
+        path.reverse()
+
+        path_idx = np.asarray(path, dtype=np.int64)
+        path_nodes = nodes[path_idx]
+        table = DispatchTable(
+            ids=path_nodes["id"],
+            kernel_ids=path_nodes["kernel_id"],
+            queues=path_nodes["queue"],
+            starts=path_nodes["start"],
+            ends=path_nodes["end"],
+            symbols=path_nodes["symbol"],
+            symbol_names=self.state["symbols"],
+        )
+        return _result_from_path(table, np.arange(len(path_idx)), self.state["best_dp"])
@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery
+
+
+# Host calls that block until device work (kernels, copies) has completed
+WAIT_CALLS = (
+    "hipDeviceSynchronize",
+    "hipStreamSynchronize",
+    "hipEventSynchronize",
+    "hipMemcpy",
+    "hipMemcpy2D",
+    "hipMemcpyDtoH",
+    "hipMemcpyHtoD",
+    "hipMemcpyDtoD",
+    "hsa_memory_copy",
+)
+WAIT_PREFIXES = ("hsa_signal_wait", "hsa_amd_signal_wait")
+
+
+# waited_until of a dispatch submitted after no traced wait
+NO_WAIT = np.iinfo(np.int64).min
+
+
+@dataclass
+class TraceEdges:
+    """
+    Cross-queue dependency edges recovered from the HSA/HIP API trace, as
+    index arrays into a DispatchTable. waited_until holds, per dispatch, when
+    the last blocking call on its submitting thread returned (NO_WAIT if
+    none is traced): a gap-heuristic edge from a dispatch that ended by then
+    is already implied by the wait edges and is dropped; others are kept,
+    since device-side dependencies (stream waits, barrier packets) leave no
+    host wait behind.
+    """
+
+    src: np.ndarray
+    dst: np.ndarray
+    waited_until: np.ndarray
+
+    def explains(self, src: np.ndarray, dst: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Which of the edges src -> dst a traced wait already orders."""
+        return ends[src] <= self.waited_until[dst]
+
+
+def _wait_edges(queues, starts, ends, tids, submits, wait_tids, wait_ends):
+    """
+    A dispatch submitted by thread T after a blocking call on T returned
+    depends on the work that call observed: per queue, the last dispatch
+    that completed before the call returned.
+
+    Only the first dispatch per queue after each wait gets the edges; later
+    ones inherit the dependency through the serial edge on their queue.
+
+    Returns (src, dst, waited_until), see TraceEdges.
+    """
+    n = len(starts)
+    empty = np.empty(0, dtype=np.int64)
+    waited_until = np.full(n, NO_WAIT, dtype=np.int64)
+    if n == 0 or len(wait_ends) == 0:
+        return empty, empty, waited_until
+
+    # Most recent wait on the submitting thread, for every submitted dispatch
+    dispatch_wait = np.full(n, -1, dtype=np.int64)
+    for tid in np.unique(wait_tids).tolist():
+        lo, hi = np.searchsorted(wait_tids, [tid, tid + 1])
+        on_thread = np.nonzero((tids == tid) & (submits >= 0))[0]
+        pos = np.searchsorted(wait_ends[lo:hi], submits[on_thread], side="right") - 1
+        dispatch_wait[on_thread] = np.where(pos >= 0, lo + pos, -1)
+
+    waited = np.nonzero(dispatch_wait >= 0)[0]
+    if len(waited) == 0:
+        return empty, empty, waited_until
+    waited_until[waited] = wait_ends[dispatch_wait[waited]]
+
+    # First submission per (wait, queue)
+    order = np.lexsort((submits[waited], queues[waited], dispatch_wait[waited]))
+    waited = waited[order]
+    first = np.ones(len(waited), dtype=bool)
+    first[1:] = (dispatch_wait[waited][1:] != dispatch_wait[waited][:-1]) | (
+        queues[waited][1:] != queues[waited][:-1]
+    )
+    dst = waited[first]
+    observed_at = wait_ends[dispatch_wait[dst]]
+
+    src_parts, dst_parts = [], []
+    queue_order = np.lexsort((ends, queues))
+    unique_queues, queue_lo = np.unique(queues[queue_order], return_index=True)
+    queue_hi = np.append(queue_lo[1:], n)
+
+    for q, lo, hi in zip(unique_queues.tolist(), queue_lo.tolist(), queue_hi.tolist()):
+        on_queue = queue_order[lo:hi]
+        pos = np.searchsorted(ends[on_queue], observed_at, side="right") - 1
+        keep = (pos >= 0) & (queues[dst] != q)
+        src_parts.append(on_queue[pos[keep]])
+        dst_parts.append(dst[keep])
+
+    src = np.concatenate(src_parts)
+    dst = np.concatenate(dst_parts)
+
+    # Never let an edge point backwards in time (clock skew between the
+    # host API timestamps and device timestamps)
+    forward = ends[src] <= starts[dst]
+    return src[forward].astype(np.int64), dst[forward].astype(np.int64), waited_until
+
+
+def load_host_waits(conn, query: Optional[DispatchQuery] = None) -> np.ndarray:
+    """(tid, start, end) rows of blocking API calls, ordered by (tid, end)."""
+    query = query or DispatchQuery(conn)
+    waits = query.host_waits(WAIT_CALLS, WAIT_PREFIXES).fetchall()
+    return np.array(waits, dtype=np.int64).reshape(-1, 3)
+
+
+def load_trace_edges(conn, table, waits: Optional[np.ndarray] = None,
+                     query: Optional[DispatchQuery] = None) -> Optional[TraceEdges]:
+    """
+    Exact cross-queue edges for `table` from the HSA/HIP API trace in conn,
+    or None when the DB carries no host trace (kernel-trace-only runs).
+
+    table may be any slice of the trace; only submissions in its id range
+    are read. When slicing, pass the waits (see load_host_waits) and a
+    DispatchQuery on conn loaded once for all slices: the query's host
+    region index is built on first use and reused.
+    """
+    query = query or DispatchQuery(conn)
+    if not query.has_host_trace():
+        return None
+
+    n = len(table)
+    if n == 0:
+        return None
+    id_range = (int(table.ids.min()), int(table.ids.max()))
+    submissions = np.array(query.dispatch_submissions(id_range).fetchall(), dtype=np.int64).reshape(-1, 3)
+    if len(submissions) == 0:
+        return None
+
+    # Dispatch ids are unique per DB; table order is by start
+    by_id = np.argsort(table.ids, kind="stable")
+    pos = np.searchsorted(table.ids[by_id], submissions[:, 0])
+    pos = np.minimum(pos, max(n - 1, 0))
+    found = table.ids[by_id][pos] == submissions[:, 0]
+    rows = by_id[pos[found]]
+
+    tids = np.full(n, -1, dtype=np.int64)
+    submits = np.full(n, -1, dtype=np.int64)
+    tids[rows] = submissions[found, 1]
+    submits[rows] = submissions[found, 2]
+
+    if waits is None:
+        waits = load_host_waits(conn, query)
+
+    src, dst, waited_until = _wait_edges(
+        table.queues, table.starts, table.ends, tids, submits, waits[:, 0], waits[:, 2]
+    )
+    return TraceEdges(src=src, dst=dst, waited_until=waited_until)
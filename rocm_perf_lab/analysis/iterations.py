@@ -0,0 +1,278 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    DispatchTable,
+    _threshold_for_runtime,
+    concat_dispatch_tables,
+    critical_path_indices,
+    iter_dispatch_chunks,
+)
+from rocm_perf_lab.analysis.hsa_dependencies import load_host_waits, load_trace_edges
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery, connect_readonly
+
+
+# Dispatches inspected to pick a periodic anchor symbol
+_DETECT_WINDOW = 65536
+
+# Dispatches handed to a worker per task
+_TASK_DISPATCHES = 65536
+
+
+@dataclass
+class IterationCriticalPaths:
+    """
+    Per-step critical paths of a periodic workload. Step i spans from the
+    i-th anchor dispatch up to (not including) the next one; dispatches
+    before the first anchor are warmup and are not reported.
+    """
+
+    anchor_symbol: str
+    step_start_ns: np.ndarray
+    makespan_ns: np.ndarray
+    critical_path_ns: np.ndarray
+    dominant_symbols: np.ndarray
+    symbol_names: List[str]
+    warmup_dispatches: int
+    p50_makespan_ns: float
+    p99_makespan_ns: float
+    slow_step_threshold_ns: float
+    slow_step_symbols: Dict[str, float]
+
+    @property
+    def iterations(self) -> int:
+        return len(self.makespan_ns)
+
+
+def detect_anchor_symbol(symbols: np.ndarray, min_iterations: int = 3, max_cv: float = 0.1) -> Optional[int]:
+    """
+    Symbol that marks step boundaries in a periodic symbol sequence.
+
+    A symbol launched once per step recurs at a near-constant index distance.
+    Among symbols whose occurrence gaps have a coefficient of variation below
+    max_cv, pick the least frequent one (the longest period), so a kernel
+    repeated per layer does not split a step into layers.
+    """
+    symbols = np.asarray(symbols)
+    best = None
+
+    for sym in np.unique(symbols).tolist():
+        positions = np.nonzero(symbols == sym)[0]
+        if len(positions) < min_iterations:
+            continue
+
+        gaps = np.diff(positions)
+        mean = gaps.mean()
+        if mean <= 1 or gaps.std() / mean > max_cv:
+            continue
+
+        key = (len(positions), positions[0])
+        if best is None or key < best[0]:
+            best = (key, sym)
+
+    return None if best is None else best[1]
+
+
+def _marker_symbols(symbol_names: List[str], pattern) -> set:
+    return {i for i, name in enumerate(symbol_names) if pattern.search(name)}
+
+
+def _step_summary(table: DispatchTable, threshold_ns: int):
+    """(start, makespan, critical path ns, dominant symbol id) of one step."""
+    path, critical_length = critical_path_indices(table, threshold_ns)
+
+    per_symbol = np.bincount(table.symbols[path], weights=table.durations[path])
+    return (
+        int(table.starts.min()),
+        int(table.ends.max() - table.starts.min()),
+        int(critical_length),
+        int(np.argmax(per_symbol)),
+    )
+
+
+def _summarize_steps(steps: List[DispatchTable], threshold_ns: int):
+    return [_step_summary(step, threshold_ns) for step in steps]
+
+
+def _segment_steps(chunks: Iterator[DispatchTable], is_anchor):
+    """
+    Split a stream of dispatch chunks into steps at anchor dispatches.
+    Yields the warmup dispatch count once, then one DispatchTable per step.
+    Only the step under construction is held in memory.
+    """
+    pending: List[DispatchTable] = []
+    started = False
+    warmup = 0
+
+    for chunk in chunks:
+        anchors = np.nonzero(is_anchor(chunk))[0].tolist()
+        cut = 0
+
+        for a in anchors:
+            if not started:
+                warmup += a
+                started = True
+                yield warmup
+            else:
+                if a > cut:
+                    pending.append(_slice(chunk, cut, a))
+                if pending:
+                    yield concat_dispatch_tables(pending, chunk.symbol_names)
+                    pending = []
+            cut = a
+
+        if not started:
+            warmup += len(chunk)
+        elif cut < len(chunk):
+            pending.append(_slice(chunk, cut, len(chunk)))
+
+    if not started:
+        yield warmup
+    elif pending:
+        yield concat_dispatch_tables(pending, pending[-1].symbol_names)
+
+
+def _slice(table: DispatchTable, lo: int, hi: int) -> DispatchTable:
+    return DispatchTable(
+        ids=table.ids[lo:hi],
+        kernel_ids=table.kernel_ids[lo:hi],
+        queues=table.queues[lo:hi],
+        starts=table.starts[lo:hi],
+        ends=table.ends[lo:hi],
+        symbols=table.symbols[lo:hi],
+        symbol_names=table.symbol_names,
+    )
+
+
+def _batched(steps, limit: int):
+    batch, size = [], 0
+    for step in steps:
+        batch.append(step)
+        size += len(step)
+        if size >= limit:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def analyze_iteration_critical_paths(
+    db_path: str,
+    marker: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    slow_quantile: float = 0.9,
+) -> IterationCriticalPaths:
+    """
+    Segment a rocpd trace into repeated steps and compute each step's
+    critical path.
+
+    Step boundaries are dispatches whose kernel name matches the marker
+    regex, or, without a marker, the anchor symbol detected from the first
+    dispatches (detect_anchor_symbol). The trace is streamed chunk-wise and
+    steps are solved in a process pool with a bounded number of tasks in
+    flight, so memory stays proportional to a few steps.
+
+    Each step's DAG is built as in a whole-trace analysis: the cross-queue
+    gap threshold comes from the whole trace's runtime, and HSA trace edges
+    between dispatches of the same step are used where the DB has them.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        query = DispatchQuery(conn)
+        first_start, last_end = query.time_bounds()
+        threshold_ns = _threshold_for_runtime((last_end or 0) - (first_start or 0))
+        waits = load_host_waits(conn, query) if query.has_host_trace() else None
+
+        intern: Dict[str, int] = {}
+        chunks = iter_dispatch_chunks(conn, intern=intern)
+
+        # Keep the detection window and replay it ahead of the rest
+        head: List[DispatchTable] = []
+        seen = 0
+        for chunk in chunks:
+            head.append(chunk)
+            seen += len(chunk)
+            if seen >= _DETECT_WINDOW:
+                break
+
+        if marker is not None:
+            pattern = re.compile(marker)
+            anchor_name = marker
+
+            def is_anchor(chunk):
+                anchors = _marker_symbols(chunk.symbol_names, pattern)
+                return np.isin(chunk.symbols, list(anchors))
+        else:
+            window = concat_dispatch_tables(head, list(intern))
+            anchor = detect_anchor_symbol(window.symbols)
+            if anchor is None:
+                raise RuntimeError("No periodic step boundary found; pass a marker kernel regex")
+            anchor_name = window.symbol_names[anchor]
+
+            def is_anchor(chunk):
+                return chunk.symbols == anchor
+
+        def replay():
+            yield from head
+            yield from chunks
+
+        segments = _segment_steps(replay(), is_anchor)
+        warmup = next(segments)
+
+        def traced(steps):
+            for step in steps:
+                if waits is not None:
+                    step.trace_edges = load_trace_edges(conn, step, waits, query)
+                yield step
+
+        summaries = []
+        batches = _batched(traced(segments), _TASK_DISPATCHES)
+
+        if max_workers == 1:
+            for batch in batches:
+                summaries.extend(_summarize_steps(batch, threshold_ns))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                in_flight = deque()
+                limit = 2 * (max_workers or os.cpu_count() or 1)
+                for batch in batches:
+                    in_flight.append(pool.submit(_summarize_steps, batch, threshold_ns))
+                    if len(in_flight) >= limit:
+                        summaries.extend(in_flight.popleft().result())
+                while in_flight:
+                    summaries.extend(in_flight.popleft().result())
+
+        symbol_names = list(intern)
+    finally:
+        conn.close()
+
+    if not summaries:
+        raise RuntimeError(f"No steps found for step boundary '{anchor_name}'")
+
+    starts, makespans, critical, dominant = (np.array(col, dtype=np.int64) for col in zip(*summaries))
+
+    p50, p99, slow_threshold = np.percentile(makespans, [50, 99, 100 * slow_quantile]).tolist()
+    slow_dominant = dominant[makespans >= slow_threshold]
+    counts = np.bincount(slow_dominant, minlength=len(symbol_names))
+
+    return IterationCriticalPaths(
+        anchor_symbol=anchor_name,
+        step_start_ns=starts,
+        makespan_ns=makespans,
+        critical_path_ns=critical,
+        dominant_symbols=dominant,
+        symbol_names=symbol_names,
+        warmup_dispatches=warmup,
+        p50_makespan_ns=p50,
+        p99_makespan_ns=p99,
+        slow_step_threshold_ns=slow_threshold,
+        slow_step_symbols={
+            symbol_names[s]: float(counts[s] / len(slow_dominant)) for s in np.nonzero(counts)[0].tolist()
+        },
+    )
@@ -0,0 +1,252 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    CriticalPathResult,
+    DispatchTable,
+    _empty_result,
+    _result_from_path,
+    critical_path_indices,
+    load_dispatch_table,
+)
+from rocm_perf_lab.analysis.hsa_dependencies import NO_WAIT, TraceEdges, load_trace_edges
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery, connect_readonly, find_table, table_columns
+
+
+ALIGN_MODES = ("auto", "shared", "first-dispatch")
+
+
+@dataclass
+class ProcessTrace:
+    db_path: str
+    host: str
+    table: DispatchTable
+    queue_agents: Dict[int, int]
+
+
+@dataclass
+class MergedTrace:
+    table: DispatchTable
+    processes: np.ndarray
+    db_paths: List[str]
+    clock_offsets_ns: List[int]
+    queue_labels: List[tuple]
+    id_offsets: List[int]
+
+    def local_ids(self, positions) -> np.ndarray:
+        """Per-process dispatch ids (as stored in each DB) of merged table rows."""
+        offsets = np.asarray(self.id_offsets, dtype=np.int64)
+        return self.table.ids[positions] - offsets[self.processes[positions]]
+
+
+@dataclass
+class MultiProcessCriticalPathResult:
+    critical_path: CriticalPathResult
+    critical_processes: List[int]
+    critical_local_ids: List[int]
+    db_paths: List[str]
+    clock_offsets_ns: List[int]
+    process_contributions: Dict[str, float]
+
+
+def _host_of(conn, db_path: str) -> str:
+    node_table = find_table(conn, "rocpd_info_node")
+    if node_table and "hostname" in table_columns(conn, node_table):
+        row = conn.execute(f"SELECT hostname FROM {node_table} LIMIT 1;").fetchone()
+        if row and row[0]:
+            return row[0]
+
+    # rocprofv3 lays results out as <output_dir>/<hostname>/<pid>_results.db
+    return Path(db_path).parent.name
+
+
+def load_process_trace(db_path: str) -> ProcessTrace:
+    conn = connect_readonly(db_path)
+    try:
+        table = load_dispatch_table(conn)
+        table.trace_edges = load_trace_edges(conn, table)
+        return ProcessTrace(
+            db_path=str(db_path),
+            host=_host_of(conn, str(db_path)),
+            table=table,
+            queue_agents=DispatchQuery(conn).queue_agents(),
+        )
+    finally:
+        conn.close()
+
+
+def clock_offsets(traces: List[ProcessTrace], align: str = "auto") -> List[int]:
+    """
+    Per-process offsets (ns) that map each trace onto a common clock.
+
+    shared:         all processes already share one clock (single node)
+    first-dispatch: each process's first dispatch is moved to t=0
+    auto:           processes on the same host keep their shared clock;
+                    hosts are aligned on their earliest dispatch
+    """
+    if align not in ALIGN_MODES:
+        raise ValueError(f"Unknown clock alignment '{align}'; expected one of {ALIGN_MODES}")
+
+    firsts = [int(t.table.starts.min()) if len(t.table) else 0 for t in traces]
+
+    if align == "shared":
+        return [0] * len(traces)
+
+    if align == "first-dispatch":
+        return [-first for first in firsts]
+
+    host_first: Dict[str, int] = {}
+    for trace, first in zip(traces, firsts):
+        if len(trace.table):
+            host_first[trace.host] = min(host_first.get(trace.host, first), first)
+
+    if len(host_first) <= 1:
+        return [0] * len(traces)
+
+    return [-host_first.get(trace.host, 0) for trace in traces]
+
+
+def merge_process_traces(
+    db_paths: List[str],
+    align: str = "auto",
+    max_workers: Optional[int] = None,
+) -> MergedTrace:
+    """
+    Load per-process results DBs in parallel and merge them into one dispatch
+    table on a common clock, with queues qualified by (process, agent, queue).
+
+    Every process numbers its dispatches from 1, so merged ids are shifted
+    by a per-process offset (the previous processes' largest id + 1) to stay
+    unique; MergedTrace.local_ids maps them back.
+    """
+    db_paths = [str(p) for p in db_paths]
+
+    if len(db_paths) == 1 or max_workers == 1:
+        traces = [load_process_trace(p) for p in db_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            traces = list(pool.map(load_process_trace, db_paths))
+
+    offsets = clock_offsets(traces, align)
+
+    intern: Dict[str, int] = {}
+    columns = {name: [] for name in ("ids", "kernel_ids", "queue_keys", "starts", "ends", "symbols", "processes")}
+    edge_src, edge_dst, waited_until = [], [], []
+    id_offsets = []
+    base = 0
+    next_id = 0
+
+    for p, (trace, offset) in enumerate(zip(traces, offsets)):
+        table = trace.table
+        n = len(table)
+
+        local_to_global = np.array(
+            [intern.setdefault(name, len(intern)) for name in table.symbol_names],
+            dtype=np.int32,
+        )
+
+        unique_queues, inverse = np.unique(table.queues, return_inverse=True)
+        agents = np.array([trace.queue_agents.get(q, -1) for q in unique_queues.tolist()], dtype=np.int64)
+
+        id_offsets.append(next_id)
+        columns["ids"].append(table.ids + next_id)
+        if n:
+            next_id += int(table.ids.max()) + 1
+        columns["kernel_ids"].append(table.kernel_ids)
+        columns["queue_keys"].append(
+            np.stack([np.full(n, p, dtype=np.int64), agents[inverse.reshape(-1)], table.queues], axis=1)
+        )
+        columns["starts"].append(table.starts + offset)
+        columns["ends"].append(table.ends + offset)
+        columns["symbols"].append(local_to_global[table.symbols] if n else np.empty(0, dtype=np.int32))
+        columns["processes"].append(np.full(n, p, dtype=np.int32))
+
+        # Trace edges stay within a process; processes without an HSA trace
+        # fall back to the gap heuristic for all their dispatches
+        if table.trace_edges is not None:
+            edge_src.append(base + table.trace_edges.src)
+            edge_dst.append(base + table.trace_edges.dst)
+            until = table.trace_edges.waited_until
+            waited_until.append(np.where(until == NO_WAIT, NO_WAIT, until + offset))
+        else:
+            waited_until.append(np.full(n, NO_WAIT, dtype=np.int64))
+        base += n
+
+    merged = {name: np.concatenate(parts) for name, parts in columns.items()}
+
+    queue_labels, qualified = np.unique(merged["queue_keys"].reshape(-1, 3), axis=0, return_inverse=True)
+
+    order = np.lexsort((merged["ids"], merged["processes"], merged["starts"]))
+
+    trace_edges = None
+    if edge_src:
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        trace_edges = TraceEdges(
+            src=position[np.concatenate(edge_src)],
+            dst=position[np.concatenate(edge_dst)],
+            waited_until=np.concatenate(waited_until)[order],
+        )
+
+    table = DispatchTable(
+        ids=merged["ids"][order],
+        kernel_ids=merged["kernel_ids"][order],
+        queues=qualified.reshape(-1)[order].astype(np.int64),
+        starts=merged["starts"][order],
+        ends=merged["ends"][order],
+        symbols=merged["symbols"][order],
+        symbol_names=list(intern),
+        trace_edges=trace_edges,
+    )
+
+    return MergedTrace(
+        table=table,
+        processes=merged["processes"][order],
+        db_paths=db_paths,
+        clock_offsets_ns=offsets,
+        queue_labels=[tuple(int(v) for v in row) for row in queue_labels],
+        id_offsets=id_offsets,
+    )
+
+
+def analyze_multi_process_critical_path(
+    db_paths: List[str],
+    align: str = "auto",
+    max_workers: Optional[int] = None,
+) -> MultiProcessCriticalPathResult:
+    """Cross-rank critical path over one results DB per process."""
+    merged = merge_process_traces(db_paths, align=align, max_workers=max_workers)
+    table = merged.table
+
+    if len(table) == 0:
+        return MultiProcessCriticalPathResult(
+            critical_path=_empty_result(),
+            critical_processes=[],
+            critical_local_ids=[],
+            db_paths=merged.db_paths,
+            clock_offsets_ns=merged.clock_offsets_ns,
+            process_contributions={},
+        )
+
+    path, critical_length = critical_path_indices(table)
+    result = _result_from_path(table, path, critical_length)
+
+    path_processes = merged.processes[path]
+    per_process = np.bincount(
+        path_processes, weights=table.durations[path], minlength=len(merged.db_paths)
+    )
+
+    return MultiProcessCriticalPathResult(
+        critical_path=result,
+        critical_processes=path_processes.tolist(),
+        critical_local_ids=merged.local_ids(path).tolist(),
+        db_paths=merged.db_paths,
+        clock_offsets_ns=merged.clock_offsets_ns,
+        process_contributions={
+            db: float(t / critical_length) for db, t in zip(merged.db_paths, per_process.tolist()) if t > 0
+        },
+    )
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+# gfx942 roofline inputs: VALU/MFMA work (SQ) and EA read/write requests (TCC)
+_GFX942_COMPUTE_COUNTERS = [
+    "SQ_INSTS_VALU",
+    "SQ_INSTS_VALU_MFMA_MOPS_F32",
+]
+_GFX942_MEMORY_COUNTERS = [
+    "TCC_EA0_RDREQ",
+    "TCC_EA0_WRREQ",
+    "TCC_EA0_RDREQ_32B",
+    "TCC_EA0_WRREQ_32B",
+]
+
+
+def roofline_counters(arch) -> List[str]:
+    """PMC counters flops_and_bytes needs on this architecture."""
+    if arch.arch_name == "gfx942":
+        return _GFX942_COMPUTE_COUNTERS + _GFX942_MEMORY_COUNTERS
+    # Generic fallback: raw VALU instruction count as FLOP proxy
+    return ["SQ_INSTS_VALU"]
+
+
+def flops_and_bytes(metric, arch):
+    """
+    FLOPs and DRAM bytes from counter values. metric(name) returns a scalar
+    or an array (one entry per dispatch); the result has the same shape.
+    """
+    if arch.arch_name == "gfx942":
+        # VALU instructions approximate scalar FP32 ops
+        # MFMA MOPS represent 512 FLOPs each
+        flops = metric("SQ_INSTS_VALU") * arch.fp32_valu_width + metric("SQ_INSTS_VALU_MFMA_MOPS_F32") * 512.0
+
+        rd = metric("TCC_EA0_RDREQ")
+        wr = metric("TCC_EA0_WRREQ")
+        rd32 = metric("TCC_EA0_RDREQ_32B")
+        wr32 = metric("TCC_EA0_WRREQ_32B")
+
+        # Assume remaining requests are 64B
+        rd64 = np.maximum(rd - rd32, 0.0)
+        wr64 = np.maximum(wr - wr32, 0.0)
+
+        bytes_moved = rd32 * 32.0 + rd64 * 64.0 + wr32 * 32.0 + wr64 * 64.0
+        return flops, bytes_moved
+
+    flops = metric("SQ_INSTS_VALU")
+    return flops, flops * 0.0
+
+
+@dataclass
+class KernelRoofline:
+    """
+    Roofline coordinates per (kernel symbol, grid, block), one entry per
+    launch shape in every array, ordered by total time descending. Times
+    come from the counter run's own dispatch timestamps.
+    """
+
+    kernel_names: List[str]
+    grid: np.ndarray
+    block: np.ndarray
+    dispatches: np.ndarray
+    time_ns: np.ndarray
+    flops: np.ndarray
+    bytes: np.ndarray
+    arithmetic_intensity: np.ndarray
+    achieved_gflops: np.ndarray
+    achieved_bandwidth_gbps: np.ndarray
+    bound: List[str]
+
+    def __len__(self) -> int:
+        return len(self.kernel_names)
+
+    def point(self, i: int) -> dict:
+        """Entry i in the profile's roofline layout."""
+        return {
+            "flops": float(self.flops[i]),
+            "bytes": float(self.bytes[i]),
+            "arithmetic_intensity": float(self.arithmetic_intensity[i]),
+            "achieved_gflops": float(self.achieved_gflops[i]),
+            "achieved_bandwidth_gbps": float(self.achieved_bandwidth_gbps[i]),
+            "bound": self.bound[i],
+        }
+
+    def rows(self) -> List[dict]:
+        return [
+            {
+                "kernel": self.kernel_names[i],
+                "grid": tuple(self.grid[i].tolist()),
+                "block": tuple(self.block[i].tolist()),
+                "dispatches": int(self.dispatches[i]),
+                "time_ns": int(self.time_ns[i]),
+                **self.point(i),
+            }
+            for i in range(len(self))
+        ]
+
+    def find(self, kernel_name: str, grid=None, block=None) -> Optional[int]:
+        """Index of the entry for kernel_name (and launch shape, when given)."""
+        for i, name in enumerate(self.kernel_names):
+            if name != kernel_name:
+                continue
+            if grid is not None and tuple(self.grid[i].tolist()) != tuple(grid):
+                continue
+            if block is not None and tuple(self.block[i].tolist()) != tuple(block):
+                continue
+            return i
+        return None
+
+
+def kernel_roofline(counters, arch, memory_bandwidth_gbps: Optional[float] = None) -> KernelRoofline:
+    """
+    Per-kernel roofline over DispatchCounters: FLOPs and bytes are derived
+    per dispatch, then summed per (symbol, grid, block) with one bincount
+    per quantity.
+    """
+    flops, bytes_moved = flops_and_bytes(counters.column, arch)
+    flops = np.broadcast_to(np.asarray(flops, dtype=np.float64), (len(counters),))
+    bytes_moved = np.broadcast_to(np.asarray(bytes_moved, dtype=np.float64), (len(counters),))
+
+    keys = np.column_stack([counters.symbols.astype(np.int64), counters.grid, counters.block])
+    unique_keys, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    n_groups = len(unique_keys)
+
+    dispatches = np.bincount(group, minlength=n_groups)
+    time_ns = np.bincount(group, weights=counters.durations_ns, minlength=n_groups)
+    flops = np.bincount(group, weights=flops, minlength=n_groups)
+    bytes_moved = np.bincount(group, weights=bytes_moved, minlength=n_groups)
+
+    time_s = time_ns / 1e9
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ai = np.where(bytes_moved > 0, flops / bytes_moved, 0.0)
+        achieved_gflops = np.where(time_s > 0, flops / time_s / 1e9, 0.0)
+        achieved_bandwidth = np.where(time_s > 0, bytes_moved / time_s / 1e9, 0.0)
+
+    peak_compute = arch.peak_fp32_flops() / 1e9
+    peak_bandwidth = memory_bandwidth_gbps or arch.theoretical_peak_bandwidth()
+    memory_bound = (bytes_moved > 0) & (peak_bandwidth * ai < peak_compute)
+    if not (peak_compute and peak_bandwidth):
+        memory_bound[:] = False
+
+    order = np.lexsort((np.arange(n_groups), -time_ns))
+
+    return KernelRoofline(
+        kernel_names=[counters.symbol_names[s] for s in unique_keys[order, 0].tolist()],
+        grid=unique_keys[order, 1:4],
+        block=unique_keys[order, 4:7],
+        dispatches=dispatches[order],
+        time_ns=time_ns[order],
+        flops=flops[order],
+        bytes=bytes_moved[order],
+        arithmetic_intensity=ai[order],
+        achieved_gflops=achieved_gflops[order],
+        achieved_bandwidth_gbps=achieved_bandwidth[order],
+        bound=np.where(memory_bound[order], "memory", "compute").tolist(),
+    )
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    DispatchLevels,
+    DispatchTable,
+    _longest_path,
+    build_dispatch_levels,
+    read_dispatch_table,
+)
+
+
+@dataclass
+class SlackResult:
+    makespan_ns: int
+    dispatch_ids: np.ndarray
+    earliest_start_ns: np.ndarray
+    latest_start_ns: np.ndarray
+    slack_ns: np.ndarray
+    near_critical_threshold: float
+    near_critical_ids: List[int]
+    symbol_slack: Dict[str, dict]
+
+    def zero_gain_symbols(self) -> List[str]:
+        """Symbols with no near-critical dispatch: speeding them up buys nothing end-to-end."""
+        return [name for name, agg in self.symbol_slack.items() if agg["near_critical_dispatches"] == 0]
+
+
+def slack_from_table(table: DispatchTable, near_critical_threshold: float = 0.05,
+                     levels: Optional[DispatchLevels] = None) -> SlackResult:
+    """
+    Earliest/latest start times over the dispatch DAG.
+
+    The forward pass gives the longest path ending at each dispatch (earliest
+    finish), the backward pass (the same levels walked in reverse, over
+    successors) the longest path starting at it. With makespan L, duration d, forward f and backward b:
+
+        earliest_start = f - d
+        latest_start   = L - b
+        slack          = latest_start - earliest_start
+
+    Times are relative to the DAG's own origin, not trace timestamps. A
+    dispatch is near-critical when its slack is within
+    near_critical_threshold * L, i.e. the longest path through it is at
+    least (1 - threshold) of the makespan. levels, when given, is the
+    table's prebuilt DAG (build_dispatch_levels).
+    """
+    n = len(table)
+    durations = table.durations
+
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return SlackResult(0, empty, empty, empty, empty, near_critical_threshold, [], {})
+
+    if levels is None:
+        levels = build_dispatch_levels(table)
+    forward, _ = _longest_path(levels, durations, parents=False)
+    backward, _ = _longest_path(levels, durations, reverse=True, parents=False)
+    makespan = int(forward.max())
+
+    earliest_start = forward - durations
+    latest_start = makespan - backward
+    slack = latest_start - earliest_start
+
+    near_critical = slack <= near_critical_threshold * makespan
+
+    # Per-symbol aggregates
+    n_symbols = len(table.symbol_names)
+    symbols = table.symbols
+    counts = np.bincount(symbols, minlength=n_symbols)
+    total_ns = np.bincount(symbols, weights=durations, minlength=n_symbols)
+    slack_sum = np.bincount(symbols, weights=slack, minlength=n_symbols)
+    near_count = np.bincount(symbols[near_critical], minlength=n_symbols)
+    near_ns = np.bincount(symbols[near_critical], weights=durations[near_critical], minlength=n_symbols)
+    min_slack = np.full(n_symbols, np.iinfo(np.int64).max)
+    np.minimum.at(min_slack, symbols, slack)
+
+    symbol_slack = {}
+    for sym in np.nonzero(counts)[0].tolist():
+        symbol_slack[table.symbol_names[sym]] = {
+            "dispatches": int(counts[sym]),
+            "total_ns": int(total_ns[sym]),
+            "min_slack_ns": int(min_slack[sym]),
+            "mean_slack_ns": float(slack_sum[sym] / counts[sym]),
+            "near_critical_dispatches": int(near_count[sym]),
+            "near_critical_ns": int(near_ns[sym]),
+        }
+
+    return SlackResult(
+        makespan_ns=makespan,
+        dispatch_ids=table.ids,
+        earliest_start_ns=earliest_start,
+        latest_start_ns=latest_start,
+        slack_ns=slack,
+        near_critical_threshold=near_critical_threshold,
+        near_critical_ids=table.ids[near_critical].tolist(),
+        symbol_slack=symbol_slack,
+    )
+
+
+def analyze_slack(db_path: str, near_critical_threshold: float = 0.05) -> SlackResult:
+    return slack_from_table(read_dispatch_table(db_path), near_critical_threshold)
@@ -0,0 +1,120 @@
+import heapq
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    CriticalPathResult,
+    DispatchLevels,
+    DispatchTable,
+    _result_from_path,
+    build_dispatch_levels,
+    read_dispatch_table,
+)
+
+
+@dataclass
+class TopKPathsResult:
+    """
+    The k longest source-to-sink paths of the dispatch DAG, longest first.
+    shared_symbols maps every symbol that lies on all of them to its smallest
+    share of any one path: speeding it up shortens each of these paths by at
+    least that fraction. Paths beyond the k-th are not considered, so a
+    shorter path may still take over once they shrink enough.
+    """
+
+    k: int
+    paths: List[CriticalPathResult]
+    shared_symbols: Dict[str, float]
+
+    @property
+    def lengths_ns(self) -> List[int]:
+        return [p.critical_path_ns for p in self.paths]
+
+
+def _k_best(heads: List[tuple], best: List[list], k: int, extra: int) -> list:
+    """
+    Lazily merge sorted candidate lists: heads holds (-length, node) for the
+    best entry of each node, and popping entry r of a node pushes entry r + 1.
+    Returns up to k (length, node, rank) with `extra` added to every length.
+    """
+    heap = [(neg, node, 0) for neg, node in heads]
+    heapq.heapify(heap)
+
+    out = []
+    while heap and len(out) < k:
+        neg, node, rank = heapq.heappop(heap)
+        out.append((extra - neg, node, rank))
+        if rank + 1 < len(best[node]):
+            heapq.heappush(heap, (-best[node][rank + 1][0], node, rank + 1))
+    return out
+
+
+def top_k_paths_indices(table: DispatchTable, k: int, levels: Optional[DispatchLevels] = None):
+    """
+    Row indices and lengths of the k longest source-to-sink paths.
+
+    best[v] keeps the k longest paths ending at v as (length, pred, rank),
+    with rank indexing best[pred]. Visiting nodes level by level, each list
+    is a bounded k-way merge over the predecessors' lists, so the cost is
+    O(E + N k log(indegree)) instead of enumerating paths. levels, when
+    given, is the table's prebuilt DAG (build_dispatch_levels).
+    """
+    if levels is None:
+        levels = build_dispatch_levels(table)
+    n = len(levels)
+    order = levels.order.tolist()
+    pred_ptr = levels.pred_ptr.tolist()
+    pred_src = levels.pred_src.tolist()
+    duration = table.durations.tolist()
+
+    best: List[list] = [None] * n
+    for pos, v in enumerate(order):
+        lo, hi = pred_ptr[pos], pred_ptr[pos + 1]
+        # Sources hang off the virtual node n
+        if pred_src[lo] == n:
+            best[v] = [(duration[v], -1, -1)]
+            continue
+        # A serial and a trace edge can link the same pair; merge each pred once
+        heads = [(-best[p][0][0], p) for p in dict.fromkeys(pred_src[lo:hi])]
+        best[v] = _k_best(heads, best, k, duration[v])
+
+    sinks = levels.order[levels.succ_dst[levels.succ_ptr[:-1]] == n].tolist()
+    ranked = _k_best([(-best[s][0][0], s) for s in sinks], best, k, 0)
+
+    paths = []
+    for length, node, rank in ranked:
+        path = []
+        while node != -1:
+            path.append(node)
+            _, node, rank = best[node][rank]
+        path.reverse()
+        paths.append((np.asarray(path, dtype=np.int64), length))
+    return paths
+
+
+def top_k_paths_from_table(table: DispatchTable, k: int = 5, levels: Optional[DispatchLevels] = None) -> TopKPathsResult:
+    if k < 1:
+        raise ValueError("k must be at least 1")
+
+    if len(table) == 0:
+        return TopKPathsResult(k=k, paths=[], shared_symbols={})
+
+    paths = [
+        _result_from_path(table, path, length)
+        for path, length in top_k_paths_indices(table, k, levels)
+    ]
+
+    shared_symbols = {
+        name: min(p.symbol_contributions[name] for p in paths)
+        for name in paths[0].symbol_contributions
+        if all(name in p.symbol_contributions for p in paths[1:])
+    }
+    shared_symbols = dict(sorted(shared_symbols.items(), key=lambda kv: -kv[1]))
+
+    return TopKPathsResult(k=k, paths=paths, shared_symbols=shared_symbols)
+
+
+def analyze_top_k_paths(db_path: str, k: int = 5) -> TopKPathsResult:
+    return top_k_paths_from_table(read_dispatch_table(db_path), k)
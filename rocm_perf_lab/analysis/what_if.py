@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    DispatchLevels,
+    DispatchTable,
+    _longest_path,
+    build_dispatch_levels,
+    read_dispatch_table,
+)
+
+
+# Upper bound on (dispatches x scenarios) cells evaluated at once; each cell
+# holds a float64 dp value and an int32 parent (~200 MB at this size)
+_CELL_BUDGET = 1 << 24
+
+
+@dataclass
+class WhatIfResult:
+    """
+    Predicted makespans for a batch of speedup scenarios. Row s of
+    `speedups` gives the factor applied to each symbol in `symbols` (2.0
+    halves every dispatch of that symbol, inf removes it); symbols not
+    listed keep their measured durations.
+    """
+
+    symbols: List[str]
+    speedups: np.ndarray
+    baseline_makespan_ns: int
+    makespan_ns: np.ndarray
+    dominant_symbols: List[str]
+
+    @property
+    def speedup(self) -> np.ndarray:
+        """Predicted end-to-end speedup per scenario."""
+        with np.errstate(divide="ignore"):
+            return self.baseline_makespan_ns / self.makespan_ns
+
+
+def _evaluate(levels: DispatchLevels, durations: np.ndarray, symbols: np.ndarray, n_symbols: int):
+    """
+    Longest path for every scenario column of `durations` (n, S) at once.
+    Returns (makespan per scenario, dominant symbol id per scenario).
+    """
+    n, s = durations.shape
+    dp = durations.copy()
+    parent = np.full((n, s), -1, dtype=np.int32)
+
+    ptr = levels.pred_ptr
+    bounds = levels.bounds.tolist()
+    # Level 0 holds the sources, whose only predecessor is the virtual node
+    for k in range(1, len(bounds) - 1):
+        lo, hi = bounds[k], bounds[k + 1]
+        targets = levels.order[lo:hi]
+        e_lo, e_hi = ptr[lo], ptr[hi]
+        edge_src = levels.pred_src[e_lo:e_hi]
+        seg_starts = ptr[lo:hi] - e_lo
+
+        incoming = dp[edge_src]
+        best = np.maximum.reduceat(incoming, seg_starts, axis=0)
+        dp[targets] += best
+
+        # First predecessor attaining the max, per target and scenario
+        hit = incoming == np.repeat(best, np.diff(ptr[lo:hi + 1]), axis=0)
+        edge_pos = np.where(hit, np.arange(len(edge_src))[:, None], len(edge_src))
+        first = np.minimum.reduceat(edge_pos, seg_starts, axis=0)
+        parent[targets] = edge_src[first]
+
+    ends = np.argmax(dp, axis=0)
+    makespan = dp[ends, np.arange(s)]
+
+    # Backtrack all scenarios together, summing path time per symbol
+    per_symbol = np.zeros((s, n_symbols))
+    cols = np.arange(s)
+    cur = ends.astype(np.int64)
+    active = np.ones(s, dtype=bool)
+    while active.any():
+        c, rows = cols[active], cur[active]
+        np.add.at(per_symbol, (c, symbols[rows]), durations[rows, c])
+        cur[active] = parent[rows, c]
+        active &= cur >= 0
+
+    return makespan, np.argmax(per_symbol, axis=1)
+
+
+def what_if_from_table(table: DispatchTable, symbols: Sequence[str], speedups,
+                       levels: Optional[DispatchLevels] = None,
+                       baseline_makespan_ns: Optional[int] = None) -> WhatIfResult:
+    """
+    Re-evaluate the dispatch DAG's longest path under every row of
+    `speedups` (scenarios x len(symbols)). The DAG is built once (or passed
+    in as levels); scenarios are solved in chunks as one (dispatches x
+    scenarios) DP. baseline_makespan_ns, when already known (the critical
+    path length), saves solving the unmodified DAG again.
+
+    Dependencies are those inferred from the measured trace; scenarios only
+    change durations, not which dispatches wait on which.
+    """
+    symbols = list(symbols)
+    speedups = np.atleast_2d(np.asarray(speedups, dtype=np.float64))
+    if speedups.shape[1] != len(symbols):
+        raise ValueError(f"speedups has {speedups.shape[1]} columns for {len(symbols)} symbols")
+    if (speedups <= 0).any():
+        raise ValueError("speedup factors must be positive")
+
+    n = len(table)
+    n_scenarios = len(speedups)
+
+    if n == 0:
+        return WhatIfResult(symbols, speedups, 0, np.zeros(n_scenarios), [None] * n_scenarios)
+
+    # Factor matrix over the table's own symbol ids (unlisted symbols: 1.0)
+    n_symbols = len(table.symbol_names)
+    column_of = {name: i for i, name in enumerate(table.symbol_names)}
+    factors = np.ones((n_scenarios, n_symbols))
+    for j, name in enumerate(symbols):
+        if name in column_of:
+            factors[:, column_of[name]] = speedups[:, j]
+
+    if levels is None:
+        levels = build_dispatch_levels(table)
+    durations = table.durations.astype(np.float64)
+
+    if baseline_makespan_ns is None:
+        baseline, _ = _longest_path(levels, table.durations, parents=False)
+        baseline_makespan_ns = int(baseline.max())
+
+    chunk = max(1, _CELL_BUDGET // n)
+    makespans, dominant = [], []
+    for lo in range(0, n_scenarios, chunk):
+        scenario_factors = factors[lo:lo + chunk]
+        scaled = durations[:, None] / scenario_factors[:, table.symbols].T
+        m, d = _evaluate(levels, scaled, table.symbols, n_symbols)
+        makespans.append(m)
+        dominant.append(d)
+
+    return WhatIfResult(
+        symbols=symbols,
+        speedups=speedups,
+        baseline_makespan_ns=baseline_makespan_ns,
+        makespan_ns=np.concatenate(makespans),
+        dominant_symbols=[table.symbol_names[i] for i in np.concatenate(dominant).tolist()],
+    )
+
+
+def analyze_what_if(db_path: str, symbols: Sequence[str], speedups) -> WhatIfResult:
+    return what_if_from_table(read_dispatch_table(db_path), symbols, speedups)
+
+
+def speedup_ceiling(table: DispatchTable, symbol: str, levels: Optional[DispatchLevels] = None,
+                    baseline_makespan_ns: Optional[int] = None) -> float:
+    """End-to-end speedup if every dispatch of `symbol` took zero time."""
+    result = what_if_from_table(
+        table, [symbol], [[np.inf]], levels=levels, baseline_makespan_ns=baseline_makespan_ns
+    )
+    return float(result.speedup[0])
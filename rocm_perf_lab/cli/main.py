@@ -1,9 +1,8 @@
 import typer
 import json
 from rocm_perf_lab.profiler.pipeline import build_profile
-from rocm_perf_lab.profiler.extended_pipeline import build_extended_profile
-from rocm_perf_lab.profiler.att_runner import run_att
-from rocm_perf_lab.profiler.rocpd_detector import detect_latest_rocpd_db
+from rocm_perf_lab.profiler.collection_planner import plan_collection, run_collection
+from rocm_perf_lab.profiler.workspace import DEFAULT_KEEP_RUNS, DEFAULT_WORKSPACE_ROOT
 from rocm_perf_lab.autotune.tuner import autotune as run_autotune
 
 app = typer.Typer(no_args_is_help=True)
@@ -83,13 +82,22 @@ def main(
         "--version",
         help="Show version and exit.",
         is_eager=True,
-    )
+    ),
+    backend: str = typer.Option(
+        None,
+        "--backend",
+        help="Profiler backend: rocprofv3, recorded:<dir> or synthetic[:<dispatches>] (default: $ROCM_PERF_LAB_BACKEND or rocprofv3).",
+    ),
 ):
     if version:
         from rocm_perf_lab import __version__
         typer.echo(__version__)
         raise typer.Exit()
 
+    if backend:
+        from rocm_perf_lab.profiler.backends import parse_backend, set_backend
+        set_backend(parse_backend(backend))
+
 
 @app.command()
 def profile(
@@ -100,55 +108,43 @@ def profile(
     quiet: bool = typer.Option(False, "--quiet", help="Suppress non-essential output."),
     debug: bool = typer.Option(False, "--debug", help="Enable debug output (shows rocprof logs)."),
     roofline: bool = typer.Option(False, "--roofline", help="Enable roofline analysis using hardware counters."),
+    roofline_all_kernels: bool = typer.Option(True, "--roofline-all-kernels/--roofline-profiled-kernel", help="Sample roofline counters on every kernel (default), or on the profiled kernel only."),
     focus_critical: bool = typer.Option(False, "--focus-critical", help="Enable critical path analysis (requires rocpd DB)."),
+    path_analysis: bool = typer.Option(False, "--path-analysis", help="With --focus-critical, also report the top-K paths and the dominant kernel's speedup ceiling."),
     deep_analysis: bool = typer.Option(False, "--deep-analysis", help="Enable ATT deep microarchitectural analysis."),
     memory_bandwidth_gbps: float = typer.Option(None, "--memory-bandwidth-gbps", help="Override peak memory bandwidth in GB/s."),
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse results cached for an unchanged binary and environment."),
+    refresh: bool = typer.Option(False, "--refresh", help="Profile again and overwrite cached results."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Print the collection plan (app launches per pass) and exit."),
     json_output: bool = typer.Option(False, "--json", help="Emit structured JSON output.")
 ):
     """Profile a ROCm kernel or binary."""
 
-    if focus_critical or deep_analysis:
-        # First run base profile to generate rocpd DB
-        base_profile = build_profile(
-            cmd=cmd,
-            runs=runs,
-            use_rocprof=rocprof,
-            clock_mhz=clock_mhz,
-            debug=debug,
-            roofline=roofline,
-            memory_bandwidth_gbps=memory_bandwidth_gbps,
-            persist_rocpd=focus_critical,
-        )
-
-        rocpd_db_path = None
-        att_dispatch_dir = None
-
-        if focus_critical:
-            # If we persisted rocpd output, prefer DB inside .rocpd_profile
-            if focus_critical:
-                from pathlib import Path
-                import glob
-
-                profile_dir = Path(".rocpd_profile")
-                if profile_dir.exists():
-                    db_files = glob.glob(str(profile_dir / "**/*_results.db"), recursive=True)
-                    rocpd_db_path = Path(max(db_files, key=lambda p: Path(p).stat().st_mtime)) if db_files else None
-                else:
-                    rocpd_db_path = detect_latest_rocpd_db()
-            else:
-                rocpd_db_path = detect_latest_rocpd_db()
+    plan = plan_collection(
+        runs=runs,
+        roofline=roofline,
+        critical_path=focus_critical,
+        att=deep_analysis,
+        roofline_all_kernels=roofline_all_kernels,
+        path_analysis=path_analysis,
+    )
 
-            if rocpd_db_path is None:
-                typer.echo("Warning: rocpd database not found. Critical path analysis skipped.")
+    if dry_run:
+        typer.echo(plan.describe())
+        return
 
+    if rocprof:
         if deep_analysis:
             typer.echo("Running ATT deep analysis (this may take time)...")
-            att_dispatch_dir = run_att(cmd)
 
-        result = build_extended_profile(
-            base_profile=base_profile,
-            rocpd_db_path=rocpd_db_path,
-            att_dispatch_dir=att_dispatch_dir,
+        result = run_collection(
+            cmd,
+            plan,
+            clock_mhz=clock_mhz,
+            debug=debug,
+            memory_bandwidth_gbps=memory_bandwidth_gbps,
+            use_cache=cache,
+            refresh=refresh,
         )
     else:
         result = build_profile(
@@ -159,6 +155,9 @@ def profile(
             debug=debug,
             roofline=roofline,
             memory_bandwidth_gbps=memory_bandwidth_gbps,
+            use_cache=cache,
+            refresh=refresh,
+            roofline_all_kernels=roofline_all_kernels,
         )
 
     if json_output:
@@ -179,6 +178,198 @@ def profile(
         typer.echo(f"Occupancy: {result['occupancy']['theoretical']:.2f}")
 
 
+@app.command(name="critical-path")
+def critical_path(
+    db_paths: list[str] = typer.Argument(..., help="rocpd results DBs, or directories to search for *_results.db."),
+    align: str = typer.Option("auto", "--align", help="Clock alignment across processes: auto, shared or first-dispatch."),
+    workers: int = typer.Option(None, "--workers", help="Processes used to load DBs in parallel."),
+    iterations: bool = typer.Option(False, "--iterations", help="Report per-step critical paths of a periodic workload."),
+    marker: str = typer.Option(None, "--marker", help="Regex for the kernel that starts each step (default: auto-detect)."),
+    top_k: int = typer.Option(None, "--top-k", help="Report the K longest paths and the kernels shared by all of them."),
+    json_output: bool = typer.Option(False, "--json", help="Emit structured JSON output.")
+):
+    """Critical path across ranks (one rocpd DB per process), or per step with --iterations."""
+    from pathlib import Path
+    from rocm_perf_lab.analysis.multi_process import analyze_multi_process_critical_path
+
+    paths = []
+    for p in db_paths:
+        path = Path(p)
+        if path.is_dir():
+            paths.extend(sorted(str(f) for f in path.rglob("*_results.db")))
+        elif path.exists():
+            paths.append(str(path))
+
+    if not paths:
+        typer.echo("No rocpd databases found.")
+        raise typer.Exit(code=1)
+
+    if iterations:
+        _report_iterations(paths, marker, workers, json_output)
+        return
+
+    if top_k is not None:
+        _report_top_k(paths, top_k, align, workers, json_output)
+        return
+
+    try:
+        res = analyze_multi_process_critical_path(paths, align=align, max_workers=workers)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    cp = res.critical_path
+
+    if json_output:
+        typer.echo(json.dumps({
+            "critical_path_ns": cp.critical_path_ns,
+            "dominant_symbol": cp.dominant_symbol_name,
+            "fraction": cp.dominant_symbol_fraction,
+            "kernel_ids": res.critical_local_ids,
+            "processes": [res.db_paths[p] for p in res.critical_processes],
+            "process_contributions": res.process_contributions,
+            "clock_offsets_ns": dict(zip(res.db_paths, res.clock_offsets_ns)),
+        }, indent=2))
+        return
+
+    typer.echo(f"Processes: {len(res.db_paths)}")
+    typer.echo(f"Critical path: {cp.critical_path_ns / 1e6:.3f} ms ({len(cp.critical_kernel_ids)} dispatches)")
+    typer.echo(f"Dominant symbol: {cp.dominant_symbol_name} ({cp.dominant_symbol_fraction:.1%})")
+    for db, fraction in sorted(res.process_contributions.items(), key=lambda kv: -kv[1]):
+        typer.echo(f"  {fraction:6.1%}  {db}")
+
+
+def _report_top_k(paths, k, align, workers, json_output):
+    from rocm_perf_lab.analysis.multi_process import merge_process_traces
+    from rocm_perf_lab.analysis.top_k_paths import top_k_paths_from_table
+
+    try:
+        merged = merge_process_traces(paths, align=align, max_workers=workers)
+        res = top_k_paths_from_table(merged.table, k)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    if json_output:
+        typer.echo(json.dumps({
+            "k": res.k,
+            "paths": [
+                {
+                    "length_ns": p.critical_path_ns,
+                    "kernel_ids": p.critical_kernel_ids,
+                    "symbol_contributions": p.symbol_contributions,
+                }
+                for p in res.paths
+            ],
+            "shared_symbols": res.shared_symbols,
+        }, indent=2))
+        return
+
+    for rank, p in enumerate(res.paths, start=1):
+        typer.echo(f"#{rank}: {p.critical_path_ns / 1e6:.3f} ms ({len(p.critical_kernel_ids)} dispatches)")
+        for name, fraction in sorted(p.symbol_contributions.items(), key=lambda kv: -kv[1]):
+            typer.echo(f"  {fraction:6.1%}  {name}")
+    typer.echo(f"On all {len(res.paths)} paths:")
+    for name, fraction in res.shared_symbols.items():
+        typer.echo(f"  >= {fraction:6.1%}  {name}")
+
+
+def _report_iterations(paths, marker, workers, json_output):
+    from rocm_perf_lab.analysis.iterations import analyze_iteration_critical_paths
+
+    if len(paths) != 1:
+        typer.echo("--iterations takes a single rocpd database.")
+        raise typer.Exit(code=1)
+
+    try:
+        res = analyze_iteration_critical_paths(paths[0], marker=marker, max_workers=workers)
+    except RuntimeError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    if json_output:
+        typer.echo(json.dumps({
+            "step_boundary": res.anchor_symbol,
+            "iterations": res.iterations,
+            "warmup_dispatches": res.warmup_dispatches,
+            "p50_makespan_ns": res.p50_makespan_ns,
+            "p99_makespan_ns": res.p99_makespan_ns,
+            "slow_step_threshold_ns": res.slow_step_threshold_ns,
+            "slow_step_symbols": res.slow_step_symbols,
+            "makespan_ns": res.makespan_ns.tolist(),
+            "critical_path_ns": res.critical_path_ns.tolist(),
+        }, indent=2))
+        return
+
+    typer.echo(f"Step boundary: {res.anchor_symbol}")
+    typer.echo(f"Iterations: {res.iterations} (warmup dispatches: {res.warmup_dispatches})")
+    typer.echo(f"Step makespan p50: {res.p50_makespan_ns / 1e6:.3f} ms  p99: {res.p99_makespan_ns / 1e6:.3f} ms")
+    typer.echo("Dominant kernels in slow steps:")
+    for name, share in sorted(res.slow_step_symbols.items(), key=lambda kv: -kv[1]):
+        typer.echo(f"  {share:6.1%}  {name}")
+
+
+@app.command()
+def hotspots(
+    att_dir: str = typer.Argument(..., help="ATT output dir (one ui_output_agent_* dir per dispatch), or a single dispatch dir."),
+    top_k: int = typer.Option(10, "--top-k", help="Entries per ranking."),
+    source: str = typer.Option(None, "--source", help="Only report lines of this source file (by file name)."),
+    json_output: bool = typer.Option(False, "--json", help="Emit structured JSON output.")
+):
+    """Instructions, basic blocks, loops and source lines ranked by ATT stall cycles."""
+    from pathlib import Path
+    from rocm_perf_lab.analysis.att_hotspots import build_hotspot_index
+
+    path = Path(att_dir)
+    if not path.is_dir():
+        typer.echo("ATT directory not found.")
+        raise typer.Exit(code=1)
+
+    try:
+        index = build_hotspot_index(path, top_k=top_k)
+    except (RuntimeError, ValueError) as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    if source is not None:
+        index = index.for_source(Path(source).name)
+
+    if json_output:
+        typer.echo(json.dumps(index.to_dict(), indent=2))
+        return
+
+    def share(stall):
+        return f"{stall / index.total_stall:6.1%}" if index.total_stall > 0 else "   n/a"
+
+    typer.echo("Most stalled instructions:")
+    for i in index.by_stall:
+        typer.echo(f"  {share(i.stall)}  0x{i.address:x}  {i.isa}  [{i.source or 'no line info'}]")
+
+    loop = index.hot_loop()
+    if loop is not None:
+        typer.echo(f"Hottest loop: 0x{loop.start:x}-0x{loop.end:x} ({share(loop.stall).strip()} of stall)")
+        for l in loop.lines:
+            typer.echo(f"  {share(l.stall)}  {l.file}:{l.line}")
+
+    typer.echo("Hottest source lines:")
+    for l in index.lines:
+        typer.echo(f"  {share(l.stall)}  {l.file}:{l.line}")
+
+
+@app.command(name="prune-runs")
+def prune_runs(
+    keep: int = typer.Option(DEFAULT_KEEP_RUNS, "--keep", help="Newest runs to keep."),
+    root: str = typer.Option(str(DEFAULT_WORKSPACE_ROOT), "--root", help="Workspace root holding the persisted runs."),
+):
+    """Remove all but the newest persisted profiling runs under a workspace root."""
+    from rocm_perf_lab.profiler.workspace import prune_runs as prune
+
+    removed = prune(root, keep=keep)
+    for run_dir in removed:
+        typer.echo(f"Removed {run_dir}")
+    typer.echo(f"Removed {len(removed)} run(s).")
+
+
 @app.command(name="autotune")
 def autotune(
     space: str = typer.Option(..., "--space", help="Path to JSON file containing expanded search space."),
@@ -226,6 +417,7 @@ def optimize(
     import subprocess
     import shutil
 
+    from rocm_perf_lab.analysis.att_hotspots import hot_source_lines
     from rocm_perf_lab.analysis.optimization_score import compute_optimization_score
     from rocm_perf_lab.optimization.transform_loop_unroll import apply_loop_unroll
     from rocm_perf_lab.optimization.variant_manager import create_variant_dir, save_variant_source
@@ -239,31 +431,8 @@ def optimize(
 
     typer.echo("=== Baseline Extended Profiling ===")
 
-    # Run base profile first (persist rocpd for critical-path)
-    base_profile = build_profile(
-        cmd=binary_cmd,
-        runs=runs,
-        use_rocprof=True,
-        roofline=True,
-        persist_rocpd=True,
-    )
-
-    # Detect rocpd DB inside .rocpd_profile
-    from pathlib import Path
-    import glob
-
-    profile_dir = Path(".rocpd_profile")
-    db_files = glob.glob(str(profile_dir / "**/*_results.db"), recursive=True)
-    rocpd_db_path = Path(max(db_files, key=lambda p: Path(p).stat().st_mtime)) if db_files else None
-
-    # Run ATT
-    att_dispatch_dir = run_att(binary_cmd)
-
-    baseline = build_extended_profile(
-        base_profile=base_profile,
-        rocpd_db_path=rocpd_db_path,
-        att_dispatch_dir=att_dispatch_dir,
-    )
+    plan = plan_collection(runs=runs, roofline=True, critical_path=True, att=True)
+    baseline = run_collection(binary_cmd, plan)
 
     headroom = baseline.get("headroom_fraction", 0.0)
     critical = baseline.get("critical_path", {})
@@ -293,11 +462,15 @@ def optimize(
 
     typer.echo("=== Applying Loop Unroll Transformation ===")
 
+    # Unroll the loop ATT saw stalling, not just the kernel's first one
+    hot_lines = hot_source_lines(baseline.get("att", {}).get("hotspots"), source_path.name)
+
     try:
         modified_src, factor = apply_loop_unroll(
             source_path,
             stall_fraction,
             dominant_symbol,
+            hot_lines=hot_lines,
         )
     except Exception as e:
         typer.echo(f"Transformation failed: {e}")
@@ -324,26 +497,7 @@ def optimize(
 
     typer.echo("=== Re-Profiling Variant ===")
 
-    # Re-profile variant (persist rocpd)
-    base_profile_new = build_profile(
-        cmd=str(variant_binary),
-        runs=runs,
-        use_rocprof=True,
-        roofline=True,
-        persist_rocpd=True,
-    )
-
-    profile_dir_new = Path(".rocpd_profile")
-    db_files_new = glob.glob(str(profile_dir_new / "**/*_results.db"), recursive=True)
-    rocpd_db_path_new = Path(max(db_files_new, key=lambda p: Path(p).stat().st_mtime)) if db_files_new else None
-
-    att_dispatch_dir_new = run_att(str(variant_binary))
-
-    new_profile = build_extended_profile(
-        base_profile=base_profile_new,
-        rocpd_db_path=rocpd_db_path_new,
-        att_dispatch_dir=att_dispatch_dir_new,
-    )
+    new_profile = run_collection(str(variant_binary), plan)
 
     runtime_new = new_profile.get("runtime_ms", 0.0)
 
@@ -391,7 +545,6 @@ def prompt(
     Generate an LLM optimization prompt from profiling data.
     """
     from pathlib import Path
-    import glob
     import json
 
     from rocm_perf_lab.llm.prompt_builder import (
@@ -406,26 +559,8 @@ def prompt(
 
     typer.echo("=== Running Extended Profiling ===")
 
-    # Base profile with persistent rocpd
-    base_profile = build_profile(
-        cmd=binary,
-        runs=runs,
-        use_rocprof=True,
-        roofline=True,
-        persist_rocpd=True,
-    )
-
-    profile_dir = Path(".rocpd_profile")
-    db_files = glob.glob(str(profile_dir / "**/*_results.db"), recursive=True)
-    rocpd_db_path = Path(max(db_files, key=lambda p: Path(p).stat().st_mtime)) if db_files else None
-
-    att_dispatch_dir = run_att(binary)
-
-    extended = build_extended_profile(
-        base_profile=base_profile,
-        rocpd_db_path=rocpd_db_path,
-        att_dispatch_dir=att_dispatch_dir,
-    )
+    plan = plan_collection(runs=runs, roofline=True, critical_path=True, att=True)
+    extended = run_collection(binary, plan)
 
     context = build_optimization_context(
         source_path=source_path,
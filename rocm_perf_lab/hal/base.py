@@ -25,6 +25,20 @@ class GPUArchitecture(ABC):
         # Override in architecture-specific subclasses where applicable
         self.fp32_valu_width: int = 1
 
+        # Counters per PMC block per pass, for the gfx9 (CDNA) block layout;
+        # counters of blocks not listed get a pass slot of their own
+        self.counter_block_limits: dict = {
+            "SQ": 8,
+            "TA": 2,
+            "TD": 2,
+            "TCP": 4,
+            "TCC": 4,
+            "SPI": 2,
+            "GRBM": 2,
+            "CPC": 2,
+            "CPF": 2,
+        }
+
     @abstractmethod
     def compute_occupancy(
         self,
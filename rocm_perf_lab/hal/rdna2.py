@@ -16,6 +16,11 @@ class RDNA2(GPUArchitecture):
         # Derive waves per SIMD dynamically
         self.max_waves_per_simd = self.max_waves_per_cu // self.simd_per_cu
 
+        # gfx10 PMC layout: the L2 block is GL2C rather than TCC, with a
+        # GL1C cache in front of it
+        del self.counter_block_limits["TCC"]
+        self.counter_block_limits.update(GL1C=4, GL2C=4)
+
     def compute_occupancy(
         self,
         vgpr_per_thread: int,
@@ -5,9 +5,7 @@ from typing import Callable
 
 from rocm_perf_lab.llm.prompt_builder import build_optimization_context, build_llm_prompt
 from rocm_perf_lab.llm.patch_extractor import extract_cpp_patch
-from rocm_perf_lab.profiler.pipeline import build_profile
-from rocm_perf_lab.profiler.extended_pipeline import build_extended_profile
-from rocm_perf_lab.profiler.att_runner import run_att
+from rocm_perf_lab.profiler.collection_planner import plan_collection, run_collection
 
 
 def replace_dominant_kernel(source_text: str, kernel_name: str, new_kernel_code: str) -> str:
@@ -47,27 +45,8 @@ def run_llm_optimization_loop(
 
     print("=== Baseline Profiling ===")
 
-    base_profile = build_profile(
-        cmd=binary_cmd,
-        runs=3,
-        use_rocprof=True,
-        roofline=True,
-        persist_rocpd=True,
-    )
-
-    # Detect rocpd DB inside .rocpd_profile
-    import glob
-    profile_dir = Path(".rocpd_profile")
-    db_files = glob.glob(str(profile_dir / "**/*_results.db"), recursive=True)
-    rocpd_db_path = Path(max(db_files, key=lambda p: Path(p).stat().st_mtime)) if db_files else None
-
-    att_dispatch_dir = run_att(binary_cmd)
-
-    extended = build_extended_profile(
-        base_profile=base_profile,
-        rocpd_db_path=rocpd_db_path,
-        att_dispatch_dir=att_dispatch_dir,
-    )
+    plan = plan_collection(runs=3, roofline=True, critical_path=True, att=True, path_analysis=True)
+    extended = run_collection(binary_cmd, plan)
 
     best_runtime = extended.get("runtime_ms")
     cp = extended.get("critical_path", {})
@@ -77,15 +56,16 @@ def run_llm_optimization_loop(
     if not dominant_symbol:
         raise RuntimeError("Critical-path analysis failed: dominant_symbol is None.")
 
-    if fraction < 0.999:
-        max_whole_app_speedup = 1.0 / (1.0 - fraction)
-    else:
-        max_whole_app_speedup = float("inf")
+    # Makespan with the dominant kernel at zero cost, re-solved over the DAG
+    # (other queues and paths take over as it shrinks)
+    max_whole_app_speedup = cp.get("speedup_ceiling", float("inf"))
 
     print(f"Baseline runtime: {best_runtime} ms")
     print(f"[INFO] Dominant kernel: {dominant_symbol}")
     print(f"[INFO] Dominant fraction: {fraction:.3f}")
     print(f"[INFO] Theoretical whole-app ceiling: {max_whole_app_speedup:.2f}x")
+    if cp.get("shared_symbols"):
+        print(f"[INFO] Kernels on all top paths: {', '.join(cp['shared_symbols'])}")
 
     previous_patch = None
 
@@ -177,25 +157,7 @@ def run_llm_optimization_loop(
 
         subprocess.run(["hipcc", "-O3", str(candidate_path), "-o", str(candidate_binary)], check=True)
 
-        base_profile_new = build_profile(
-            cmd=str(candidate_binary),
-            runs=3,
-            use_rocprof=True,
-            roofline=True,
-            persist_rocpd=True,
-        )
-
-        # Detect rocpd DB inside .rocpd_profile for candidate
-        import glob
-        profile_dir_new = Path(".rocpd_profile")
-        db_files_new = glob.glob(str(profile_dir_new / "**/*_results.db"), recursive=True)
-        rocpd_db_path_new = Path(max(db_files_new, key=lambda p: Path(p).stat().st_mtime)) if db_files_new else None
-
-        extended_new = build_extended_profile(
-            base_profile=base_profile_new,
-            rocpd_db_path=rocpd_db_path_new,
-            att_dispatch_dir=run_att(str(candidate_binary)),
-        )
+        extended_new = run_collection(str(candidate_binary), plan)
 
         new_runtime = extended_new.get("runtime_ms")
         improvement = (best_runtime - new_runtime) / best_runtime
@@ -207,6 +169,9 @@ def run_llm_optimization_loop(
         if new_dominant and new_dominant != dominant_symbol:
             print("[INFO] Dominance shifted:")
             print(f"       {dominant_symbol} → {new_dominant}")
+            shared = new_cp.get("shared_symbols", {})
+            if shared:
+                print(f"       On all top paths: {', '.join(shared)}")
             dominant_symbol = new_dominant
             fraction = new_fraction
 
@@ -2,6 +2,11 @@ import re
 from pathlib import Path
 from typing import Dict, Any
 
+from rocm_perf_lab.analysis.att_hotspots import hot_source_lines
+
+# Hot source lines and instructions quoted in the prompt
+_PROMPT_HOTSPOTS = 5
+
 
 def extract_dominant_kernel_code(source_text: str, kernel_name: str) -> str:
     kernel_base = kernel_name.split("(")[0]
@@ -42,6 +47,9 @@ def build_optimization_context(
     else:
         code = extract_dominant_kernel_code(source_text, dominant_symbol or "")
 
+    hot_lines = hot_source_lines(extended_profile.get("att", {}).get("hotspots"), source_path.name)
+    source_lines = source_text.splitlines()
+
     context = {
         "hardware": extended_profile.get("gpu", {}),
         "kernel": extended_profile.get("kernel", {}),
@@ -59,12 +67,46 @@ def build_optimization_context(
             "path": str(source_path),
             "kernel_name": dominant_symbol,
             "code": code,
+            # Lines of source_path where ATT saw the most stall cycles, hottest first
+            "hot_lines": [
+                {"line": n, "text": source_lines[n - 1].strip()}
+                for n in hot_lines[:_PROMPT_HOTSPOTS]
+                if 0 < n <= len(source_lines)
+            ],
         },
     }
 
     return context
 
 
+def _format_hotspots(context: Dict[str, Any]) -> str:
+    hotspots = context["att"].get("hotspots") or {}
+    total_stall = hotspots.get("total_stall") or 0.0
+
+    def share(entry):
+        return f"{entry['stall'] / total_stall:.1%}" if total_stall > 0 else "n/a"
+
+    out = []
+    loops = hotspots.get("loops") or []
+    if loops:
+        out.append(f"Hottest loop: ISA 0x{loops[0]['start']:x}-0x{loops[0]['end']:x}, {share(loops[0])} of stall cycles")
+
+    hot_lines = context["source"].get("hot_lines") or []
+    if hot_lines:
+        out.append(f"Hot source lines ({Path(context['source']['path']).name}):")
+        out.extend(f"  line {h['line']}: {h['text']}" for h in hot_lines)
+
+    instructions = hotspots.get("by_stall") or []
+    if instructions:
+        out.append("Most stalled instructions:")
+        out.extend(
+            f"  {i['isa']}  [{i['source'] or 'no line info'}]  {share(i)} of stall"
+            for i in instructions[:_PROMPT_HOTSPOTS]
+        )
+
+    return "\n".join(out) if out else "No instruction-level data."
+
+
 def build_llm_prompt(context: Dict[str, Any], compact: bool = False) -> str:
     hw = context["hardware"]
     kernel = context["kernel"]
@@ -80,8 +122,10 @@ def build_llm_prompt(context: Dict[str, Any], compact: bool = False) -> str:
             f"Bound: {roof.get('bound')}\n"
             f"Bottleneck: {bottleneck.get('primary')}\n"
             f"Stall fraction: {att.get('stall_fraction')}\n"
+            f"Stall breakdown: {att.get('stall_breakdown')}\n"
             f"Avg memory latency: {att.get('avg_memory_latency')} cycles\n"
             f"Headroom: {context.get('headroom_fraction')}\n"
+            f"Hot lines: {[h['line'] for h in context['source'].get('hot_lines') or []]}\n"
             f"\nSource:\n{context['source']['code']}"
         )
 
@@ -116,10 +160,16 @@ Instruction Mix: {att.get('instruction_mix')}
 Stall Fraction: {att.get('stall_fraction')}
 Idle Fraction: {att.get('idle_fraction')}
 Average Memory Latency: {att.get('avg_memory_latency')}
+Memory Latency per Access (cycles): {att.get('memory_latency')}
+Stall Breakdown (by memory type waited on): {att.get('stall_breakdown')}
 IPC: {att.get('ipc')}
 
+=== Hotspots ===
+{_format_hotspots(context)}
+
 === Bottleneck ===
 Primary: {bottleneck.get('primary')}
+Secondary: {bottleneck.get('secondary')}
 Confidence: {bottleneck.get('confidence')}
 Reasoning: {bottleneck.get('reasoning')}
 
@@ -33,6 +33,8 @@ OPTIMIZATION_CONTEXT_SCHEMA = {
         "idle_fraction": "float",
         "avg_memory_latency": "float",
         "ipc": "float",
+        "memory_latency": "object",
+        "stall_breakdown": "object",
     },
     "resources": {
         "vgpr_per_thread": "int",
@@ -42,6 +44,7 @@ OPTIMIZATION_CONTEXT_SCHEMA = {
     },
     "bottleneck": {
         "primary": "string",
+        "secondary": "string",
         "confidence": "float",
         "reasoning": "list[string]",
     },
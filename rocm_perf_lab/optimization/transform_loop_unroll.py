@@ -1,5 +1,6 @@
 import re
 from pathlib import Path
+from typing import List, Optional
 
 
 UNSAFE_PATTERNS = [
@@ -20,11 +21,69 @@ def choose_unroll_factor(stall_fraction: float) -> int:
     return max(2, min(8, factor))
 
 
+def _block_end(src: str, body_start: int):
+    """Index of the brace closing the block opened at body_start, or None."""
+    brace_count = 0
+    i = body_start
+    while i < len(src):
+        if src[i] == "{":
+            brace_count += 1
+        elif src[i] == "}":
+            brace_count -= 1
+            if brace_count == 0:
+                return i
+        i += 1
+    return None
+
+
+def _line_of(src: str, index: int) -> int:
+    return src.count("\n", 0, index) + 1
+
+
+def _choose_loop(src: str, kernel_start: int, hot_lines: Optional[List[int]]):
+    """
+    (loop_start, body_start, body_end) of the loop to unroll: the innermost
+    loop of the kernel containing the hottest of hot_lines, else the
+    kernel's first loop.
+    """
+    kernel_body = src.find("{", kernel_start)
+    kernel_end = _block_end(src, kernel_body) if kernel_body != -1 else None
+    if kernel_end is None:
+        kernel_end = len(src)
+
+    loops = []
+    for m in re.finditer(r"\bfor\s*\(.*?\)\s*\{", src[kernel_start:kernel_end], re.DOTALL):
+        loop_start = kernel_start + m.start()
+        body_start = src.find("{", loop_start)
+        loops.append((loop_start, body_start, _block_end(src, body_start)))
+
+    if not loops:
+        return None
+
+    for line in hot_lines or []:
+        containing = [
+            loop for loop in loops
+            if loop[2] is not None and _line_of(src, loop[0]) <= line <= _line_of(src, loop[2])
+        ]
+        if containing:
+            # Innermost: the one starting last
+            return max(containing, key=lambda loop: loop[0])
+
+    return loops[0]
+
+
 def apply_loop_unroll(
     source_path: Path,
     stall_fraction: float,
     kernel_name: str,
+    hot_lines: Optional[List[int]] = None,
 ) -> tuple[str, int]:
+    """
+    Add (or replace) an unroll pragma on a loop of kernel_name. With
+    hot_lines (source lines ranked by ATT stall cycles, see
+    hot_source_lines) the loop containing the hottest of them is chosen;
+    otherwise the kernel's first loop.
+    """
 
     src = source_path.read_text()
 
@@ -39,28 +98,12 @@ def apply_loop_unroll(
 
     factor = choose_unroll_factor(stall_fraction)
 
-    for_pattern = r"(for\s*\(.*?\)\s*\{)"
-    loop_match = re.search(for_pattern, src[match.end():], re.DOTALL)
+    loop = _choose_loop(src, match.end(), hot_lines)
 
-    if not loop_match:
+    if loop is None:
         raise RuntimeError("No for-loop found for unroll")
 
-    loop_start = match.end() + loop_match.start()
-
-    brace_count = 0
-    body_start = src.find("{", loop_start)
-    i = body_start
-
-    body_end = None
-    while i < len(src):
-        if src[i] == "{":
-            brace_count += 1
-        elif src[i] == "}":
-            brace_count -= 1
-            if brace_count == 0:
-                body_end = i
-                break
-        i += 1
+    loop_start, body_start, body_end = loop
 
     if body_end is None:
         raise RuntimeError("Could not determine loop body")
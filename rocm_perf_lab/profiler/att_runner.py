@@ -1,38 +1,56 @@
+import sqlite3
 import subprocess
 from pathlib import Path
 from typing import Optional
 
+from rocm_perf_lab.analysis.att_analysis import find_att_dispatches
+from rocm_perf_lab.profiler.backends import KernelFilter, get_backend
+from rocm_perf_lab.profiler.profile_cache import default_profile_cache, profile_key
+from rocm_perf_lab.profiler.workspace import RunWorkspace
 
-def _detect_latest_dispatch_dir(base_dir: Path) -> Optional[Path]:
-    candidates = []
-    for p in base_dir.iterdir():
-        if p.is_dir() and p.name.startswith("ui_output_agent_"):
-            candidates.append(p)
 
-    if not candidates:
-        return None
-
-    candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return candidates[0]
-
-
-def run_att(cmd: str, workdir: Optional[Path] = None) -> Path:
+def run_att(
+    cmd: str,
+    workspace: Optional[RunWorkspace] = None,
+    use_cache: bool = False,
+    refresh: bool = False,
+    kernel_filter: Optional[KernelFilter] = None,
+) -> Path:
     """
     Run rocprofv3 ATT pass for the given command.
-    Returns path to latest ui_output_agent_* dispatch directory.
+    Returns the ATT output directory, holding one ui_output_agent_* dir per
+    traced dispatch (see analyze_att_dispatches), kept as an "att" pass of
+    workspace (a new RunWorkspace when not given).
+
+    kernel_filter limits tracing to matching dispatches. With use_cache the
+    output directory is cached like build_profile results; on a cache hit
+    the returned path is the cached copy and nothing is run.
     """
+    cache = default_profile_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = profile_key("att", cmd=cmd, kernel_filter=kernel_filter)
+        hit = None if refresh else cache.get(cache_key)
+        if hit is not None and "att" in hit.artifacts:
+            return hit.artifacts["att"]
+
+    att_dir = _run_att(cmd, workspace or RunWorkspace(cmd=cmd), kernel_filter)
+
+    if cache is not None:
+        dispatches = [d.name for d in find_att_dispatches(att_dir)]
+        try:
+            return cache.put(cache_key, {"dispatch_dirs": dispatches}, {"att": att_dir}).artifacts["att"]
+        except (OSError, sqlite3.Error) as e:
+            print(f"[CACHE WARNING] Failed to store ATT output: {e}")
 
-    if workdir is None:
-        workdir = Path.cwd()
+    return att_dir
 
-    import shlex
 
-    # Properly split command string into executable + args
-    cmd_list = shlex.split(cmd)
-    att_cmd = ["rocprofv3", "--att", "--"] + cmd_list
+def _run_att(cmd: str, workspace: RunWorkspace, kernel_filter: Optional[KernelFilter] = None) -> Path:
+    pass_dir = workspace.new_pass("att")
 
     try:
-        subprocess.run(att_cmd, cwd=workdir, check=True)
+        get_backend().att(cmd, pass_dir, kernel_filter=kernel_filter)
     except subprocess.CalledProcessError as e:
         raise RuntimeError(
             "rocprofv3 ATT execution failed. "
@@ -41,12 +59,14 @@ def run_att(cmd: str, workdir: Optional[Path] = None) -> Path:
             "the rocprof trace decoder library."
         ) from e
 
-    dispatch_dir = _detect_latest_dispatch_dir(workdir)
+    # The pass dir is fresh, so whatever dispatch dirs it holds are this run's
+    dispatch_dirs = find_att_dispatches(pass_dir)
+    workspace.record("att", pass_dir, dispatch_dirs)
 
-    if dispatch_dir is None:
+    if not dispatch_dirs:
         raise RuntimeError(
             "ATT dispatch directory not found after rocprofv3 --att run. "
             "Ensure rocprofv3 completed successfully."
         )
 
-    return dispatch_dir
+    return pass_dir
@@ -0,0 +1,490 @@
+import itertools
+import json
+import os
+import re
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rocm_perf_lab.profiler.rocpd_query import connect_readonly, find_table
+
+
+@dataclass(frozen=True)
+class KernelFilter:
+    """
+    Which dispatches a collection pass instruments: kernels whose name
+    matches include_regex (searched, as rocprofv3 does), and of each such
+    kernel only the dispatches numbered first..last (1-based, inclusive)
+    by dispatch_range.
+    """
+
+    include_regex: Optional[str] = None
+    dispatch_range: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def for_kernel(cls, kernel_name: str, dispatch_range: Optional[Tuple[int, int]] = None) -> "KernelFilter":
+        """
+        Filter on a kernel's base name: "void ns::gemm<float>(float*)" ->
+        gemm, as a whole identifier in demangled names.
+        """
+        base = re.sub(r"<.*>", "", kernel_name.split("(")[0])
+        base = re.split(r"[\s:]+", base.strip())[-1]
+        return cls(rf"(^|[^A-Za-z_]){re.escape(base)}([^A-Za-z0-9_]|$)", dispatch_range)
+
+    def rocprof_args(self) -> List[str]:
+        args = []
+        if self.include_regex:
+            args += ["--kernel-include-regex", self.include_regex]
+        if self.dispatch_range:
+            first, last = self.dispatch_range
+            args += ["--kernel-iteration-range", f"[{first}-{last}]"]
+        return args
+
+    def matches(self, kernel_name: str) -> bool:
+        return self.include_regex is None or re.search(self.include_regex, kernel_name) is not None
+
+
+class ProfilerBackend(ABC):
+    """
+    Runs a workload under a profiler. Each method leaves rocprofv3-shaped
+    output behind (results DBs under output_dir, ATT ui_output_agent_*
+    dirs under workdir) for the adapters to parse, and raises
+    subprocess.CalledProcessError when the profiled run fails.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def kernel_trace(self, cmd: str, output_dir: str, full_trace: bool = False, debug: bool = False):
+        pass
+
+    @abstractmethod
+    def counters(
+        self,
+        cmd: str,
+        metrics: List[str],
+        output_dir: str,
+        debug: bool = False,
+        kernel_filter: Optional[KernelFilter] = None,
+    ):
+        pass
+
+    @abstractmethod
+    def att(self, cmd: str, workdir: Path, debug: bool = False, kernel_filter: Optional[KernelFilter] = None):
+        pass
+
+    def fingerprint(self) -> dict:
+        """What makes this backend's output differ from another's, for cache keys."""
+        return {"backend": self.name}
+
+
+class Rocprofv3Backend(ProfilerBackend):
+    """The real profiler: shells out to rocprofv3."""
+
+    name = "rocprofv3"
+
+    def _run(self, rocprof_cmd, debug, **kwargs):
+        if debug:
+            subprocess.run(rocprof_cmd, check=True, **kwargs)
+        else:
+            subprocess.run(
+                rocprof_cmd,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **kwargs,
+            )
+
+    def kernel_trace(self, cmd, output_dir, full_trace=False, debug=False):
+        if full_trace:
+            # Critical-path mode: need both kernel and HSA traces
+            rocprof_cmd = ["rocprofv3", "--kernel-trace", "--hsa-trace", "-d", output_dir, "--"] + cmd.split()
+        else:
+            # Lightweight kernel-trace mode with explicit rocpd format
+            rocprof_cmd = ["rocprofv3", "--kernel-trace", "-d", output_dir, "-f", "rocpd", "--"] + cmd.split()
+
+        env = os.environ.copy()
+        env["HOME"] = output_dir
+        env["ROCPROFILER_HOME"] = output_dir
+        env["XDG_CACHE_HOME"] = output_dir
+        self._run(rocprof_cmd, debug, env=env)
+
+    def counters(self, cmd, metrics, output_dir, debug=False, kernel_filter=None):
+        filter_args = kernel_filter.rocprof_args() if kernel_filter else []
+        rocprof_cmd = ["rocprofv3", "--pmc", ",".join(metrics), *filter_args, "-d", output_dir, "--"] + cmd.split()
+        self._run(rocprof_cmd, debug)
+
+    def att(self, cmd, workdir, debug=False, kernel_filter=None):
+        filter_args = kernel_filter.rocprof_args() if kernel_filter else []
+        # Properly split command string into executable + args
+        att_cmd = ["rocprofv3", "--att", *filter_args, "--"] + shlex.split(cmd)
+        subprocess.run(att_cmd, cwd=workdir, check=True)
+
+
+def _run_dir(output_dir, run_ids) -> Path:
+    """A fresh per-run subdir, as rocprofv3 writes each process's output under its pid."""
+    return Path(output_dir) / f"{os.getpid()}_{next(run_ids)}"
+
+
+def _copy_fresh(src: Path, dst: Path):
+    """Copy with a new mtime, so the copy reads as freshly written output."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst, copy_function=shutil.copyfile, dirs_exist_ok=True)
+        os.utime(dst)
+    else:
+        shutil.copyfile(src, dst)
+
+
+def _pmc_names(db_path: Path) -> set:
+    conn = connect_readonly(db_path)
+    try:
+        info_table = find_table(conn, "rocpd_info_pmc")
+        if info_table is None:
+            return set()
+        return {name for (name,) in conn.execute(f"SELECT name FROM {info_table};")}
+    finally:
+        conn.close()
+
+
+def _apply_kernel_filter(db_path: Path, kernel_filter: KernelFilter):
+    """Delete the dispatches (and their counter samples) a filtered run would not have produced."""
+    conn = sqlite3.connect(str(db_path))
+    conn.create_function("rpl_matches", 1, lambda name: kernel_filter.matches(name or ""))
+    dispatch_table = find_table(conn, "rocpd_kernel_dispatch")
+    symbol_table = find_table(conn, "rocpd_info_kernel_symbol")
+    pmc_table = find_table(conn, "rocpd_pmc_event")
+    if dispatch_table is None or symbol_table is None:
+        conn.close()
+        return
+
+    first, last = kernel_filter.dispatch_range or (1, None)
+    with conn:
+        conn.execute(
+            f"""
+            CREATE TEMP TABLE rpl_keep AS
+            SELECT id, event_id FROM (
+                SELECT d.id, d.event_id,
+                       ROW_NUMBER() OVER (PARTITION BY d.kernel_id ORDER BY d.id) AS iteration
+                FROM {dispatch_table} d
+                JOIN {symbol_table} s ON s.id = d.kernel_id
+                WHERE rpl_matches(COALESCE(s.display_name, s.kernel_name))
+            )
+            WHERE iteration >= ? AND (? IS NULL OR iteration <= ?);
+            """,
+            (first, last, last),
+        )
+        conn.execute(f"DELETE FROM {dispatch_table} WHERE id NOT IN (SELECT id FROM rpl_keep);")
+        if pmc_table is not None:
+            conn.execute(f"DELETE FROM {pmc_table} WHERE event_id NOT IN (SELECT event_id FROM rpl_keep);")
+    conn.close()
+
+
+class RecordedBackend(ProfilerBackend):
+    """
+    Replays output captured from earlier rocprofv3 runs, ignoring the
+    command. The recording directory holds:
+
+        trace/**/*_results.db         kernel (and HSA) trace, one DB per process
+        counters/**/*_results.db      --pmc runs; each pass gets the DB with
+                                      the most of its counters
+        att/ui_output_agent_*/        ATT output
+
+    A missing part behaves like a run that produced no output. Kernel
+    filters drop non-matching dispatches from replayed counter DBs; ATT
+    output is replayed as captured.
+    """
+
+    name = "recorded"
+
+    def __init__(self, root):
+        self.root = Path(root)
+        if not self.root.is_dir():
+            raise RuntimeError(f"Recording directory not found: {self.root}")
+        self._run_ids = itertools.count()
+        self._fingerprint = None
+
+    def _results(self, part: str) -> List[Path]:
+        return sorted((self.root / part).glob("**/*_results.db"))
+
+    def kernel_trace(self, cmd, output_dir, full_trace=False, debug=False):
+        run_dir = _run_dir(output_dir, self._run_ids)
+        for db in self._results("trace"):
+            _copy_fresh(db, run_dir / db.relative_to(self.root / "trace"))
+
+    def counters(self, cmd, metrics, output_dir, debug=False, kernel_filter=None):
+        candidates = self._results("counters")
+        if not candidates:
+            return
+        wanted = set(metrics)
+        best = max(candidates, key=lambda db: len(wanted & _pmc_names(db)))
+        dst = _run_dir(output_dir, self._run_ids) / best.name
+        _copy_fresh(best, dst)
+        if kernel_filter is not None:
+            _apply_kernel_filter(dst, kernel_filter)
+
+    def att(self, cmd, workdir, debug=False, kernel_filter=None):
+        for dispatch_dir in sorted((self.root / "att").glob("ui_output_agent_*")):
+            _copy_fresh(dispatch_dir, Path(workdir) / dispatch_dir.name)
+
+    def fingerprint(self):
+        from rocm_perf_lab.profiler.profile_cache import tree_digest
+
+        # A recording is a fixed input; digest it once per backend instance
+        if self._fingerprint is None:
+            self._fingerprint = {"backend": self.name, "recording": tree_digest(self.root)}
+        return self._fingerprint
+
+
+# Agent record written by the synthetic backend (an MI300X)
+_SYNTHETIC_AGENT = {
+    "cu_count": 304,
+    "simd_per_cu": 4,
+    "max_waves_per_cu": 32,
+    "wave_front_size": 64,
+    "max_engine_clk_fcompute": 2100,
+}
+
+# (ISA, share of issued instructions) of the synthetic ATT instruction stream
+_SYNTHETIC_ISA = [
+    ("s_load_dwordx4 s[0:3], s[4:5], 0x0", 0.05),
+    ("v_mov_b32 v1, s0", 0.10),
+    ("global_load_dwordx4 v[2:5], v0, s[0:1]", 0.15),
+    ("s_waitcnt vmcnt(0)", 0.10),
+    ("v_fma_f32 v6, v2, v3, v6", 0.25),
+    ("v_mfma_f32_32x32x8f16 a[0:15], v[2:3], v[4:5], a[0:15]", 0.10),
+    ("ds_write_b128 v7, v[2:5]", 0.08),
+    ("s_cbranch_scc1 0x40", 0.07),
+    ("global_store_dwordx4 v0, v[2:5], s[2:3]", 0.10),
+]
+
+
+class SyntheticBackend(ProfilerBackend):
+    """
+    Generates rocprofv3-shaped output of any size instead of running the
+    command: n_dispatches kernels of n_symbols symbols over n_queues
+    queues, counter samples for every requested counter on every dispatch,
+    and an ATT dispatch dir. Output depends only on the parameters and seed.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, n_dispatches: int = 10_000, n_queues: int = 4, n_symbols: int = 16, seed: int = 0):
+        self.n_dispatches = n_dispatches
+        self.n_queues = n_queues
+        self.n_symbols = n_symbols
+        self.seed = seed
+        self._run_ids = itertools.count()
+
+    def fingerprint(self):
+        return {
+            "backend": self.name,
+            "n_dispatches": self.n_dispatches,
+            "n_queues": self.n_queues,
+            "n_symbols": self.n_symbols,
+            "seed": self.seed,
+        }
+
+    def dispatches(self) -> dict:
+        """Columnar dispatch trace: ids 1..n ordered by issue, per-queue back-to-back with small gaps."""
+        rng = np.random.default_rng(self.seed)
+        n = self.n_dispatches
+
+        queue = rng.integers(0, self.n_queues, n)
+        # Symbol 1 is a runtime fill kernel; workload kernels follow
+        symbol = rng.integers(1, self.n_symbols + 1, n)
+        symbol_ns = rng.integers(1_000, 100_000, self.n_symbols + 1)
+        duration = (symbol_ns[symbol] * rng.uniform(0.9, 1.1, n)).astype(np.int64)
+        gap = rng.integers(0, 2_000, n)
+
+        start = np.zeros(n, dtype=np.int64)
+        for q in range(self.n_queues):
+            on_queue = np.flatnonzero(queue == q)
+            span = np.cumsum(gap[on_queue] + duration[on_queue])
+            start[on_queue] = span - duration[on_queue]
+
+        grid = 256 * rng.integers(1, 1024, self.n_symbols + 1)
+        return {
+            "id": np.arange(1, n + 1),
+            "kernel_id": symbol,
+            "queue_id": queue + 1,
+            "start": start,
+            "end": start + duration,
+            "grid_x": grid[symbol],
+        }
+
+    def symbol_names(self) -> List[str]:
+        """Display name per symbol id (index 0 unused)."""
+        return ["", "__amd_rocclr_fillBuffer"] + [f"kernel_{sid:03d}()" for sid in range(2, self.n_symbols + 1)]
+
+    def _filtered(self, trace: dict, kernel_filter: Optional[KernelFilter]) -> dict:
+        if kernel_filter is None:
+            return trace
+        names = self.symbol_names()
+        symbol_ok = np.array([kernel_filter.matches(name) for name in names])
+        keep = symbol_ok[trace["kernel_id"]]
+
+        if kernel_filter.dispatch_range is not None:
+            # 1-based dispatch number of each dispatch among its kernel's dispatches
+            order = np.lexsort((trace["id"], trace["kernel_id"]))
+            kernel_sorted = trace["kernel_id"][order]
+            group_start = np.searchsorted(kernel_sorted, kernel_sorted, side="left")
+            iteration = np.empty(len(order), dtype=np.int64)
+            iteration[order] = np.arange(len(order)) - group_start + 1
+            first, last = kernel_filter.dispatch_range
+            keep &= (iteration >= first) & (iteration <= last)
+
+        return {k: v[keep] for k, v in trace.items()}
+
+    def _write_trace(self, conn, trace: dict, with_events: bool):
+        conn.executescript(
+            """
+            CREATE TABLE rocpd_info_agent (id INTEGER PRIMARY KEY, name TEXT, extdata TEXT);
+            CREATE TABLE rocpd_info_kernel_symbol_synthetic (
+                id INTEGER PRIMARY KEY, kernel_name TEXT, display_name TEXT,
+                arch_vgpr_count INTEGER, sgpr_count INTEGER, group_segment_size INTEGER
+            );
+            CREATE TABLE rocpd_kernel_dispatch_synthetic (
+                id INTEGER PRIMARY KEY, event_id INTEGER, kernel_id INTEGER, agent_id INTEGER,
+                queue_id INTEGER, start BIGINT, end BIGINT,
+                workgroup_size_x INTEGER, workgroup_size_y INTEGER, workgroup_size_z INTEGER,
+                grid_size_x INTEGER, grid_size_y INTEGER, grid_size_z INTEGER
+            );
+            CREATE VIEW kernels AS
+                SELECT d.id, d.kernel_id, d.agent_id, d.queue_id, d.start, d.end, s.display_name AS name
+                FROM rocpd_kernel_dispatch_synthetic d
+                LEFT JOIN rocpd_info_kernel_symbol_synthetic s ON s.id = d.kernel_id;
+            """
+        )
+        conn.execute(
+            "INSERT INTO rocpd_info_agent VALUES (1, 'gfx942', ?);", (json.dumps(_SYNTHETIC_AGENT),)
+        )
+        names = self.symbol_names()
+        conn.executemany(
+            "INSERT INTO rocpd_info_kernel_symbol_synthetic VALUES (?, ?, ?, ?, 24, ?);",
+            [(1, "_Z22__amd_rocclr_fillBufferv", names[1], 16, 0)]
+            + [
+                (sid, f"_Z9kernel_{sid:03d}v", names[sid], 32 + 8 * (sid % 8), 1024 * (sid % 4))
+                for sid in range(2, self.n_symbols + 1)
+            ],
+        )
+        event_id = trace["id"] + 1_000_000 if with_events else np.full(len(trace["id"]), None)
+        conn.executemany(
+            "INSERT INTO rocpd_kernel_dispatch_synthetic VALUES (?, ?, ?, 1, ?, ?, ?, 256, 1, 1, ?, 1, 1);",
+            zip(
+                trace["id"].tolist(),
+                event_id.tolist(),
+                trace["kernel_id"].tolist(),
+                trace["queue_id"].tolist(),
+                trace["start"].tolist(),
+                trace["end"].tolist(),
+                trace["grid_x"].tolist(),
+            ),
+        )
+
+    def _new_db(self, output_dir: str):
+        path = _run_dir(output_dir, self._run_ids) / "synthetic_results.db"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+        return sqlite3.connect(str(path))
+
+    def kernel_trace(self, cmd, output_dir, full_trace=False, debug=False):
+        conn = self._new_db(output_dir)
+        with conn:
+            self._write_trace(conn, self.dispatches(), with_events=False)
+        conn.close()
+
+    def counters(self, cmd, metrics, output_dir, debug=False, kernel_filter=None):
+        trace = self.dispatches()
+        rng = np.random.default_rng(self.seed + 1)
+        trace = self._filtered(trace, kernel_filter)
+        duration = (trace["end"] - trace["start"]).astype(np.float64)
+
+        conn = self._new_db(output_dir)
+        with conn:
+            self._write_trace(conn, trace, with_events=True)
+            conn.executescript(
+                """
+                CREATE TABLE rocpd_info_pmc_synthetic (id INTEGER PRIMARY KEY, name TEXT);
+                CREATE TABLE rocpd_pmc_event_synthetic (
+                    id INTEGER PRIMARY KEY, event_id INTEGER, pmc_id INTEGER, value REAL
+                );
+                """
+            )
+            conn.executemany(
+                "INSERT INTO rocpd_info_pmc_synthetic VALUES (?, ?);", list(enumerate(metrics, start=1))
+            )
+            events = (trace["id"] + 1_000_000).tolist()
+            for pmc_id, _ in enumerate(metrics, start=1):
+                # Counts scale with dispatch duration at a per-counter rate
+                values = np.round(duration * rng.uniform(0.1, 10.0)).tolist()
+                conn.executemany(
+                    "INSERT INTO rocpd_pmc_event_synthetic (event_id, pmc_id, value) VALUES (?, ?, ?);",
+                    zip(events, [pmc_id] * len(events), values),
+                )
+        conn.close()
+
+    def att(self, cmd, workdir, debug=False, kernel_filter=None):
+        rng = np.random.default_rng(self.seed + 2)
+        dispatch_dir = Path(workdir) / "ui_output_agent_synthetic_dispatch_1"
+        dispatch_dir.mkdir(parents=True, exist_ok=True)
+
+        code = []
+        n_waves = max(1, len(self._filtered(self.dispatches(), kernel_filter)["id"]) // 100)
+        for i, (isa, share) in enumerate(_SYNTHETIC_ISA):
+            hits = int(share * n_waves * 1000)
+            latency = hits * int(rng.integers(4, 64))
+            stall = int(latency * rng.uniform(0.0, 1.5)) if isa.startswith(("global_", "s_waitcnt")) else 0
+            idle = int(latency * rng.uniform(0.0, 0.2))
+            code.append([isa, 0, i + 1, f"synthetic.cpp:{10 + i}", 0, 0x1000 + 8 * i, hits, latency, stall, idle])
+
+        (dispatch_dir / "code.json").write_text(json.dumps({"code": code}))
+        os.utime(dispatch_dir)
+
+
+_backend: Optional[ProfilerBackend] = None
+
+# $ROCM_PERF_LAB_BACKEND value -> backend parsed from it
+_env_backends: Dict[str, ProfilerBackend] = {}
+_env_backends_lock = threading.Lock()
+
+
+def parse_backend(spec: str) -> ProfilerBackend:
+    """
+    Backend from a spec string: "rocprofv3", "recorded:<dir>" or
+    "synthetic[:<dispatches>[:<queues>[:<symbols>[:<seed>]]]]".
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "rocprofv3":
+        return Rocprofv3Backend()
+    if kind == "recorded":
+        return RecordedBackend(arg)
+    if kind == "synthetic":
+        return SyntheticBackend(*(int(a) for a in arg.split(":") if a))
+    raise ValueError(f"Unknown profiler backend: {spec}")
+
+
+def get_backend() -> ProfilerBackend:
+    """The backend set by set_backend, else from $ROCM_PERF_LAB_BACKEND, else rocprofv3."""
+    if _backend is not None:
+        return _backend
+    spec = os.environ.get("ROCM_PERF_LAB_BACKEND", "rocprofv3")
+    with _env_backends_lock:
+        if spec not in _env_backends:
+            _env_backends[spec] = parse_backend(spec)
+        return _env_backends[spec]
+
+
+def set_backend(backend: Optional[ProfilerBackend]):
+    """Use backend for every profiler run in this process (None restores the default)."""
+    global _backend
+    _backend = backend
@@ -0,0 +1,247 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from rocm_perf_lab.hal.factory import build_arch_from_agent_metadata
+from rocm_perf_lab.profiler.backends import KernelFilter
+from rocm_perf_lab.profiler.counter_planner import plan_counter_passes
+from rocm_perf_lab.profiler.profile_cache import gpu_fingerprint
+from rocm_perf_lab.profiler.workspace import RunWorkspace
+
+
+# Stand-in hardware figures for planning before any run reports the agent
+_PLANNING_AGENT = {
+    "cu_count": 1,
+    "simd_per_cu": 4,
+    "max_waves_per_cu": 32,
+    "wave_size": 64,
+    "max_clock_mhz": 0.0,
+}
+
+# Dispatches of the target kernel traced by the ATT pass
+_ATT_DISPATCH_RANGE = (1, 1)
+
+
+@dataclass
+class CollectionPass:
+    """One kind of app launch under the profiler, repeated `launches` times."""
+
+    kind: str
+    launches: int
+    consumers: List[str]
+    counters: List[str] = field(default_factory=list)
+    # Dispatches instrumented, resolved when the pass runs
+    scope: str = "all kernels"
+
+
+@dataclass
+class CollectionPlan:
+    """
+    The launches a profile needs. Every analysis reads from one of these
+    passes; none launches the app on its own.
+    """
+
+    runs: int
+    roofline: bool
+    critical_path: bool
+    att: bool
+    passes: List[CollectionPass]
+    # Counter passes cannot be planned until the architecture is known
+    counters_planned: bool = True
+    roofline_all_kernels: bool = True
+    # Architecture the counter passes were planned for
+    arch_name: Optional[str] = None
+    # Top-K paths and speedup ceiling on top of the critical path
+    path_analysis: bool = False
+
+    @property
+    def launches(self) -> int:
+        return sum(p.launches for p in self.passes)
+
+    def counter_passes(self, arch) -> List[List[str]]:
+        """
+        PMC groups to run on the traced arch: the planned ones when they were
+        planned for it, else planned now the same way plan_collection would.
+        """
+        if self.counters_planned and self.arch_name == arch.arch_name:
+            return [p.counters for p in self.passes if p.kind == "pmc"]
+        return roofline_counter_passes(arch)
+
+    def describe(self) -> str:
+        lines = []
+        for p in self.passes:
+            line = f"  {p.kind:<13} x{p.launches}  {p.scope:<28} -> {', '.join(p.consumers)}"
+            if p.counters:
+                line += f"  [{' '.join(p.counters)}]"
+            lines.append(line)
+        if not self.counters_planned:
+            lines.append(f"  {'pmc':<13} x?  {'':<28} -> roofline  (planned once the first trace reports the GPU)")
+
+        total = f"{self.launches}" + ("+" if not self.counters_planned else "")
+        return "\n".join([f"Collection plan: {total} app launches"] + lines)
+
+
+def local_arch_name() -> Optional[str]:
+    """gfx name of the first GPU in the KFD topology (90402 -> gfx942), None without one."""
+    targets = gpu_fingerprint()["gfx_targets"]
+    if not targets:
+        return None
+    version = int(targets[0])
+    major, minor, stepping = version // 10000, (version // 100) % 100, version % 100
+    return f"gfx{major}{minor}{stepping:x}"
+
+
+def _planning_arch(arch_name: Optional[str]):
+    if arch_name is None:
+        return None
+    try:
+        return build_arch_from_agent_metadata({"arch_name": arch_name, **_PLANNING_AGENT})
+    except ValueError:
+        return None
+
+
+def roofline_counter_passes(arch) -> List[List[str]]:
+    """Fewest PMC groups covering the roofline counters on arch."""
+    from rocm_perf_lab.analysis.roofline import roofline_counters
+
+    return plan_counter_passes(roofline_counters(arch), arch.counter_block_limits)
+
+
+def plan_collection(
+    runs: int = 3,
+    roofline: bool = False,
+    critical_path: bool = False,
+    att: bool = False,
+    arch=None,
+    roofline_all_kernels: bool = True,
+    path_analysis: bool = False,
+) -> CollectionPlan:
+    """
+    Minimal set of app launches for the requested analyses:
+
+      - `runs` kernel traces for timing statistics. Only the last one adds
+        the HSA trace critical-path analysis reads, and only it is
+        persisted; the others stay lightweight. Tracing overhead keeps the
+        full trace out of the timing sample unless it is the only run.
+      - The fewest PMC passes covering the roofline counters (see
+        plan_counter_passes), over every kernel unless roofline_all_kernels
+        is False. These need the architecture, taken from arch or from the
+        local GPU when not given.
+      - With path_analysis, the full trace also feeds top-K paths and the
+        what-if speedup ceiling; both are skipped by default.
+      - One ATT pass over a single dispatch of the dominant kernel (the
+        critical path's, else the profiled kernel).
+    """
+    passes = []
+    consumers = ["timing", "kernel selection"]
+    if critical_path:
+        if runs > 1:
+            passes.append(CollectionPass("kernel-trace", runs - 1, list(consumers)))
+            consumers = ["kernel selection"]
+        consumers = consumers + ["critical path"]
+        if path_analysis:
+            consumers += ["top-K paths", "what-if"]
+        passes.append(CollectionPass("full-trace", 1, consumers))
+    else:
+        passes.append(CollectionPass("kernel-trace", runs, consumers))
+
+    counters_planned = True
+    if roofline:
+        arch = arch or _planning_arch(local_arch_name())
+        if arch is None:
+            counters_planned = False
+        else:
+            scope = "all kernels" if roofline_all_kernels else "profiled kernel"
+            for group in roofline_counter_passes(arch):
+                passes.append(CollectionPass("pmc", 1, ["roofline"], group, scope))
+
+    if att:
+        target = "critical-path dominant kernel" if critical_path else "profiled kernel"
+        first, last = _ATT_DISPATCH_RANGE
+        scope = f"{target}, dispatch {first}" if first == last else f"{target}, dispatches {first}-{last}"
+        passes.append(CollectionPass("att", 1, ["instruction mix", "stalls", "bottleneck"], scope=scope))
+
+    return CollectionPlan(
+        runs=runs,
+        roofline=roofline,
+        critical_path=critical_path,
+        att=att,
+        passes=passes,
+        counters_planned=counters_planned,
+        roofline_all_kernels=roofline_all_kernels,
+        arch_name=arch.arch_name if roofline and arch is not None else None,
+        path_analysis=critical_path and path_analysis,
+    )
+
+
+def run_collection(
+    cmd: str,
+    plan: CollectionPlan,
+    clock_mhz: Optional[float] = None,
+    debug: bool = False,
+    memory_bandwidth_gbps: Optional[float] = None,
+    use_cache: bool = False,
+    refresh: bool = False,
+) -> dict:
+    """
+    Run the plan's passes once each and feed every analysis from them. Returns
+    the base profile, extended with critical-path and ATT results when the
+    plan includes them. The planned PMC groups run as planned unless the
+    traced GPU differs from the one they were planned for. Persisted output of all passes goes to one
+    RunWorkspace. use_cache opts in to the profile cache (see build_profile).
+    """
+    from rocm_perf_lab.profiler.att_runner import run_att
+    from rocm_perf_lab.profiler.extended_pipeline import build_extended_profile
+    from rocm_perf_lab.profiler.pipeline import build_profile
+
+    if debug:
+        print(plan.describe())
+
+    workspace = RunWorkspace(cmd=cmd)
+
+    profile = build_profile(
+        cmd=cmd,
+        runs=plan.runs,
+        use_rocprof=True,
+        clock_mhz=clock_mhz,
+        debug=debug,
+        roofline=plan.roofline,
+        memory_bandwidth_gbps=memory_bandwidth_gbps,
+        persist_rocpd=plan.critical_path,
+        use_cache=use_cache,
+        refresh=refresh,
+        roofline_all_kernels=plan.roofline_all_kernels,
+        workspace=workspace,
+        plan=plan,
+    )
+
+    if not (plan.critical_path or plan.att):
+        return profile
+
+    extended = profile
+    target = profile["kernel"]["name"]
+
+    if plan.critical_path:
+        rocpd_db_paths = profile.get("rocpd_db_paths")
+        if not rocpd_db_paths:
+            print("Warning: rocpd database not found. Critical path analysis skipped.")
+        extended = build_extended_profile(
+            base_profile=profile, rocpd_db_paths=rocpd_db_paths, use_cache=use_cache, refresh=refresh,
+            path_analysis=plan.path_analysis,
+        )
+        target = extended.get("critical_path", {}).get("dominant_symbol") or target
+
+    if not plan.att:
+        return extended
+
+    # ATT only on the kernel worth tuning, once the critical path names it
+    kernel_filter = KernelFilter.for_kernel(target, _ATT_DISPATCH_RANGE) if target else None
+    att_dir = run_att(cmd, workspace, use_cache=use_cache, refresh=refresh, kernel_filter=kernel_filter)
+
+    # Critical-path results carry over from `extended`; only ATT is added
+    return build_extended_profile(
+        base_profile=extended,
+        att_dispatch_dir=Path(att_dir),
+        use_cache=use_cache,
+        refresh=refresh,
+    )
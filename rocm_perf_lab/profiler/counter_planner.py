@@ -0,0 +1,41 @@
+import math
+import re
+from typing import Dict, List
+
+
+# Counter name prefixes that sample through another block
+_BLOCK_ALIASES = {"SQC": "SQ"}
+
+
+def counter_block(counter: str) -> str:
+    """PMC block a counter is read from: SQ_INSTS_VALU -> SQ, TCC_HIT[3] -> TCC."""
+    block = re.split(r"[_\[]", counter, maxsplit=1)[0]
+    return _BLOCK_ALIASES.get(block, block)
+
+
+def plan_counter_passes(counters: List[str], block_limits: Dict[str, int]) -> List[List[str]]:
+    """
+    Group counters into the fewest rocprofv3 --pmc passes.
+
+    Blocks are sampled independently, so the minimum is the largest
+    ceil(counters in block / block limit) over all blocks. Pass i takes the
+    i-th slice of every block's counters, which reaches that bound. Counters
+    of blocks missing from block_limits get one slot per pass. Order within
+    a block follows `counters`.
+    """
+    by_block: Dict[str, List[str]] = {}
+    for counter in dict.fromkeys(counters):
+        by_block.setdefault(counter_block(counter), []).append(counter)
+
+    if not by_block:
+        return []
+
+    limits = {block: max(1, block_limits.get(block, 1)) for block in by_block}
+    n_passes = max(math.ceil(len(group) / limits[block]) for block, group in by_block.items())
+
+    passes: List[List[str]] = [[] for _ in range(n_passes)]
+    for block, group in by_block.items():
+        limit = limits[block]
+        for i in range(0, len(group), limit):
+            passes[i // limit].extend(group[i:i + limit])
+    return passes
@@ -1,26 +1,131 @@
+import sqlite3
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from rocm_perf_lab.profiler.pipeline import build_profile
-from rocm_perf_lab.analysis.critical_path import analyze_critical_path
-from rocm_perf_lab.analysis.att_analysis import analyze_att
+from rocm_perf_lab.profiler.profile_cache import default_profile_cache, profile_key
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery, connect_readonly
+from rocm_perf_lab.analysis.critical_path import build_dispatch_levels, critical_path_from_table, read_dispatch_table
+from rocm_perf_lab.analysis.multi_process import merge_process_traces
+from rocm_perf_lab.analysis.slack import slack_from_table
+from rocm_perf_lab.analysis.top_k_paths import top_k_paths_from_table
+from rocm_perf_lab.analysis.what_if import speedup_ceiling
+from rocm_perf_lab.analysis.att_analysis import analyze_att_dispatches
+from rocm_perf_lab.analysis.att_hotspots import build_hotspot_index
 from rocm_perf_lab.analysis.bottleneck_classifier import classify_bottleneck
 
 
+# Longest paths whose common kernels are reported as shared_symbols
+_TOP_K_PATHS = 3
+
+# Entries per ranking in the ATT hotspot index carried by the profile
+_HOTSPOT_TOP_K = 10
+
 
 def build_extended_profile(
     base_profile: dict,
     rocpd_db_path: Optional[Path] = None,
     att_dispatch_dir: Optional[Path] = None,
+    rocpd_db_paths: Optional[List[Path]] = None,
+    use_cache: bool = False,
+    refresh: bool = False,
+    path_analysis: bool = False,
 ):
     """
     Augment an already-built base_profile with:
-      - Critical path analysis (if rocpd_db_path provided)
-      - ATT deep analysis (if att_dispatch_dir provided)
+      - Critical path and slack analysis (if rocpd_db_path provided; with
+        several rocpd_db_paths, one per process, over the merged trace), plus
+        trace-wide GPU time per symbol and idle time per queue. With
+        path_analysis, also the top-K longest paths and the dominant
+        symbol's speedup ceiling, which cost more than the critical path
+        itself on large traces
+      - ATT deep analysis (if att_dispatch_dir provided: one dispatch dir, or
+        run_att's output dir, whose dispatches are analyzed in parallel and
+        combined, with per-dispatch results under att.per_dispatch and the
+        instruction / loop / source-line hotspot index under att.hotspots)
       - Bottleneck classification
       - Headroom estimation
+
+    With use_cache, results are cached by base_profile and the content of
+    the input DBs and ATT output (see build_profile for use_cache and
+    refresh).
     """
+    db_paths = [Path(p) for p in rocpd_db_paths or [] if Path(p).exists()]
+    if not db_paths and rocpd_db_path is not None and rocpd_db_path.exists():
+        db_paths = [rocpd_db_path]
+    if att_dispatch_dir is not None and not att_dispatch_dir.exists():
+        att_dispatch_dir = None
+
+    cache = default_profile_cache() if use_cache else None
+    if cache is None:
+        return _build_extended_profile(base_profile, db_paths, att_dispatch_dir, path_analysis)
+
+    # Where the inputs live does not change the analysis
+    base = {k: v for k, v in base_profile.items() if k != "rocpd_db_paths"}
+    cache_key = profile_key(
+        "extended",
+        inputs=db_paths + ([att_dispatch_dir] if att_dispatch_dir else []),
+        base_profile=base,
+        att=att_dispatch_dir is not None,
+        path_analysis=path_analysis,
+    )
+    hit = None if refresh else cache.get(cache_key)
+    if hit is not None:
+        return _with_input_paths(hit.result, base_profile, db_paths)
+
+    extended = _build_extended_profile(base_profile, db_paths, att_dispatch_dir, path_analysis)
+    try:
+        cache.put(cache_key, extended)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[CACHE WARNING] Failed to store extended profile: {e}")
+    return extended
+
+
+def _with_input_paths(extended: dict, base_profile: dict, db_paths: List[Path]) -> dict:
+    """A cached result with its file paths pointing at this call's inputs."""
+    extended = dict(extended)
+    if "rocpd_db_paths" in base_profile:
+        extended["rocpd_db_paths"] = base_profile["rocpd_db_paths"]
+    if db_paths and "processes" in extended.get("critical_path", {}):
+        extended["critical_path"] = {**extended["critical_path"], "processes": [str(p) for p in db_paths]}
+    return extended
+
 
+def _att_fields(att_result) -> dict:
+    return {
+        "instruction_mix": att_result.instruction_mix,
+        "stall_fraction": att_result.stall_fraction,
+        "idle_fraction": att_result.idle_fraction,
+        "avg_memory_latency": att_result.avg_memory_latency,
+        "ipc": att_result.ipc,
+        "memory_latency": att_result.memory_latency,
+        "stall_breakdown": att_result.stall_breakdown,
+    }
+
+
+def _trace_aggregates(db_paths: List[Path]):
+    """
+    GPU time per kernel symbol (largest first) and idle time per queue, over
+    the whole trace, aggregated inside SQLite. Queues of several processes
+    are keyed "<process index>:<queue id>".
+    """
+    symbol_ns = {}
+    queue_idle_ns = {}
+    for i, db in enumerate(db_paths):
+        conn = connect_readonly(str(db))
+        try:
+            query = DispatchQuery(conn)
+            for name, (_, total_ns) in query.symbol_totals().items():
+                symbol_ns[name] = symbol_ns.get(name, 0) + total_ns
+            for queue, stats in query.queue_gap_stats().items():
+                queue_idle_ns[str(queue) if len(db_paths) == 1 else f"{i}:{queue}"] = stats["idle_ns"]
+        finally:
+            conn.close()
+    return dict(sorted(symbol_ns.items(), key=lambda kv: -kv[1])), queue_idle_ns
+
+
+def _build_extended_profile(base_profile: dict, db_paths: List[Path], att_dispatch_dir: Optional[Path],
+                            path_analysis: bool = False):
     extended = dict(base_profile)
 
     critical_result = None
@@ -31,33 +136,70 @@ def build_extended_profile(
     # ----------------------------
     # Critical Path
     # ----------------------------
-    if rocpd_db_path is not None and rocpd_db_path.exists():
-        critical_result = analyze_critical_path(str(rocpd_db_path))
+    if db_paths:
+        merged = None
+        if len(db_paths) > 1:
+            merged = merge_process_traces([str(p) for p in db_paths])
+            dispatch_table = merged.table
+        else:
+            dispatch_table = read_dispatch_table(str(db_paths[0]))
+
+        # One DAG and level plan shared by every analysis below
+        levels = build_dispatch_levels(dispatch_table)
+        critical_result = critical_path_from_table(dispatch_table, levels=levels)
+        slack_result = slack_from_table(dispatch_table, levels=levels)
+        symbol_time_ns, queue_idle_ns = _trace_aggregates(db_paths)
 
         extended["critical_path"] = {
             "critical_path_ns": critical_result.critical_path_ns,
             "dominant_symbol": critical_result.dominant_symbol_name,
             "fraction": critical_result.dominant_symbol_fraction,
+            "symbol_slack": slack_result.symbol_slack,
+            "zero_gain_symbols": slack_result.zero_gain_symbols(),
+            "symbol_time_ns": symbol_time_ns,
+            "queue_idle_ns": queue_idle_ns,
         }
 
+        if path_analysis:
+            top_paths = top_k_paths_from_table(dispatch_table, k=_TOP_K_PATHS, levels=levels)
+            extended["critical_path"]["top_path_lengths_ns"] = top_paths.lengths_ns
+            extended["critical_path"]["shared_symbols"] = top_paths.shared_symbols
+            extended["critical_path"]["speedup_ceiling"] = (
+                speedup_ceiling(
+                    dispatch_table, critical_result.dominant_symbol_name, levels=levels,
+                    baseline_makespan_ns=critical_result.critical_path_ns,
+                )
+                if critical_result.dominant_symbol_name is not None
+                else 1.0
+            )
+
+        if merged is not None:
+            extended["critical_path"]["processes"] = merged.db_paths
+            extended["critical_path"]["clock_offsets_ns"] = merged.clock_offsets_ns
+
     # ----------------------------
     # ATT Deep Analysis
     # ----------------------------
-    if att_dispatch_dir is not None and att_dispatch_dir.exists():
+    if att_dispatch_dir is not None:
         try:
-            att_result = analyze_att(att_dispatch_dir)
-
+            att_run = analyze_att_dispatches(att_dispatch_dir)
             extended["att"] = {
-                "instruction_mix": att_result.instruction_mix,
-                "stall_fraction": att_result.stall_fraction,
-                "idle_fraction": att_result.idle_fraction,
-                "avg_memory_latency": att_result.avg_memory_latency,
-                "ipc": att_result.ipc,
+                **_att_fields(att_run.combined),
+                "per_dispatch": {name: _att_fields(r) for name, r in att_run.per_dispatch.items()},
             }
+            att_result = att_run.combined
         except Exception as e:
             print(f"[ATT WARNING] ATT analysis failed: {e}")
             extended["att"] = {}
 
+        # Hotspots are optional detail: without them the ATT summary still stands
+        if att_result is not None:
+            try:
+                extended["att"]["hotspots"] = build_hotspot_index(att_dispatch_dir, top_k=_HOTSPOT_TOP_K).to_dict()
+            except Exception as e:
+                print(f"[ATT WARNING] Hotspot index failed: {e}")
+                extended["att"]["hotspots"] = {}
+
     # ----------------------------
     # Bottleneck + Headroom
     # ----------------------------
@@ -71,6 +213,8 @@ def build_extended_profile(
             instruction_mix=att_result.instruction_mix,
             roofline_bound=roofline_bound,
             avg_memory_latency=att_result.avg_memory_latency,
+            stall_breakdown=att_result.stall_breakdown,
+            memory_latency=att_result.memory_latency,
         )
 
         # Conservative headroom estimate: proportion of stall cycles
@@ -78,6 +222,7 @@ def build_extended_profile(
 
         extended["bottleneck"] = {
             "primary": bottleneck.primary,
+            "secondary": bottleneck.secondary,
             "confidence": bottleneck.confidence,
             "reasoning": bottleneck.reasoning,
         }
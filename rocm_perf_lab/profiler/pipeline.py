@@ -1,7 +1,11 @@
 import json
+import sqlite3
+from pathlib import Path
 from typing import Optional
 from rocm_perf_lab.hal.factory import build_arch_from_agent_metadata
+from .profile_cache import default_profile_cache, profile_key
 from .runner import run_command
+from .workspace import RunWorkspace
 
 
 def classify_cv(cv: float) -> str:
@@ -21,17 +25,101 @@ def build_profile(
     roofline: bool = False,
     memory_bandwidth_gbps: Optional[float] = None,
     persist_rocpd: bool = False,
+    use_cache: bool = False,
+    refresh: bool = False,
+    roofline_all_kernels: bool = True,
+    workspace: Optional[RunWorkspace] = None,
+    plan=None,
 ):
-    output_dir = None
-    if persist_rocpd and use_rocprof:
-        output_dir = ".rocpd_profile"
+    """
+    Profile cmd. Roofline counters are sampled on every kernel, giving each
+    one a roofline entry from the same passes; roofline_all_kernels=False
+    limits them to the profiled kernel.
+
+    With use_cache, results are cached by the content of the executable and
+    its code objects, the libraries it loads, the device environment, the
+    ROCm version and the options below; a matching entry is returned
+    without running anything unless refresh is set. Caching is opt-in (the
+    CLI turns it on): without it the cache is neither read nor written.
+
+    With persist_rocpd the full trace is kept as a pass of workspace (a new
+    RunWorkspace when not given) and listed in rocpd_db_paths.
+
+    A CollectionPlan, when given, supplies the roofline's PMC groups (see
+    CollectionPlan.counter_passes); otherwise they are planned for the
+    traced GPU.
+    """
+    cache = default_profile_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = profile_key(
+            "profile",
+            cmd=cmd,
+            runs=runs,
+            use_rocprof=use_rocprof,
+            clock_mhz=clock_mhz,
+            roofline=roofline,
+            memory_bandwidth_gbps=memory_bandwidth_gbps,
+            persist_rocpd=persist_rocpd,
+            roofline_all_kernels=roofline_all_kernels,
+        )
+        hit = None if refresh else cache.get(cache_key)
+        if hit is not None:
+            return _restore_cached_profile(hit)
+
+    profile_json = _build_profile(
+        cmd, runs, use_rocprof, clock_mhz, debug, roofline, memory_bandwidth_gbps, persist_rocpd,
+        roofline_all_kernels, workspace, plan,
+    )
+
+    if cache is not None:
+        # Results DBs are stored with the entry so cached paths stay valid
+        db_paths = profile_json.get("rocpd_db_paths") or []
+        artifacts = {f"rocpd_{i}_{Path(p).name}": p for i, p in enumerate(db_paths)}
+        stored = dict(profile_json)
+        if db_paths:
+            stored["rocpd_db_paths"] = list(artifacts)
+        try:
+            return _restore_cached_profile(cache.put(cache_key, stored, artifacts))
+        except (OSError, sqlite3.Error) as e:
+            print(f"[CACHE WARNING] Failed to store profile: {e}")
+
+    return profile_json
+
+
+def _restore_cached_profile(entry) -> dict:
+    profile_json = dict(entry.result)
+    if profile_json.get("rocpd_db_paths"):
+        profile_json["rocpd_db_paths"] = [
+            str(entry.artifacts[name]) for name in profile_json["rocpd_db_paths"] if name in entry.artifacts
+        ]
+    return profile_json
+
+
+def _build_profile(
+    cmd: str,
+    runs: int,
+    use_rocprof: bool,
+    clock_mhz: Optional[float],
+    debug: bool,
+    roofline: bool,
+    memory_bandwidth_gbps: Optional[float],
+    persist_rocpd: bool,
+    roofline_all_kernels: bool = True,
+    workspace: Optional[RunWorkspace] = None,
+    plan=None,
+):
+    if not (persist_rocpd and use_rocprof):
+        workspace = None
+    elif workspace is None:
+        workspace = RunWorkspace(cmd=cmd)
 
     result = run_command(
         cmd,
         runs=runs,
         use_rocprof=use_rocprof,
         debug=debug,
-        output_dir=output_dir,
+        workspace=workspace,
     )
 
     rocprof_data = result["rocprof"]
@@ -73,87 +161,38 @@ def build_profile(
             }
 
     roofline_data = None
+    kernel_roofline_rows = None
 
     if roofline and use_rocprof:
         try:
-            from rocm_perf_lab.profiler.rocprof_adapter import run_with_rocprof_counters
-
-            # Architecture-specific roofline handling
-            if arch.arch_name == "gfx942":
-
-                compute_metrics = [
-                    "SQ_INSTS_VALU",
-                    "SQ_INSTS_VALU_MFMA_MOPS_F32",
-                ]
-
-                memory_metrics = [
-                    "TCC_EA0_RDREQ",
-                    "TCC_EA0_WRREQ",
-                    "TCC_EA0_RDREQ_32B",
-                    "TCC_EA0_WRREQ_32B",
-                ]
-
-                compute_values = run_with_rocprof_counters(cmd, compute_metrics, debug=debug)
-                memory_values = run_with_rocprof_counters(cmd, memory_metrics, debug=debug)
-
-                if compute_values and memory_values:
-                    metrics = {**compute_values, **memory_values}
-
-                    valu = metrics.get("SQ_INSTS_VALU", 0.0)
-                    mfma_mops = metrics.get("SQ_INSTS_VALU_MFMA_MOPS_F32", 0.0)
-
-                    # VALU instructions approximate scalar FP32 ops
-                    # MFMA MOPS represent 512 FLOPs each
-                    flops = valu * arch.fp32_valu_width + mfma_mops * 512.0
-
-                    rd = metrics.get("TCC_EA0_RDREQ", 0.0)
-                    wr = metrics.get("TCC_EA0_WRREQ", 0.0)
-                    rd32 = metrics.get("TCC_EA0_RDREQ_32B", 0.0)
-                    wr32 = metrics.get("TCC_EA0_WRREQ_32B", 0.0)
-
-                    # Assume remaining requests are 64B
-                    rd64 = max(rd - rd32, 0.0)
-                    wr64 = max(wr - wr32, 0.0)
+            from rocm_perf_lab.analysis.roofline import kernel_roofline
+            from rocm_perf_lab.profiler.backends import KernelFilter
+            from rocm_perf_lab.profiler.collection_planner import roofline_counter_passes
+            from rocm_perf_lab.profiler.rocprof_adapter import run_planned_counter_passes
+
+            # Counters attributed per dispatch; each sampled kernel gets its
+            # own roofline entry and the profiled kernel's entry is the
+            # headline point. Unless every kernel is wanted, only the
+            # profiled kernel's dispatches are instrumented.
+            kernel_filter = None if roofline_all_kernels else KernelFilter.for_kernel(rocprof_data.kernel_name)
+            passes = plan.counter_passes(arch) if plan is not None else roofline_counter_passes(arch)
+            counters = run_planned_counter_passes(
+                cmd, passes, debug=debug, per_dispatch=True, kernel_filter=kernel_filter,
+            )
 
-                    bytes_moved = rd32 * 32.0 + rd64 * 64.0 + wr32 * 32.0 + wr64 * 64.0
+            if counters is not None and len(counters):
+                table = kernel_roofline(counters, arch, memory_bandwidth_gbps)
+                kernel_roofline_rows = table.rows()
 
+                if counters.is_whole_app:
+                    # No per-dispatch attribution: the app-wide point is all there is
+                    selected = 0
                 else:
-                    flops = 0.0
-                    bytes_moved = 0.0
-            else:
-                # Generic fallback: use raw VALU instruction count as FLOP proxy
-                metrics = ["SQ_INSTS_VALU"]
-                metric_values = run_with_rocprof_counters(cmd, metrics, debug=debug)
-
-                if metric_values:
-                    flops = metric_values.get("SQ_INSTS_VALU", 0.0)
-                else:
-                    flops = 0.0
-
-                bytes_moved = 0.0
-
-            runtime_s = result["mean_ms"] / 1000.0
-            achieved_gflops = flops / runtime_s / 1e9 if runtime_s > 0 else 0.0
-            achieved_bandwidth = bytes_moved / runtime_s / 1e9 if runtime_s > 0 else 0.0
-
-            ai = flops / bytes_moved if bytes_moved > 0 else 0.0
-
-            peak_compute = arch.peak_fp32_flops() / 1e9
-            peak_bandwidth = memory_bandwidth_gbps or arch.theoretical_peak_bandwidth()
-
-            bound = "compute"
-            if peak_compute and peak_bandwidth and bytes_moved > 0:
-                if peak_bandwidth * ai < peak_compute:
-                    bound = "memory"
-
-            roofline_data = {
-                "flops": flops,
-                "bytes": bytes_moved,
-                "arithmetic_intensity": ai,
-                "achieved_gflops": achieved_gflops,
-                "achieved_bandwidth_gbps": achieved_bandwidth,
-                "bound": bound,
-            }
+                    selected = table.find(rocprof_data.kernel_name, rocprof_data.grid, rocprof_data.block)
+                    if selected is None:
+                        selected = table.find(rocprof_data.kernel_name)
+                if selected is not None:
+                    roofline_data = table.point(selected)
         except Exception as e:
             print(f"[ROOFLINE ERROR] {e}")
             roofline_data = None
@@ -163,14 +202,14 @@ def build_profile(
     # ------------------------------------------------------------------
     runtime_ms = result["mean_ms"]
 
-    if persist_rocpd and output_dir:
+    if workspace is not None:
         try:
-            import glob, sqlite3, os
+            from rocm_perf_lab.profiler.rocpd_query import connect_readonly
 
-            db_files = glob.glob(os.path.join(output_dir, "**/*_results.db"), recursive=True)
+            # The full trace's DBs, as recorded in this run's manifest
+            db_files = workspace.outputs("full-trace")
             if db_files:
-                latest_db = max(db_files, key=os.path.getmtime)
-                conn = sqlite3.connect(latest_db)
+                conn = connect_readonly(str(db_files[0]))
                 cur = conn.cursor()
 
                 # ROCm 7.x schema: kernels table uses start/end (nanoseconds)
@@ -209,6 +248,12 @@ def build_profile(
         "roofline": roofline_data,
     }
 
+    if kernel_roofline_rows is not None:
+        profile_json["kernel_roofline"] = kernel_roofline_rows
+
+    if rocprof_data.db_paths:
+        profile_json["rocpd_db_paths"] = rocprof_data.db_paths
+
     peak = arch.peak_fp32_flops()
     profile_json["gpu"]["theoretical_peak_flops"] = peak
 
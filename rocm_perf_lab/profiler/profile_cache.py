@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from rocm_perf_lab import __version__
+from rocm_perf_lab.profiler.backends import get_backend
+from rocm_perf_lab.profiler.symbol_cache import default_cache_dir
+
+
+# Bytes of cached results and artifacts kept before the least recently used are evicted
+DEFAULT_MAX_BYTES = 4 << 30
+
+# Seconds a writer waits on another process's transaction
+_BUSY_TIMEOUT_S = 30.0
+
+# Environment that changes what a profile measures
+_KEY_ENV_VARS = (
+    "HIP_VISIBLE_DEVICES",
+    "ROCR_VISIBLE_DEVICES",
+    "CUDA_VISIBLE_DEVICES",
+    "GPU_DEVICE_ORDINAL",
+    "HSA_OVERRIDE_GFX_VERSION",
+    "HSA_XNACK",
+    "HIP_LAUNCH_BLOCKING",
+    "AMD_SERIALIZE_KERNEL",
+    "LD_LIBRARY_PATH",
+)
+
+# Files next to the executable that may be loaded as code objects at run time
+_CODE_OBJECT_SUFFIXES = (".hsaco", ".co", ".so")
+
+_DRM_ROOT = Path("/sys/class/drm")
+_KFD_NODES = Path("/sys/class/kfd/kfd/topology/nodes")
+
+# ROCm install whose version file is read when $ROCM_PATH is unset
+_DEFAULT_ROCM_PATH = "/opt/rocm"
+
+# (path, size, mtime_ns) -> digest, so a run hashes each input once
+_DIGESTS: Dict[tuple, str] = {}
+
+# (executable, size, mtime_ns, LD_LIBRARY_PATH) -> resolved shared libraries
+_CLOSURES: Dict[tuple, List[Path]] = {}
+
+
+def file_digest(path) -> str:
+    path = Path(path)
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    if memo_key not in _DIGESTS:
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _DIGESTS[memo_key] = h.hexdigest()
+    return _DIGESTS[memo_key]
+
+
+def tree_digest(path) -> str:
+    """
+    Digest of a file, or of every file under a directory (names and
+    contents). Hidden files are skipped: they hold data derived from the
+    others (e.g. ATT decode sidecars) or are partially written.
+    """
+    path = Path(path)
+    if path.is_file():
+        return file_digest(path)
+
+    h = hashlib.blake2b(digest_size=20)
+    files = (q for q in path.rglob("*") if q.is_file())
+    for p in sorted(q for q in files if not any(part.startswith(".") for part in q.relative_to(path).parts)):
+        h.update(p.relative_to(path).as_posix().encode())
+        h.update(file_digest(p).encode())
+    return h.hexdigest()
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def gpu_fingerprint() -> dict:
+    """
+    GPU state a profile depends on, read from sysfs without launching
+    anything: each KFD node's gfx target and each card's forced performance
+    level. Under "manual" the pinned clocks (the active sclk/mclk level and
+    the overdrive ranges) are added; in automatic levels the active DPM
+    level only reflects load at the moment of reading, so it is left out.
+    Empty on hosts without amdgpu.
+    """
+    targets = []
+    if _KFD_NODES.is_dir():
+        for node in sorted(_KFD_NODES.iterdir()):
+            for line in (_read_text(node / "properties") or "").splitlines():
+                if line.startswith("gfx_target_version"):
+                    targets.append(line.split()[-1])
+
+    clocks = {}
+    if _DRM_ROOT.is_dir():
+        for card in sorted(_DRM_ROOT.glob("card[0-9]*")):
+            device = card / "device"
+            level = _read_text(device / "power_dpm_force_performance_level")
+            if not level:
+                continue
+            state = {"performance_level": level}
+            if level == "manual":
+                for name in ("pp_dpm_sclk", "pp_dpm_mclk"):
+                    # The forced level is marked with '*'
+                    levels = _read_text(device / name) or ""
+                    state[name] = [l for l in levels.splitlines() if l.endswith("*")]
+                state["pp_od_clk_voltage"] = _read_text(device / "pp_od_clk_voltage")
+            clocks[card.name] = state
+
+    return {"gfx_targets": [t for t in targets if t != "0"], "clocks": clocks}
+
+
+def rocm_version() -> Optional[str]:
+    """Installed ROCm version from $ROCM_PATH/.info/version, None if absent."""
+    root = Path(os.environ.get("ROCM_PATH") or _DEFAULT_ROCM_PATH)
+    return _read_text(root / ".info" / "version")
+
+
+def _shared_library_closure(exe: Path) -> List[Path]:
+    """
+    Shared libraries the dynamic loader resolves for exe (its DT_NEEDED
+    closure, as ldd reports it under the current LD_LIBRARY_PATH). Empty
+    for scripts, static binaries or without ldd.
+    """
+    st = exe.stat()
+    memo_key = (str(exe), st.st_size, st.st_mtime_ns, os.environ.get("LD_LIBRARY_PATH"))
+    if memo_key not in _CLOSURES:
+        try:
+            out = subprocess.run(["ldd", str(exe)], capture_output=True, text=True, timeout=30).stdout
+        except (OSError, subprocess.SubprocessError):
+            out = ""
+        libs = []
+        for line in out.splitlines():
+            # "libfoo.so.1 => /path/libfoo.so.1 (0x...)" or "/lib64/ld-linux.so.2 (0x...)"
+            target = line.split("=>", 1)[-1].split("(", 1)[0].strip()
+            if target.startswith("/") and os.path.isfile(target):
+                libs.append(Path(target).resolve())
+        _CLOSURES[memo_key] = sorted(set(libs))
+    return _CLOSURES[memo_key]
+
+
+def _library_identity(path: Path) -> list:
+    # Installed libraries change by being replaced, and can be GBs in size
+    # (rocBLAS, MIOpen), so they key on size and mtime rather than content
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _command_executable(cmd: str) -> Optional[Path]:
+    argv = shlex.split(cmd)
+    exe = shutil.which(argv[0]) if argv else None
+    return Path(exe).resolve() if exe else None
+
+
+def _command_inputs(cmd: str) -> List[Path]:
+    """
+    Files whose contents define the workload: the executable, every argument
+    naming an existing file (scripts, code objects) and code objects or
+    shared libraries beside the executable. Libraries the executable loads
+    from elsewhere are covered by _shared_library_closure.
+    """
+    argv = shlex.split(cmd)
+    if not argv:
+        return []
+
+    exe = _command_executable(cmd)
+    inputs = [exe] if exe else []
+    inputs += [Path(a).resolve() for a in argv[1:] if os.path.isfile(a)]
+
+    if exe:
+        for p in sorted(exe.parent.iterdir()):
+            if p.is_file() and p.suffix in _CODE_OBJECT_SUFFIXES:
+                inputs.append(p)
+
+    return list(dict.fromkeys(inputs))
+
+
+def profile_key(kind: str, cmd: Optional[str] = None, inputs: Iterable = (), **options) -> str:
+    """
+    Content address of a profiling result: kind of result, tool version,
+    options that select analyses, and digests of the workload's files (from
+    cmd) or of explicit input artifacts. Runs of a command also key on the
+    shared libraries the executable loads, the device environment, the ROCm
+    version, gpu_fingerprint() and the profiler backend.
+    """
+    material = {
+        "kind": kind,
+        "version": __version__,
+        "options": options,
+        "inputs": [tree_digest(p) for p in inputs],
+    }
+    if cmd is not None:
+        material["cmd"] = cmd
+        exe = _command_executable(cmd)
+        material["binaries"] = {str(p): file_digest(p) for p in _command_inputs(cmd)}
+        material["libraries"] = {
+            str(lib): _library_identity(lib) for lib in (_shared_library_closure(exe) if exe else [])
+        }
+        material["rocm"] = rocm_version()
+        material["env"] = {name: os.environ.get(name) for name in _KEY_ENV_VARS}
+        material["gpu"] = gpu_fingerprint()
+        material["backend"] = get_backend().fingerprint()
+
+    blob = json.dumps(material, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _tree_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _link_or_copy(src, dst):
+    """Hard-link when source and cache share a filesystem; copy otherwise."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+@dataclass
+class CachedProfile:
+    result: object
+    # Artifact name -> path inside the cache entry
+    artifacts: Dict[str, Path]
+
+
+class ProfileCache:
+    """
+    Content-addressed store of profiling results, shared by every run on the
+    machine. An entry is a directory holding result.json plus copied
+    artifacts (results DBs, ATT output); a SQLite index in WAL mode tracks
+    each entry's size and last use. Entries are written to a temp dir and
+    renamed into place, so readers never see a partial entry. Inserts evict
+    the least recently used entries beyond max_bytes.
+    """
+
+    def __init__(self, root, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            str(self.root / "index.db"), timeout=_BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                size_bytes INTEGER NOT NULL,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            """
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[CachedProfile]:
+        entry = self._entry_dir(key)
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            found = self.conn.execute("SELECT 1 FROM entries WHERE key = ?;", (key,)).fetchone()
+            if found:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?;", (time.time_ns(), key))
+
+        try:
+            result = json.loads((entry / "result.json").read_text()) if found else None
+        except (OSError, ValueError):
+            return None
+        if result is None:
+            return None
+
+        artifact_root = entry / "artifacts"
+        artifacts = {p.name: p for p in artifact_root.iterdir()} if artifact_root.is_dir() else {}
+        return CachedProfile(result=result, artifacts=artifacts)
+
+    def put(self, key: str, result, artifacts: Optional[Dict[str, object]] = None) -> CachedProfile:
+        """
+        Store result (JSON-serializable) and copies of the artifact files or
+        directories under the given names; returns the stored entry.
+        """
+        entry = self._entry_dir(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=entry.parent))
+        try:
+            (staging / "result.json").write_text(json.dumps(result))
+            for name, src in (artifacts or {}).items():
+                dst = staging / "artifacts" / name
+                dst.parent.mkdir(exist_ok=True)
+                if Path(src).is_dir():
+                    shutil.copytree(src, dst, copy_function=_link_or_copy)
+                else:
+                    _link_or_copy(src, dst)
+            size = _tree_size(staging)
+
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            self.conn.execute(
+                "INSERT INTO entries (key, size_bytes, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET size_bytes = excluded.size_bytes, last_used = excluded.last_used;",
+                (key, size, time.time_ns()),
+            )
+            evicted = self._evict(keep=key)
+
+        for old in evicted:
+            shutil.rmtree(self._entry_dir(old), ignore_errors=True)
+
+        return self.get(key)
+
+    def _evict(self, keep: str) -> List[str]:
+        total = self.conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM entries;").fetchone()[0]
+        evicted = []
+        if total <= self.max_bytes:
+            return evicted
+
+        cur = self.conn.execute(
+            "SELECT key, size_bytes FROM entries WHERE key != ? ORDER BY last_used;", (keep,)
+        )
+        for key, size in cur.fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+
+        self.conn.executemany("DELETE FROM entries WHERE key = ?;", [(k,) for k in evicted])
+        return evicted
+
+
+_caches: Dict[Path, Optional[ProfileCache]] = {}
+_caches_lock = threading.Lock()
+
+
+def default_profile_cache() -> Optional[ProfileCache]:
+    """
+    Process-wide ProfileCache under default_cache_dir(), or None when the
+    cache dir cannot be written (profiling then always runs).
+    """
+    root = default_cache_dir() / "profiles"
+    with _caches_lock:
+        if root not in _caches:
+            try:
+                _caches[root] = ProfileCache(root)
+            except (OSError, sqlite3.Error):
+                _caches[root] = None
+        return _caches[root]
@@ -0,0 +1,258 @@
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from rocm_perf_lab.profiler.symbol_cache import demangle_many
+
+
+# Map up to 64 GiB of the results DB; SQLite clamps this to its compile-time limit
+_MMAP_SIZE = 1 << 36
+
+# Kernel ids bound per IN (...) list, well under SQLite's host-parameter limit
+_IN_BATCH = 500
+
+
+def connect_readonly(db_path, immutable: bool = True, mmap_size: int = _MMAP_SIZE):
+    """
+    Open a rocpd results DB read-only with a large mmap window.
+
+    immutable=True lets SQLite skip locking and change detection entirely;
+    pass False when the profiler may still be appending to the file.
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute(f"PRAGMA mmap_size={int(mmap_size)};")
+    return conn
+
+
+def find_table(conn, prefix: str) -> Optional[str]:
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name LIKE ?;",
+        (f"{prefix}%",),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def table_columns(conn, name: str) -> list:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({name});")]
+
+
+def has_table(conn, name: str) -> bool:
+    cur = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?;",
+        (name,),
+    )
+    return cur.fetchone() is not None
+
+
+class DispatchQuery:
+    """
+    SQL-side view of the dispatch trace, shared by critical-path analysis and
+    result parsing.
+
+    Per-dispatch rows are streamed once, already ordered, as plain integer
+    columns. Aggregates (per-symbol totals, per-queue gap statistics, time
+    bounds) are computed entirely inside SQLite and return a handful of rows.
+
+    SQLite does not allow TEMP indexes on main-schema tables, so aggregate
+    queries first project the narrow dispatch columns into a TEMP table
+    (written to the connection's temp store, never to the results DB) indexed
+    on (queue_id, start) and kernel_id, and host API regions into one indexed
+    on (corr_id, tid). Each projection is built on first use.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._indexed = False
+        self._regions_indexed = False
+
+        # Prefer modern ROCm 7.x schema (kernels table)
+        if has_table(conn, "kernels"):
+            self.relation = "kernels"
+            self.source = (
+                "SELECT id, COALESCE(kernel_id, -1) AS kernel_id, "
+                "COALESCE(queue_id, -1) AS queue_id, start, end FROM kernels"
+            )
+            self.names_source = "SELECT kernel_id, name FROM kernels"
+        else:
+            dispatch_table = find_table(conn, "rocpd_kernel_dispatch_")
+            symbol_table = find_table(conn, "rocpd_info_kernel_symbol_")
+            if dispatch_table is None or symbol_table is None:
+                raise RuntimeError("rocpd dispatch or kernel symbol table not found")
+
+            self.relation = dispatch_table
+            self.source = (
+                f"SELECT id, COALESCE(kernel_id, -1) AS kernel_id, "
+                f"COALESCE(queue_id, -1) AS queue_id, start, end FROM {dispatch_table}"
+            )
+            self.names_source = (
+                f"SELECT id AS kernel_id, COALESCE(display_name, kernel_name) AS name "
+                f"FROM {symbol_table}"
+            )
+
+    def _ensure_indexed(self):
+        if self._indexed:
+            return
+
+        self.conn.executescript(
+            f"""
+            DROP TABLE IF EXISTS temp.rpl_dispatch;
+
+            CREATE TEMP TABLE rpl_dispatch AS {self.source};
+
+            CREATE INDEX temp.rpl_dispatch_queue_start ON rpl_dispatch (queue_id, start, id);
+            CREATE INDEX temp.rpl_dispatch_kernel ON rpl_dispatch (kernel_id);
+            """
+        )
+        self._indexed = True
+
+    def kernel_names(self, kernel_ids: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        """
+        Kernel id -> display name, for every kernel or only the given ids.
+        Symbols that only carry a mangled name are demangled through the
+        shared symbol cache.
+        """
+        if kernel_ids is None:
+            batches = [None]
+        else:
+            kernel_ids = list(kernel_ids)
+            batches = [kernel_ids[i:i + _IN_BATCH] for i in range(0, len(kernel_ids), _IN_BATCH)]
+
+        names: Dict[int, str] = {}
+        for batch in batches:
+            where = "" if batch is None else "WHERE kernel_id IN (%s) " % ", ".join("?" * len(batch))
+            cur = self.conn.execute(
+                f"SELECT kernel_id, MAX(name) FROM ({self.names_source}) {where}GROUP BY kernel_id;",
+                batch or (),
+            )
+            for kid, name in cur:
+                names[kid] = name or "unknown"
+
+        demangled = demangle_many(n for n in names.values() if n.startswith("_Z"))
+        return {kid: demangled.get(name, name) for kid, name in names.items()}
+
+    def ordered_dispatches(self, after_id: Optional[int] = None):
+        """
+        Cursor over (id, kernel_id, queue_id, start, end) ordered by (start, id),
+        optionally limited to dispatches with id > after_id.
+        """
+        if after_id is None:
+            return self.conn.execute(f"SELECT * FROM ({self.source}) ORDER BY start, id;")
+
+        return self.conn.execute(
+            f"SELECT * FROM ({self.source}) WHERE id > ? ORDER BY start, id;",
+            (after_id,),
+        )
+
+    def queue_agents(self) -> Dict[int, int]:
+        """Queue id -> agent id; empty when the schema carries no agent column."""
+        if "agent_id" not in table_columns(self.conn, self.relation):
+            return {}
+        return dict(
+            self.conn.execute(
+                f"SELECT COALESCE(queue_id, -1), MIN(COALESCE(agent_id, -1)) "
+                f"FROM {self.relation} GROUP BY queue_id;"
+            )
+        )
+
+    def has_host_trace(self) -> bool:
+        """True when dispatches can be correlated with traced HSA/HIP API calls."""
+        if not has_table(self.conn, "regions"):
+            return False
+        dispatch_columns = set(table_columns(self.conn, self.relation))
+        region_columns = set(table_columns(self.conn, "regions"))
+        return {"tid", "corr_id"} <= dispatch_columns and {"tid", "corr_id", "name"} <= region_columns
+
+    def _ensure_regions_indexed(self):
+        if self._regions_indexed:
+            return
+
+        self.conn.executescript(
+            """
+            DROP TABLE IF EXISTS temp.rpl_region;
+
+            CREATE TEMP TABLE rpl_region AS
+                SELECT tid, name, start, end, corr_id FROM regions;
+
+            CREATE INDEX temp.rpl_region_corr ON rpl_region (corr_id, tid);
+            """
+        )
+        self._regions_indexed = True
+
+    def dispatch_submissions(self, id_range: Optional[Tuple[int, int]] = None):
+        """
+        Cursor over (id, tid, submit) for dispatches whose enqueuing API call
+        (same correlation id, same thread) is in the trace; submit is the
+        call's start. id_range limits it to ids in [lo, hi].
+        """
+        self._ensure_regions_indexed()
+        where, params = "", ()
+        if id_range is not None:
+            where, params = "WHERE k.id BETWEEN ? AND ? ", tuple(id_range)
+        return self.conn.execute(
+            f"""
+            SELECT k.id, k.tid, MIN(r.start)
+            FROM {self.relation} k
+            JOIN rpl_region r ON r.corr_id = k.corr_id AND r.tid = k.tid
+            {where}GROUP BY k.id;
+            """,
+            params,
+        )
+
+    def host_waits(self, wait_names, wait_prefixes):
+        """Cursor over (tid, start, end) of the named blocking API calls, ordered by (tid, end)."""
+        self._ensure_regions_indexed()
+        clauses = ["name IN (%s)" % ", ".join("?" * len(wait_names))] if wait_names else []
+        clauses += ["name LIKE ?"] * len(wait_prefixes)
+        return self.conn.execute(
+            f"SELECT tid, start, end FROM rpl_region WHERE {' OR '.join(clauses)} ORDER BY tid, end;",
+            list(wait_names) + [f"{prefix}%" for prefix in wait_prefixes],
+        )
+
+    def time_bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        """(first start, last end) over the whole trace."""
+        return tuple(self.conn.execute(f"SELECT MIN(start), MAX(end) FROM ({self.source});").fetchone())
+
+    def symbol_totals(self) -> Dict[str, Tuple[int, int]]:
+        """Per-symbol (dispatch count, total duration ns) over the whole trace."""
+        self._ensure_indexed()
+        names = self.kernel_names()
+
+        totals: Dict[str, Tuple[int, int]] = {}
+        cur = self.conn.execute(
+            "SELECT kernel_id, COUNT(*), SUM(end - start) FROM rpl_dispatch GROUP BY kernel_id;"
+        )
+        for kid, count, total in cur:
+            name = names.get(kid, "unknown")
+            prev_count, prev_total = totals.get(name, (0, 0))
+            totals[name] = (prev_count + count, prev_total + (total or 0))
+        return totals
+
+    def queue_gap_stats(self) -> Dict[int, dict]:
+        """Idle gaps between consecutive dispatches on each queue."""
+        self._ensure_indexed()
+        cur = self.conn.execute(
+            """
+            WITH gaps AS (
+                SELECT queue_id,
+                       LEAD(start) OVER (PARTITION BY queue_id ORDER BY start, id) - end AS gap
+                FROM rpl_dispatch
+            )
+            SELECT queue_id, COUNT(gap), SUM(MAX(gap, 0)), AVG(gap), MAX(gap)
+            FROM gaps
+            GROUP BY queue_id;
+            """
+        )
+        return {
+            queue: {
+                "gaps": count,
+                "idle_ns": idle or 0,
+                "mean_gap_ns": mean or 0.0,
+                "max_gap_ns": largest or 0,
+            }
+            for queue, count, idle, mean, largest in cur
+        }
@@ -1,8 +1,17 @@
+import glob
 import subprocess
-import sqlite3
 import tempfile
 import os
 from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from rocm_perf_lab.profiler.backends import KernelFilter, get_backend
+from rocm_perf_lab.profiler.counter_planner import counter_block, plan_counter_passes
+from rocm_perf_lab.profiler.rocpd_query import connect_readonly, find_table, table_columns
+from rocm_perf_lab.profiler.symbol_cache import demangle_many
+from rocm_perf_lab.profiler.workspace import RunWorkspace
 
 
 @dataclass
@@ -15,149 +24,262 @@ class RocprofResult:
     grid: tuple[int, int, int] | None
     block: tuple[int, int, int] | None
     agent_metadata: dict | None = None
+    # Every results DB written by this run (one per profiled process)
+    db_paths: list[str] | None = None
+
+
+# Symbol of the single row that stands for every dispatch when counters
+# cannot be attributed per dispatch
+WHOLE_APP_SYMBOL = "<all kernels>"
+
+
+@dataclass
+class DispatchCounters:
+    """
+    Counter values per dispatch from a --pmc run, columnar: row i of every
+    array is one dispatch, ordered by dispatch id. values[:, j] holds
+    metrics[j] (0.0 where a dispatch has no sample). symbols index into
+    symbol_names; grid and block are (n, 3).
+
+    Without per-dispatch attribution (see whole_app) there is one row, id
+    -1 and symbol WHOLE_APP_SYMBOL, holding whole-app sums.
+    """
+
+    metrics: list[str]
+    dispatch_ids: np.ndarray
+    symbols: np.ndarray
+    symbol_names: list[str]
+    grid: np.ndarray
+    block: np.ndarray
+    durations_ns: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dispatch_ids)
+
+    @classmethod
+    def whole_app(cls, totals: dict, duration_ns: int) -> "DispatchCounters":
+        """One row of whole-app sums spanning duration_ns of kernel time."""
+        return cls(
+            metrics=list(totals),
+            dispatch_ids=np.array([-1], dtype=np.int64),
+            symbols=np.zeros(1, dtype=np.int32),
+            symbol_names=[WHOLE_APP_SYMBOL],
+            grid=np.zeros((1, 3), dtype=np.int64),
+            block=np.zeros((1, 3), dtype=np.int64),
+            durations_ns=np.array([duration_ns], dtype=np.int64),
+            values=np.array([list(totals.values())], dtype=np.float64),
+        )
+
+    @property
+    def is_whole_app(self) -> bool:
+        return self.symbol_names == [WHOLE_APP_SYMBOL]
+
+    def column(self, metric: str) -> np.ndarray:
+        if metric not in self.metrics:
+            return np.zeros(len(self))
+        return self.values[:, self.metrics.index(metric)]
+
+    def totals(self) -> dict:
+        """Whole-app sum per metric, as parse_rocpd_metrics reports it."""
+        return dict(zip(self.metrics, self.values.sum(axis=0).tolist()))
+
+    def merge(self, other: "DispatchCounters") -> "DispatchCounters":
+        """
+        Add another pass's metrics, matching dispatches by id (one app
+        launch per pass, so ids line up for deterministic apps). Dispatches
+        missing from `other` get 0.0 for its metrics.
+        """
+        new = [m for m in other.metrics if m not in self.metrics]
+        extra = np.zeros((len(self), len(new)))
+
+        pos = np.searchsorted(other.dispatch_ids, self.dispatch_ids)
+        pos = np.minimum(pos, max(len(other) - 1, 0))
+        found = (other.dispatch_ids[pos] == self.dispatch_ids) if len(other) else np.zeros(len(self), dtype=bool)
+        for j, metric in enumerate(new):
+            extra[found, j] = other.column(metric)[pos[found]]
+
+        return DispatchCounters(
+            metrics=self.metrics + new,
+            dispatch_ids=self.dispatch_ids,
+            symbols=self.symbols,
+            symbol_names=self.symbol_names,
+            grid=self.grid,
+            block=self.block,
+            durations_ns=self.durations_ns,
+            values=np.concatenate([self.values, extra], axis=1),
+        )
+
+
+@dataclass
+class RocprofRun:
+    """A finished rocprofv3 launch whose results DBs are not parsed yet."""
+
+    db_files: list[str]
+    # Owns the output dir when it is temporary; None when persisted
+    tmpdir_obj: tempfile.TemporaryDirectory | None = None
 
 
 def run_with_rocprof(
     cmd: str,
     debug: bool = False,
-    output_dir: str | None = None,
+    workspace: RunWorkspace | None = None,
 ) -> RocprofResult:
     """
     Run rocprofv3 in kernel-trace mode and return parsed RocprofResult.
-    If output_dir is provided, rocpd output will be written there and persisted.
+    If workspace is provided, rocpd output is persisted as one of its passes.
+    """
+    return collect_rocprof(launch_rocprof(cmd, debug=debug, workspace=workspace))
+
+
+def launch_rocprof(
+    cmd: str,
+    debug: bool = False,
+    workspace: RunWorkspace | None = None,
+) -> RocprofRun:
+    """
+    Run rocprofv3 (or the configured backend, see get_backend) in
+    kernel-trace mode and locate the results DBs it wrote, without parsing
+    them (see collect_rocprof). With a workspace the run gets its own
+    "full-trace" pass directory and its DBs are recorded in the manifest.
     """
 
     tmpdir_obj = None
 
-    if output_dir is None:
+    if workspace is None:
         tmpdir_obj = tempfile.TemporaryDirectory()
         tmpdir = tmpdir_obj.name
-        cleanup = True
     else:
-        os.makedirs(output_dir, exist_ok=True)
-        tmpdir = output_dir
-        cleanup = False
+        tmpdir = str(workspace.new_pass("full-trace"))
 
-    # Execute rocprofv3 with explicit output directory and rocpd format
     # Use full trace mode when persisting output (needed for critical-path DAG reconstruction)
-    trace_flag = "--trace" if output_dir is not None else "--kernel-trace"
-
-    if trace_flag == "--trace":
-        # Critical-path mode: need both kernel and HSA traces
-        rocprof_cmd = [
-            "rocprofv3",
-            "--kernel-trace",
-            "--hsa-trace",
-            "-d",
-            tmpdir,
-            "--",
-        ] + cmd.split()
-    else:
-        # Lightweight kernel-trace mode with explicit rocpd format
-        rocprof_cmd = [
-            "rocprofv3",
-            "--kernel-trace",
-            "-d",
-            tmpdir,
-            "-f",
-            "rocpd",
-            "--",
-        ] + cmd.split()
+    full_trace = workspace is not None
 
     try:
-        env = os.environ.copy()
-        env["HOME"] = tmpdir
-        env["ROCPROFILER_HOME"] = tmpdir
-        env["XDG_CACHE_HOME"] = tmpdir
-        if debug:
-            subprocess.run(rocprof_cmd, check=True, env=env)
-        else:
-            subprocess.run(
-                rocprof_cmd,
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                env=env,
-            )
+        get_backend().kernel_trace(cmd, tmpdir, full_trace=full_trace, debug=debug)
     except subprocess.CalledProcessError as e:
-        if cleanup and tmpdir_obj is not None:
+        if tmpdir_obj is not None:
             tmpdir_obj.cleanup()
         raise RuntimeError(f"rocprofv3 execution failed: {e}")
 
-    # Discover generated results.db recursively
-    import glob
-    db_files = glob.glob(os.path.join(tmpdir, "**/*_results.db"), recursive=True)
+    # The output dir is fresh, so every DB in it is this run's (one per process)
+    db_files = sorted(glob.glob(os.path.join(tmpdir, "**/*_results.db"), recursive=True))
     if not db_files:
-        if cleanup and tmpdir_obj is not None:
+        if tmpdir_obj is not None:
             tmpdir_obj.cleanup()
         raise RuntimeError("rocprofv3 did not produce results.db")
 
-    result = parse_rocpd_sqlite(db_files[0])
+    if workspace is not None:
+        workspace.record("full-trace", Path(tmpdir), db_files)
 
-    if cleanup and tmpdir_obj is not None:
-        tmpdir_obj.cleanup()
+    return RocprofRun(db_files=db_files, tmpdir_obj=tmpdir_obj)
+
+
+def collect_rocprof(run: RocprofRun) -> RocprofResult:
+    """Parse a launch's results DB and release its temporary output dir."""
+    try:
+        result = parse_rocpd_sqlite(run.db_files[0])
+    finally:
+        if run.tmpdir_obj is not None:
+            run.tmpdir_obj.cleanup()
+
+    if run.tmpdir_obj is None:
+        result.db_paths = run.db_files
 
     return result
 
 
-def demangle(name: str) -> str:
-    try:
-        result = subprocess.run(
-            ["c++filt", name],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return result.stdout.strip()
-    except Exception:
-        return name
+# Kernels launched by the HIP/HSA runtime itself (blits, fills)
+_RUNTIME_KERNEL_PREFIXES = ("__amd_rocclr_", "hip", "hsa_")
 
 
 def is_runtime_kernel(name: str) -> bool:
-    return (
-        name.startswith("__amd_rocclr_")
-        or name.startswith("hip")
-        or name.startswith("hsa_")
-    )
+    return name.startswith(_RUNTIME_KERNEL_PREFIXES)
 
 
-def run_with_rocprof_counters(cmd: str, metrics: list[str], debug: bool = False):
-    """Run rocprofv3 in counter mode and return metric dict."""
+def run_with_rocprof_counters(cmd: str, metrics: list[str], debug: bool = False, per_dispatch: bool = False,
+                              kernel_filter: KernelFilter | None = None):
+    """
+    Run rocprofv3 in counter mode and return metric dict, or DispatchCounters
+    with per_dispatch. kernel_filter limits sampling to matching dispatches.
+    """
     with tempfile.TemporaryDirectory() as tmpdir:
-        metric_arg = ",".join(metrics)
-
-        rocprof_cmd = [
-            "rocprofv3",
-            "--pmc",
-            metric_arg,
-            "-d",
-            tmpdir,
-            "--",
-        ] + cmd.split()
-
         try:
-            if debug:
-                subprocess.run(rocprof_cmd, check=True)
-            else:
-                subprocess.run(
-                    rocprof_cmd,
-                    check=True,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
+            get_backend().counters(cmd, metrics, tmpdir, debug=debug, kernel_filter=kernel_filter)
         except subprocess.CalledProcessError:
             return None
 
-        import glob
         db_files = glob.glob(os.path.join(tmpdir, "**/*_results.db"), recursive=True)
         if not db_files:
             return None
 
+        if per_dispatch:
+            return parse_rocpd_dispatch_metrics(db_files[0], metrics)
         return parse_rocpd_metrics(db_files[0], metrics)
 
 
+def _merge_counters(merged, values, per_dispatch: bool):
+    if merged is None:
+        return values
+    if per_dispatch:
+        return merged.merge(values)
+    merged.update(values)
+    return merged
+
+
+def run_counter_passes(cmd: str, metrics: list[str], block_limits: dict, debug: bool = False,
+                       per_dispatch: bool = False, kernel_filter: KernelFilter | None = None):
+    """
+    Collect metrics in the fewest app launches the PMC block limits allow
+    (see plan_counter_passes) and merge the per-pass results: metric dicts,
+    or DispatchCounters with per_dispatch.
+
+    Block limits are nominal; some drivers reject a packed group that mixes
+    blocks. A failed pass is retried once per block (SQ, TCC, ...) before
+    giving up. Returns None if a pass still fails, like
+    run_with_rocprof_counters.
+    """
+    return run_planned_counter_passes(
+        cmd, plan_counter_passes(metrics, block_limits), debug, per_dispatch, kernel_filter
+    )
+
+
+def run_planned_counter_passes(cmd: str, passes: list[list[str]], debug: bool = False,
+                               per_dispatch: bool = False, kernel_filter: KernelFilter | None = None):
+    """Run already planned counter groups, one app launch each (see run_counter_passes)."""
+    if debug:
+        for i, group in enumerate(passes, start=1):
+            print(f"[PMC] pass {i}/{len(passes)}: {' '.join(group)}")
+
+    def run(group):
+        return run_with_rocprof_counters(
+            cmd, group, debug=debug, per_dispatch=per_dispatch, kernel_filter=kernel_filter
+        )
+
+    merged = None
+    for group in passes:
+        values = run(group)
+        if values is None:
+            by_block: dict[str, list[str]] = {}
+            for counter in group:
+                by_block.setdefault(counter_block(counter), []).append(counter)
+            if len(by_block) == 1:
+                return None
+            if debug:
+                print(f"[PMC] pass failed, retrying per block: {', '.join(by_block)}")
+
+            for block_group in by_block.values():
+                block_values = run(block_group)
+                if block_values is None:
+                    return None
+                values = _merge_counters(values, block_values, per_dispatch)
+
+        merged = _merge_counters(merged, values, per_dispatch)
+    return merged
+
+
 def parse_rocpd_metrics(db_path: str, metrics: list[str]):
-    conn = sqlite3.connect(db_path)
+    conn = connect_readonly(db_path)
     cur = conn.cursor()
 
     # Find pmc info table
@@ -203,74 +325,176 @@ def parse_rocpd_metrics(db_path: str, metrics: list[str]):
     return metric_values
 
 
-def parse_rocpd_sqlite(db_path: str) -> RocprofResult:
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+def parse_rocpd_dispatch_metrics(db_path: str, metrics: list[str]):
+    """
+    Counter values joined to the dispatch that produced them (through the
+    shared event id), summed per dispatch and metric inside SQLite, then
+    pivoted into DispatchCounters. Returns None when the DB has no counter
+    tables. When its dispatches carry no event id, falls back to the
+    whole-app sums of parse_rocpd_metrics (DispatchCounters.whole_app) over
+    the trace's total kernel time.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        info_table = find_table(conn, "rocpd_info_pmc")
+        pmc_table = find_table(conn, "rocpd_pmc_event")
+        dispatch_table = find_table(conn, "rocpd_kernel_dispatch")
+        kernel_info_table = find_table(conn, "rocpd_info_kernel_symbol")
+        if None in (info_table, pmc_table, dispatch_table, kernel_info_table):
+            return None
+        if "event_id" not in table_columns(conn, dispatch_table):
+            kernel_ns = conn.execute(f"SELECT COALESCE(SUM(end - start), 0) FROM {dispatch_table};").fetchone()[0]
+            totals = parse_rocpd_metrics(db_path, metrics)
+            return None if totals is None else DispatchCounters.whole_app(totals, kernel_ns)
+
+        name_to_id = {name: pid for pid, name in conn.execute(f"SELECT id, name FROM {info_table};")}
+        wanted = {name_to_id[m]: j for j, m in enumerate(metrics) if m in name_to_id}
+
+        rows = []
+        if wanted:
+            rows = conn.execute(
+                f"""
+                SELECT d.id, COALESCE(d.kernel_id, -1),
+                       COALESCE(d.grid_size_x, 0), COALESCE(d.grid_size_y, 0), COALESCE(d.grid_size_z, 0),
+                       COALESCE(d.workgroup_size_x, 0), COALESCE(d.workgroup_size_y, 0),
+                       COALESCE(d.workgroup_size_z, 0),
+                       COALESCE(d.end - d.start, 0), p.pmc_id, COALESCE(SUM(p.value), 0.0)
+                FROM {pmc_table} p
+                JOIN {dispatch_table} d ON d.event_id = p.event_id
+                WHERE p.pmc_id IN ({', '.join('?' * len(wanted))})
+                GROUP BY d.id, p.pmc_id
+                ORDER BY d.id;
+                """,
+                list(wanted),
+            ).fetchall()
+
+        names = _kernel_symbol_names(conn, kernel_info_table)
+    finally:
+        conn.close()
 
-    # Find required tables dynamically
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'rocpd_kernel_dispatch%';")
-    dispatch_table = cur.fetchone()[0]
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return DispatchCounters(
+            metrics=list(metrics),
+            dispatch_ids=empty,
+            symbols=np.empty(0, dtype=np.int32),
+            symbol_names=[],
+            grid=np.empty((0, 3), dtype=np.int64),
+            block=np.empty((0, 3), dtype=np.int64),
+            durations_ns=empty,
+            values=np.empty((0, len(metrics))),
+        )
 
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'rocpd_info_kernel_symbol%';")
-    kernel_info_table = cur.fetchone()[0]
+    columns = list(zip(*rows))
+    ints = np.array(columns[:10], dtype=np.int64)
+    sample_values = np.asarray(columns[10], dtype=np.float64)
+
+    dispatch_ids, first, row_of = np.unique(ints[0], return_index=True, return_inverse=True)
+    column_lut = np.zeros(max(wanted) + 1, dtype=np.int64)
+    column_lut[list(wanted)] = list(wanted.values())
+    col_of = column_lut[ints[9]]
+
+    values = np.zeros((len(dispatch_ids), len(metrics)))
+    values[row_of.reshape(-1), col_of] = sample_values
+
+    # Intern symbol names per distinct kernel id
+    kernel_ids = ints[1][first]
+    unique_kids, kid_of = np.unique(kernel_ids, return_inverse=True)
+    intern: dict[str, int] = {}
+    kid_symbol = np.array(
+        [intern.setdefault(names.get(kid, "unknown"), len(intern)) for kid in unique_kids.tolist()],
+        dtype=np.int32,
+    )
 
-    # Get all dispatches ordered by duration DESC
-    cur.execute(
-        f"""
-        SELECT kernel_id, agent_id, start, end,
-               workgroup_size_x, workgroup_size_y, workgroup_size_z,
-               grid_size_x, grid_size_y, grid_size_z,
-               (end - start) AS duration
-        FROM {dispatch_table}
-        ORDER BY duration DESC;
-        """
+    return DispatchCounters(
+        metrics=list(metrics),
+        dispatch_ids=dispatch_ids,
+        symbols=kid_symbol[kid_of.reshape(-1)],
+        symbol_names=list(intern),
+        grid=ints[2:5, first].T.copy(),
+        block=ints[5:8, first].T.copy(),
+        durations_ns=ints[8][first],
+        values=values,
     )
-    dispatch_rows = cur.fetchall()
 
-    selected = None
 
-    selected_agent_id = None
+def _kernel_symbol_names(conn, kernel_info_table: str) -> dict[int, str]:
+    """Symbol id -> display name, demangling (in one batch) the symbols without one."""
+    rows = conn.execute(f"SELECT id, kernel_name, display_name FROM {kernel_info_table};").fetchall()
+    demangled = demangle_many([mangled for _, mangled, display in rows if not display and mangled])
+    return {
+        sid: display or (demangled[mangled] if mangled else "unknown")
+        for sid, mangled, display in rows
+    }
 
-    for row in dispatch_rows:
-        kernel_id, agent_id, start, end, wx, wy, wz, gx, gy, gz, duration_ns = row
 
-        # Lookup kernel metadata
-        cur.execute(
-            f"SELECT kernel_name, display_name, arch_vgpr_count, sgpr_count, group_segment_size FROM {kernel_info_table} WHERE id = ?;",
-            (kernel_id,),
-        )
-        meta = cur.fetchone()
+def _longest_dispatch(conn, dispatch_table: str, kernel_info_table: str, exclude_ids=()):
+    """
+    Longest dispatch with known kernel metadata, skipping kernel ids in
+    exclude_ids. The inner MAX() is a single pass over the trace (SQLite
+    fills the bare columns from the row that attains it), so only the
+    winning dispatch is joined with the symbol table.
+    """
+    clauses = []
+    if exclude_ids:
+        clauses.append("kernel_id NOT IN (%s)" % ", ".join("?" * len(exclude_ids)))
+
+    def query(clauses):
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return conn.execute(
+            f"""
+            SELECT d.kernel_id, d.agent_id,
+                   d.workgroup_size_x, d.workgroup_size_y, d.workgroup_size_z,
+                   d.grid_size_x, d.grid_size_y, d.grid_size_z,
+                   s.arch_vgpr_count, s.sgpr_count, s.group_segment_size,
+                   d.duration
+            FROM (
+                SELECT kernel_id, agent_id,
+                       workgroup_size_x, workgroup_size_y, workgroup_size_z,
+                       grid_size_x, grid_size_y, grid_size_z,
+                       MAX(end - start) AS duration
+                FROM {dispatch_table}
+                {where}
+            ) d
+            JOIN {kernel_info_table} s ON s.id = d.kernel_id;
+            """,
+            list(exclude_ids),
+        ).fetchone()
+
+    row = query(clauses)
+    if row is None:
+        # The longest dispatch has no symbol row (or the trace is empty);
+        # rescan restricted to known symbols, at one lookup per dispatch
+        row = query(clauses + [f"kernel_id IN (SELECT id FROM {kernel_info_table})"])
+    return row
 
-        if not meta:
-            continue
 
-        mangled_name, display_name, arch_vgpr_count, sgpr_count, group_segment_size = meta
+def parse_rocpd_sqlite(db_path: str) -> RocprofResult:
+    conn = connect_readonly(db_path)
+    cur = conn.cursor()
+
+    # Find required tables dynamically
+    dispatch_table = find_table(conn, "rocpd_kernel_dispatch")
+    kernel_info_table = find_table(conn, "rocpd_info_kernel_symbol")
 
-        name = display_name or (demangle(mangled_name) if mangled_name else "unknown")
+    # Runtime kernels are resolved over the (small) symbol table, then
+    # filtered out in SQL
+    names = _kernel_symbol_names(conn, kernel_info_table)
+    runtime_ids = [sid for sid, name in names.items() if is_runtime_kernel(name)]
 
-        if not is_runtime_kernel(name):
-            selected = (name, duration_ns, wx, wy, wz, gx, gy, gz,
-                        arch_vgpr_count, sgpr_count, group_segment_size)
-            selected_agent_id = agent_id
-            break
+    row = _longest_dispatch(conn, dispatch_table, kernel_info_table, exclude_ids=runtime_ids)
 
     # Fallback to longest if all were runtime kernels
-    if not selected and dispatch_rows:
-        row = dispatch_rows[0]
-        kernel_id, agent_id, start, end, wx, wy, wz, gx, gy, gz, duration_ns = row
+    if row is None and runtime_ids:
+        row = _longest_dispatch(conn, dispatch_table, kernel_info_table)
 
-        cur.execute(
-            f"SELECT kernel_name, display_name, arch_vgpr_count, sgpr_count, group_segment_size FROM {kernel_info_table} WHERE id = ?;",
-            (kernel_id,),
-        )
-        meta = cur.fetchone()
-
-        if meta:
-            mangled_name, display_name, arch_vgpr_count, sgpr_count, group_segment_size = meta
-            name = display_name or (demangle(mangled_name) if mangled_name else "unknown")
-            selected = (name, duration_ns, wx, wy, wz, gx, gy, gz,
-                        arch_vgpr_count, sgpr_count, group_segment_size)
-            selected_agent_id = agent_id
+    selected = None
+    selected_agent_id = None
+
+    if row is not None:
+        kernel_id, agent_id, wx, wy, wz, gx, gy, gz, vgpr, sgpr, lds, duration_ns = row
+        selected = (names[kernel_id], duration_ns, wx, wy, wz, gx, gy, gz, vgpr, sgpr, lds)
+        selected_agent_id = agent_id
 
     if not selected:
         conn.close()
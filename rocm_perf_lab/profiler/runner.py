@@ -1,7 +1,41 @@
 import time
 import subprocess
 import statistics
-from .rocprof_adapter import run_with_rocprof
+from concurrent.futures import ThreadPoolExecutor
+from .rocprof_adapter import collect_rocprof, launch_rocprof
+from .workspace import RunWorkspace
+
+
+def _run_rocprof_pipelined(
+    cmd: str, runs: int, debug: bool, workspace: RunWorkspace | None, parse_workers: int
+):
+    """
+    Launch measurement i + 1 as soon as run i's process exits, while a
+    worker thread parses run i's results DB (SQLite and c++filt both work
+    outside the GIL). Results are returned in launch order; a failed parse
+    stops further launches. If a launch fails, the in-flight parses are
+    awaited and the first parse error, if any, is chained as its cause.
+    Only the last run is persisted in workspace (a full trace); the others
+    are lightweight kernel traces.
+    """
+    futures = []
+    with ThreadPoolExecutor(max_workers=parse_workers) as pool:
+        for i in range(runs):
+            for future in futures:
+                if future.done() and future.exception() is not None:
+                    raise future.exception()
+
+            run_workspace = workspace if i == runs - 1 else None
+            try:
+                run = launch_rocprof(cmd, debug=debug, workspace=run_workspace)
+            except Exception as e:
+                parse_errors = [f.exception() for f in futures if f.exception() is not None]
+                if parse_errors:
+                    raise e from parse_errors[0]
+                raise
+            futures.append(pool.submit(collect_rocprof, run))
+
+        return [future.result() for future in futures]
 
 
 def run_command(
@@ -9,21 +43,24 @@ def run_command(
     runs: int = 3,
     use_rocprof: bool = False,
     debug: bool = False,
-    output_dir: str | None = None,
+    workspace: RunWorkspace | None = None,
+    parse_workers: int = 2,
 ):
+    """
+    Run cmd `runs` times and summarize the timings. With a workspace the
+    last rocprof run is a full trace, whose HSA tracing overhead would skew
+    the sample; it is left out of the statistics unless it is the only run.
+    """
     timings = []
     rocprof_data = None
 
-    for _ in range(runs):
-        if use_rocprof:
-            result = run_with_rocprof(
-                cmd,
-                debug=debug,
-                output_dir=output_dir,
-            )
-            timings.append(result.kernel_time_ms)
-            rocprof_data = result
-        else:
+    if use_rocprof:
+        results = _run_rocprof_pipelined(cmd, runs, debug, workspace, parse_workers)
+        timed = results[:-1] if workspace is not None and len(results) > 1 else results
+        timings = [result.kernel_time_ms for result in timed]
+        rocprof_data = results[-1] if results else None
+    else:
+        for _ in range(runs):
             start = time.perf_counter()
             subprocess.run(cmd, shell=True, check=True)
             end = time.perf_counter()
@@ -0,0 +1,218 @@
+import atexit
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+# Entries kept on disk before the least recently used are evicted
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Seconds a writer waits on another process's transaction
+_BUSY_TIMEOUT_S = 30.0
+
+# Looked-up names whose last_used bump is held back before it is written
+_TOUCH_BATCH = 4096
+
+
+def default_cache_dir() -> Path:
+    """$ROCM_PERF_LAB_CACHE_DIR, else $XDG_CACHE_HOME/rocm-perf-lab (~/.cache by default)."""
+    override = os.environ.get("ROCM_PERF_LAB_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "rocm-perf-lab"
+
+
+class SymbolCache:
+    """
+    On-disk symbol table shared by every run on the machine: mangled name ->
+    demangled name.
+
+    The DB runs in WAL mode, so lookups are plain reads that never wait on
+    a writer. The last_used bumps they imply are batched in memory and
+    written with the next store, every _TOUCH_BATCH names, or on flush();
+    stores evict the least recently used names beyond max_entries.
+    Concurrent writers serialize on SQLite's lock and inserts are
+    idempotent. One instance may be shared by threads (e.g. pipelined
+    result parsing); its transactions are serialized.
+    """
+
+    def __init__(self, path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._touched: Dict[str, int] = {}
+        self.conn = sqlite3.connect(
+            str(self.path), timeout=_BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS symbols (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                demangled TEXT,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS symbols_last_used ON symbols (last_used);
+            """
+        )
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def _select(self, names: list, column: str) -> Dict[str, object]:
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for lo in range(0, len(names), 500):
+            chunk = names[lo:lo + 500]
+            cur = self.conn.execute(
+                f"SELECT name, {column} FROM symbols WHERE name IN ({', '.join('?' * len(chunk))});",
+                chunk,
+            )
+            found.update((name, value) for name, value in cur if value is not None)
+        return found
+
+    def _write_touched(self):
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE symbols SET last_used = MAX(last_used, ?) WHERE name = ?;",
+                [(when, name) for name, when in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _evict(self):
+        excess = self.conn.execute("SELECT COUNT(*) FROM symbols;").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM symbols WHERE id IN (SELECT id FROM symbols ORDER BY last_used LIMIT ?);",
+                (excess,),
+            )
+
+    def lookup(self, names: Iterable[str]) -> Dict[str, str]:
+        """Demangled names for the cached subset of `names`."""
+        names = list(dict.fromkeys(names))
+        now = time.time_ns()
+        with self._lock:
+            found = self._select(names, "demangled")
+            self._touched.update(dict.fromkeys(found, now))
+            pending = len(self._touched) >= _TOUCH_BATCH
+        if pending:
+            self.flush()
+        return found
+
+    def flush(self):
+        """Write the batched last_used bumps of earlier lookups."""
+        with self._lock, self.conn:
+            if self._touched:
+                self.conn.execute("BEGIN IMMEDIATE;")
+                self._write_touched()
+
+    def store(self, demangled: Dict[str, str]):
+        """Record mangled -> demangled pairs."""
+        now = time.time_ns()
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            self._write_touched()
+            self.conn.executemany(
+                "INSERT INTO symbols (name, demangled, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET demangled = excluded.demangled, last_used = excluded.last_used;",
+                [(name, value, now) for name, value in demangled.items()],
+            )
+            self._evict()
+
+_caches: Dict[Path, Optional[SymbolCache]] = {}
+_caches_lock = threading.Lock()
+
+
+def _flush_at_exit(cache: SymbolCache):
+    try:
+        cache.flush()
+    except sqlite3.Error:
+        pass
+
+
+def default_symbol_cache() -> Optional[SymbolCache]:
+    """
+    Process-wide SymbolCache under default_cache_dir(), or None when the
+    cache dir cannot be written (demangling then stays in-process only).
+    """
+    path = default_cache_dir() / "symbols.db"
+    with _caches_lock:
+        if path not in _caches:
+            try:
+                _caches[path] = SymbolCache(path)
+                atexit.register(_flush_at_exit, _caches[path])
+            except (OSError, sqlite3.Error):
+                _caches[path] = None
+        return _caches[path]
+
+
+# Memoized demangled names for this process, in front of the on-disk cache
+_DEMANGLED: Dict[str, str] = {}
+
+
+def _run_cxxfilt(names: list) -> Optional[Dict[str, str]]:
+    """Demangle names with one c++filt process; None if c++filt is unusable."""
+    try:
+        result = subprocess.run(
+            ["c++filt"],
+            input="\n".join(names) + "\n",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except Exception:
+        return None
+
+    lines = result.stdout.splitlines()
+    if len(lines) != len(names):
+        return None
+    return {name: line.strip() or name for name, line in zip(names, lines)}
+
+
+def demangle_many(names) -> Dict[str, str]:
+    """
+    Demangle names, consulting the in-process memo, then the on-disk
+    SymbolCache, then one c++filt process for whatever is left. Returns
+    name -> demangled name; names c++filt cannot handle map to themselves.
+    """
+    names = list(names)
+    missing = [n for n in dict.fromkeys(names) if n not in _DEMANGLED]
+    if not missing:
+        return {n: _DEMANGLED[n] for n in names}
+
+    cache = default_symbol_cache()
+    if cache is not None:
+        try:
+            found = cache.lookup(missing)
+        except sqlite3.Error:
+            found = {}
+        _DEMANGLED.update(found)
+        missing = [n for n in missing if n not in found]
+
+    if missing:
+        demangled = _run_cxxfilt(missing)
+        if demangled is None:
+            # Not persisted, so a later run with c++filt can still fill them in
+            _DEMANGLED.update((n, n) for n in missing)
+        else:
+            _DEMANGLED.update(demangled)
+            if cache is not None:
+                try:
+                    cache.store(demangled)
+                except sqlite3.Error:
+                    pass
+
+    return {n: _DEMANGLED[n] for n in names}
+
+
+def demangle(name: str) -> str:
+    return demangle_many([name])[name]
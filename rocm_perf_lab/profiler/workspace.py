@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+
+# Where persisted profiling output lives, relative to the working directory
+DEFAULT_WORKSPACE_ROOT = Path(".rocpd_profile")
+
+MANIFEST_NAME = "manifest.json"
+
+# Runs prune_runs keeps under a workspace root by default
+DEFAULT_KEEP_RUNS = 20
+
+
+def _new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class RunWorkspace:
+    """
+    One profiling session's output: <root>/runs/<run_id>/ with a fresh
+    directory per collection pass and a manifest.json listing each pass and
+    the files it produced (results DBs, ATT dispatch dirs). Run ids are
+    unique, so sessions sharing a working directory never pick up each
+    other's output, and a pass's output is a manifest lookup instead of a
+    scan for the newest file. Nothing is written until the first pass.
+    Runs are never removed automatically; see prune_runs.
+    """
+
+    def __init__(
+        self,
+        root=DEFAULT_WORKSPACE_ROOT,
+        cmd: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ):
+        self.root = Path(root)
+        self.run_id = run_id or _new_run_id()
+        self.run_dir = self.root / "runs" / self.run_id
+        self._lock = threading.Lock()
+        self._manifest = {"run_id": self.run_id, "cmd": cmd, "passes": []}
+        self._reserved = 0
+
+    @classmethod
+    def open(cls, run_dir) -> "RunWorkspace":
+        """An existing run, as recorded in its manifest."""
+        run_dir = Path(run_dir)
+        manifest = json.loads((run_dir / MANIFEST_NAME).read_text())
+        workspace = cls(run_dir.parent.parent, manifest.get("cmd"), run_dir.name)
+        workspace._manifest = manifest
+        workspace._reserved = len(manifest["passes"])
+        return workspace
+
+    def new_pass(self, kind: str) -> Path:
+        """Create and return an empty directory for the next pass of `kind`."""
+        with self._lock:
+            self._reserved += 1
+            pass_dir = self.run_dir / f"{self._reserved:02d}_{kind}"
+        pass_dir.mkdir(parents=True)
+        return pass_dir
+
+    def record(self, kind: str, pass_dir: Path, outputs: List) -> None:
+        """Add a finished pass and its output files to the manifest."""
+        entry = {
+            "kind": kind,
+            "dir": Path(pass_dir).name,
+            "outputs": [Path(p).relative_to(self.run_dir).as_posix() for p in outputs],
+        }
+        with self._lock:
+            self._manifest["passes"].append(entry)
+            tmp = self.run_dir / f".{MANIFEST_NAME}.{threading.get_ident()}"
+            tmp.write_text(json.dumps(self._manifest, indent=2))
+            os.replace(tmp, self.run_dir / MANIFEST_NAME)
+
+    def outputs(self, kind: str) -> List[Path]:
+        """Output files of the most recent pass of `kind`, empty if none ran."""
+        with self._lock:
+            passes = [p for p in self._manifest["passes"] if p["kind"] == kind]
+        if not passes:
+            return []
+        return [self.run_dir / p for p in passes[-1]["outputs"]]
+
+
+def prune_runs(root=DEFAULT_WORKSPACE_ROOT, keep: int = DEFAULT_KEEP_RUNS, exclude: Optional[str] = None) -> List[Path]:
+    """
+    Remove all but the `keep` newest runs under root, never the run named
+    exclude. Run ids start with their start time, so name order is age
+    order. Returns the removed run directories.
+    """
+    runs_dir = Path(root) / "runs"
+    try:
+        runs = sorted(p for p in runs_dir.iterdir() if p.is_dir())
+    except FileNotFoundError:
+        return []
+    stale = [p for p in runs[:max(len(runs) - keep, 0)] if p.name != exclude]
+    for run_dir in stale:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return stale
@@ -1,4 +1,4 @@
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 
 
@@ -44,6 +44,14 @@ class RooflineModel(BaseModel):
     bound: str
 
 
+class KernelRooflineModel(RooflineModel):
+    kernel: str
+    grid: Tuple[int, int, int]
+    block: Tuple[int, int, int]
+    dispatches: int
+    time_ns: int
+
+
 class ProfileModel(BaseModel):
     schema_version: str
     kernel: KernelModel
@@ -53,3 +61,5 @@ class ProfileModel(BaseModel):
     resources: Optional[ResourcesModel]
     occupancy: Optional[OccupancyModel]
     roofline: Optional[RooflineModel]
+    kernel_roofline: Optional[List[KernelRooflineModel]] = None
+    rocpd_db_paths: Optional[List[str]] = None
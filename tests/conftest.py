@@ -0,0 +1,10 @@
+import pytest
+
+from rocm_perf_lab.profiler import symbol_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_symbol_cache(tmp_path, monkeypatch):
+    # Keep the on-disk symbol and profile caches, and the demangling memo, per test
+    monkeypatch.setenv("ROCM_PERF_LAB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(symbol_cache, "_DEMANGLED", {})
@@ -0,0 +1,44 @@
+from rocm_perf_lab.analysis.critical_path import _infer_cross_queue_edges
+from .utils import synthetic_dispatch_rows
+
+
+def _nested_loop_edges(rows, threshold_ns):
+    # Reference O(N^2) heuristic the sweep replaces
+    nodes = sorted(rows, key=lambda r: r[3])
+    edges = []
+    for b_idx, b in enumerate(nodes):
+        best = None
+        best_gap = None
+        for a_idx, a in enumerate(nodes):
+            if a[2] == b[2]:
+                continue
+            if a[4] <= b[3]:
+                gap = b[3] - a[4]
+                if best_gap is None or gap < best_gap:
+                    best_gap = gap
+                    best = a_idx
+        if best is not None and best_gap <= threshold_ns:
+            edges.append((best, b_idx))
+    return nodes, edges
+
+
+def test_matches_nested_loop_heuristic():
+    rows, _ = synthetic_dispatch_rows(400, n_queues=5, seed=7)
+    # Force some equal end times to exercise tie-breaking
+    rows = [(d, k, q, s, e - (e % 5_000)) if e - (e % 5_000) > s else (d, k, q, s, e)
+            for d, k, q, s, e in rows]
+
+    for threshold_ns in (0, 1_000, 50_000):
+        nodes, expected = _nested_loop_edges(rows, threshold_ns)
+        src, dst = _infer_cross_queue_edges(
+            [n[2] for n in nodes],
+            [n[3] for n in nodes],
+            [n[4] for n in nodes],
+            threshold_ns,
+        )
+        assert list(zip(src.tolist(), dst.tolist())) == expected
+
+
+def test_no_edges_within_single_queue():
+    src, dst = _infer_cross_queue_edges([1, 1, 1], [0, 10, 20], [10, 20, 30], 50_000)
+    assert len(src) == 0 and len(dst) == 0
@@ -0,0 +1,50 @@
+import sqlite3
+
+from rocm_perf_lab.analysis.critical_path import analyze_critical_path, load_dispatch_table
+from .utils import create_test_db
+
+
+def test_symbols_are_interned():
+    db = create_test_db(
+        dispatch_rows=[
+            (1, 1, 1, 0, 10),
+            (2, 2, 1, 10, 30),
+            (3, 1, 1, 30, 45),
+        ],
+        symbol_rows=[
+            (1, "A", "A"),
+            (2, "B", "B"),
+        ],
+    )
+
+    conn = sqlite3.connect(db)
+    table = load_dispatch_table(conn)
+    conn.close()
+
+    assert table.symbol_names == ["A", "B"]
+    assert table.symbols.tolist() == [0, 1, 0]
+    assert table.durations.tolist() == [10, 20, 15]
+
+
+def test_modern_kernels_table(tmp_path):
+    db = tmp_path / "results.db"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE kernels (id INTEGER, kernel_id INTEGER, queue_id INTEGER, "
+        "start BIGINT, end BIGINT, name TEXT);"
+    )
+    conn.executemany(
+        "INSERT INTO kernels VALUES (?, ?, ?, ?, ?, ?);",
+        [
+            (1, 1, 1, 0, 10, "A"),
+            (2, 2, 1, 10, 30, "B"),
+            (3, 3, None, 31, 60, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    res = analyze_critical_path(str(db))
+
+    assert res.critical_kernel_ids == [1, 2, 3]
+    assert res.critical_kernel_names == ["A", "B", "unknown"]
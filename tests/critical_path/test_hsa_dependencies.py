@@ -0,0 +1,71 @@
+import sqlite3
+
+from rocm_perf_lab.analysis.critical_path import analyze_critical_path, build_dispatch_graph, read_dispatch_table
+
+
+def _create_traced_db(path, kernel_rows, region_rows):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE kernels (id INTEGER, kernel_id INTEGER, queue_id INTEGER, "
+        "start BIGINT, end BIGINT, name TEXT, tid INTEGER, corr_id INTEGER);"
+    )
+    conn.execute("CREATE TABLE regions (tid INTEGER, name TEXT, start BIGINT, end BIGINT, corr_id INTEGER);")
+    conn.executemany("INSERT INTO kernels VALUES (?, ?, ?, ?, ?, ?, ?, ?);", kernel_rows)
+    conn.executemany("INSERT INTO regions VALUES (?, ?, ?, ?, ?);", region_rows)
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def _edges(table):
+    graph = build_dispatch_graph(table)
+    return {
+        (int(table.ids[u]), int(table.ids[v]))
+        for u in range(len(table))
+        for v in graph.indices[graph.indptr[u]:graph.indptr[u + 1]].tolist()
+    }
+
+
+def test_wait_edges_supersede_gap_heuristic(tmp_path):
+    db = _create_traced_db(
+        tmp_path / "results.db",
+        kernel_rows=[
+            (1, 1, 1, 10, 100, "A", 1, 1),
+            (2, 2, 2, 200_000, 200_050, "B", 1, 2),
+            (3, 3, 3, 101, 150, "C", 2, 3),
+            (4, 4, 4, 120, 130, "D", 1, 4),
+        ],
+        region_rows=[
+            (1, "hipLaunchKernel", 0, 5, 1),
+            (1, "hipStreamSynchronize", 20, 105, 10),
+            (1, "hipLaunchKernel", 110, 115, 2),
+            (2, "hipLaunchKernel", 5, 8, 3),
+            (1, "hipLaunchKernel", 116, 118, 4),
+        ],
+    )
+
+    table = read_dispatch_table(db)
+    graph = build_dispatch_graph(table)
+
+    # A -> B is far beyond the gap threshold but ordered by the sync. A -> C
+    # is within the gap and no host wait explains it (it may be a device-side
+    # dependency), so the heuristic edge stays. A -> D comes from the sync
+    # alone; the heuristic's duplicate of it is dropped
+    assert _edges(table) == {(1, 2), (1, 3), (1, 4)}
+    assert len(graph.indices) == 3
+
+    res = analyze_critical_path(db)
+    assert res.critical_kernel_names == ["A", "B"]
+
+
+def test_untraced_dispatches_fall_back_to_heuristic(tmp_path):
+    db = _create_traced_db(
+        tmp_path / "results.db",
+        kernel_rows=[
+            (1, 1, 1, 10, 100, "A", 1, 1),
+            (2, 2, 2, 101, 150, "B", 2, 99),
+        ],
+        region_rows=[(1, "hipLaunchKernel", 0, 5, 1)],
+    )
+
+    assert _edges(read_dispatch_table(db)) == {(1, 2)}
@@ -0,0 +1,117 @@
+import sqlite3
+
+from rocm_perf_lab.analysis.critical_path import analyze_critical_path
+from rocm_perf_lab.analysis.critical_path_incremental import IncrementalCriticalPath
+from .utils import create_test_db, synthetic_dispatch_rows
+
+
+def _append(db, rows):
+    conn = sqlite3.connect(db)
+    conn.executemany("INSERT INTO rocpd_kernel_dispatch_test VALUES (?, ?, ?, ?, ?);", rows)
+    conn.commit()
+    conn.close()
+
+
+def _short_rows(n, seed):
+    # Keep total runtime under 5ms so the 50us threshold floor applies throughout
+    # and renumber in start order, the order a live trace is appended in
+    rows, symbols = synthetic_dispatch_rows(n, n_queues=3, n_symbols=6, seed=seed)
+    rows.sort(key=lambda r: r[3])
+    scaled = [(i + 1, k, q, s // 100, e // 100) for i, (_, k, q, s, e) in enumerate(rows)]
+    return scaled, symbols
+
+
+def test_incremental_matches_full_analysis(tmp_path):
+    rows, symbols = _short_rows(600, seed=3)
+    db = create_test_db(dispatch_rows=rows[:200], symbol_rows=symbols)
+    checkpoint = tmp_path / "ckpt"
+
+    for lo, hi in ((0, 200), (200, 350), (350, 600)):
+        if lo:
+            _append(db, rows[lo:hi])
+
+        incremental = analyze_critical_path(db, checkpoint_dir=str(checkpoint))
+        full = analyze_critical_path(db)
+
+        assert vars(incremental) == vars(full)
+
+
+def test_refresh_ingests_only_new_dispatches(tmp_path):
+    db = create_test_db(
+        dispatch_rows=[(1, 1, 1, 0, 10), (2, 2, 1, 10, 30)],
+        symbol_rows=[(1, "A", "A"), (2, "B", "B")],
+    )
+
+    tracker = IncrementalCriticalPath(db, tmp_path)
+    assert tracker.refresh().critical_kernel_ids == [1, 2]
+
+    _append(db, [(3, 1, 2, 31, 60)])
+
+    reopened = IncrementalCriticalPath(db, tmp_path)
+    res = reopened.refresh()
+
+    assert reopened.state["node_count"] == 3
+    assert res.critical_kernel_ids == [1, 2, 3]
+    assert reopened.symbol_totals == {"A": (2, 39), "B": (1, 20)}
+
+
+def test_incremental_rebuilds_when_threshold_drifts(tmp_path):
+    # 1 -> 2 is an 80us cross-queue gap, rejected under the 50us floor
+    db = create_test_db(
+        dispatch_rows=[(1, 1, 1, 0, 60_000), (2, 2, 2, 140_000, 150_000)],
+        symbol_rows=[(1, "A", "A"), (2, "B", "B")],
+    )
+    tracker = IncrementalCriticalPath(db, tmp_path)
+    assert tracker.refresh().critical_kernel_ids == [1]
+
+    # Runtime grows to 10ms, so the threshold (100us) now admits 1 -> 2
+    _append(db, [(3, 1, 2, 150_000, 10_000_000)])
+
+    incremental = analyze_critical_path(db, checkpoint_dir=str(tmp_path))
+    full = analyze_critical_path(db)
+
+    assert incremental.critical_kernel_ids == [1, 2, 3]
+    assert vars(incremental) == vars(full)
+
+
+def test_checkpoint_of_another_version_is_rebuilt(tmp_path):
+    import json
+
+    db = create_test_db(
+        dispatch_rows=[(1, 1, 1, 0, 10), (2, 2, 1, 10, 30)],
+        symbol_rows=[(1, "A", "A"), (2, "B", "B")],
+    )
+    IncrementalCriticalPath(db, tmp_path).refresh()
+    state = json.loads((tmp_path / "state.json").read_text())
+    state["version"] = 1
+    (tmp_path / "state.json").write_text(json.dumps(state))
+
+    reopened = IncrementalCriticalPath(db, tmp_path)
+    assert reopened.state["node_count"] == 0
+    assert reopened.refresh().critical_kernel_ids == [1, 2]
+
+
+def test_traced_db_matches_full_analysis(tmp_path):
+    from .test_hsa_dependencies import _create_traced_db
+
+    # Only the sync orders A -> B; the gap heuristic alone would pick A -> C
+    db = _create_traced_db(
+        tmp_path / "results.db",
+        kernel_rows=[
+            (1, 1, 1, 10, 100, "A", 1, 1),
+            (2, 2, 2, 200_000, 200_050, "B", 1, 2),
+            (3, 3, 3, 101, 150, "C", 2, 3),
+        ],
+        region_rows=[
+            (1, "hipLaunchKernel", 0, 5, 1),
+            (1, "hipStreamSynchronize", 20, 105, 10),
+            (1, "hipLaunchKernel", 110, 115, 2),
+            (2, "hipLaunchKernel", 5, 8, 3),
+        ],
+    )
+
+    incremental = analyze_critical_path(db, checkpoint_dir=str(tmp_path / "ckpt"))
+    full = analyze_critical_path(db)
+
+    assert incremental.critical_kernel_names == ["A", "B"]
+    assert vars(incremental) == vars(full)
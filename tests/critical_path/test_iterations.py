@@ -0,0 +1,113 @@
+import numpy as np
+
+from rocm_perf_lab.analysis.iterations import analyze_iteration_critical_paths, detect_anchor_symbol
+from .test_hsa_dependencies import _create_traced_db
+from .utils import create_test_db
+
+
+def _periodic_db(steps=10, slow_step=7):
+    # init, init, then per step: load -> gemm -> norm on one queue
+    symbols = [(1, "init", "init"), (2, "load", "load"), (3, "gemm", "gemm"), (4, "norm", "norm")]
+    rows = []
+    t = 0
+    for kid in (1, 1):
+        rows.append((len(rows) + 1, kid, 1, t, t + 5))
+        t += 10
+
+    for step in range(steps):
+        for kid, dur in ((2, 10), (3, 100), (4, 20)):
+            if step == slow_step and kid == 4:
+                dur = 500
+            rows.append((len(rows) + 1, kid, 1, t, t + dur))
+            t += dur
+    return create_test_db(dispatch_rows=rows, symbol_rows=symbols)
+
+
+def test_detect_anchor_prefers_longest_period():
+    # "b" repeats twice per step at regular distance; "a" once per step
+    seq = np.array([0, 1, 2, 1, 2] * 6)
+    assert detect_anchor_symbol(seq) == 0
+
+
+def test_periodic_steps_detected():
+    res = analyze_iteration_critical_paths(_periodic_db(), max_workers=1)
+
+    assert res.anchor_symbol == "load"
+    assert res.iterations == 10
+    assert res.warmup_dispatches == 2
+    assert res.p50_makespan_ns == 130
+    assert res.makespan_ns.max() == 610
+    assert res.critical_path_ns.tolist() == res.makespan_ns.tolist()
+    assert res.slow_step_symbols == {"norm": 1.0}
+
+
+def test_marker_regex_and_process_pool():
+    res = analyze_iteration_critical_paths(_periodic_db(), marker="^gemm$", max_workers=2)
+
+    assert res.anchor_symbol == "^gemm$"
+    assert res.iterations == 10
+    assert res.warmup_dispatches == 3
+
+
+def test_steps_use_whole_trace_threshold():
+    # Each step: load on queue 1, then gemm on queue 2 after an 80us gap.
+    # A step alone (760us) keeps the 50us floor, but the 10ms trace allows
+    # 100us, so gemm depends on load in every step
+    symbols = [(1, "load", "load"), (2, "gemm", "gemm")]
+    rows = []
+    for step in range(10):
+        t = step * 1_000_000
+        rows.append((len(rows) + 1, 1, 1, t, t + 200_000))
+        rows.append((len(rows) + 1, 2, 2, t + 280_000, t + 780_000))
+    db = create_test_db(dispatch_rows=rows, symbol_rows=symbols)
+
+    res = analyze_iteration_critical_paths(db, max_workers=1)
+
+    assert res.iterations == 10
+    assert res.critical_path_ns.tolist() == [700_000] * 10
+
+
+def test_steps_use_trace_edges(tmp_path):
+    # B follows A on another queue well past any gap threshold, but was
+    # submitted after a sync that observed A
+    kernel_rows, region_rows = [], []
+    for step in range(4):
+        t = step * 1_000_000
+        a, b = 2 * step + 1, 2 * step + 2
+        kernel_rows += [(a, 1, 1, t + 10, t + 100, "A", 1, a), (b, 2, 2, t + 400_000, t + 400_050, "B", 1, b)]
+        region_rows += [
+            (1, "hipLaunchKernel", t, t + 5, a),
+            (1, "hipStreamSynchronize", t + 20, t + 105, 100 + step),
+            (1, "hipLaunchKernel", t + 110, t + 115, b),
+        ]
+    db = _create_traced_db(tmp_path / "results.db", kernel_rows, region_rows)
+
+    res = analyze_iteration_critical_paths(db, marker="^A$", max_workers=1)
+
+    assert res.iterations == 4
+    assert res.critical_path_ns.tolist() == [140] * 4
+
+
+def test_host_regions_indexed_once_for_all_steps(tmp_path, monkeypatch):
+    from rocm_perf_lab.profiler.rocpd_query import DispatchQuery
+
+    kernel_rows, region_rows = [], []
+    for step in range(6):
+        t = step * 1_000
+        kernel_rows.append((step + 1, 1, 1, t, t + 100, "A", 1, step + 1))
+        region_rows += [(1, "hipLaunchKernel", t, t + 5, step + 1), (1, "hipDeviceSynchronize", t + 10, t + 105, 100 + step)]
+    db = _create_traced_db(tmp_path / "results.db", kernel_rows, region_rows)
+
+    builds = []
+    build = DispatchQuery._ensure_regions_indexed
+
+    def counting(self):
+        if not self._regions_indexed:
+            builds.append(self)
+        build(self)
+
+    monkeypatch.setattr(DispatchQuery, "_ensure_regions_indexed", counting)
+    res = analyze_iteration_critical_paths(db, marker="^A$", max_workers=1)
+
+    assert res.iterations == 6
+    assert len(builds) == 1
@@ -0,0 +1,60 @@
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import (
+    _longest_path,
+    build_dispatch_graph,
+    build_dispatch_levels,
+    critical_path_from_table,
+    graph_levels,
+    read_dispatch_table,
+)
+from rocm_perf_lab.analysis.slack import slack_from_table
+from rocm_perf_lab.analysis.top_k_paths import top_k_paths_from_table
+from rocm_perf_lab.analysis.what_if import speedup_ceiling
+from .utils import create_synthetic_db
+
+
+def _reference(graph, durations, reverse=False):
+    n = len(durations)
+    edges = [(u, v) for u in range(n) for v in graph.indices[graph.indptr[u]:graph.indptr[u + 1]].tolist()]
+    if reverse:
+        edges = [(v, u) for u, v in edges]
+    dp = durations.tolist()
+    # Row order is topological here: every edge goes forward in start order
+    for u, v in sorted(edges, key=lambda e: e[0], reverse=reverse):
+        dp[v] = max(dp[v], dp[u] + int(durations[v]))
+    return dp
+
+
+def test_level_dp_matches_sequential_reference():
+    table = read_dispatch_table(create_synthetic_db(500, n_queues=5, seed=7))
+    graph = build_dispatch_graph(table)
+    levels = graph_levels(graph)
+    durations = table.durations
+
+    forward, parent = _longest_path(levels, durations)
+    backward, _ = _longest_path(levels, durations, reverse=True, parents=False)
+
+    assert forward.tolist() == _reference(graph, durations)
+    assert backward.tolist() == _reference(graph, durations, reverse=True)
+
+    # Parents lie on a longest path; heads have none
+    has_parent = parent >= 0
+    assert np.array_equal(forward[parent[has_parent]] + durations[has_parent], forward[has_parent])
+    assert np.array_equal(forward[~has_parent], durations[~has_parent])
+
+    # Every predecessor sits in an earlier level
+    level_of = np.repeat(np.arange(len(levels.bounds) - 1), np.diff(levels.bounds))[np.argsort(levels.order)]
+    src = np.repeat(np.arange(len(table)), np.diff(graph.indptr))
+    assert (level_of[src] < level_of[graph.indices]).all()
+
+
+def test_analyses_share_prebuilt_levels():
+    table = read_dispatch_table(create_synthetic_db(300, n_queues=4, seed=11))
+    levels = build_dispatch_levels(table)
+    dominant = critical_path_from_table(table).dominant_symbol_name
+
+    assert vars(critical_path_from_table(table, levels=levels)) == vars(critical_path_from_table(table))
+    assert slack_from_table(table, levels=levels).near_critical_ids == slack_from_table(table).near_critical_ids
+    assert top_k_paths_from_table(table, 4, levels=levels).lengths_ns == top_k_paths_from_table(table, 4).lengths_ns
+    assert speedup_ceiling(table, dominant, levels=levels) == speedup_ceiling(table, dominant)
@@ -0,0 +1,65 @@
+import numpy as np
+
+from rocm_perf_lab.analysis.multi_process import (
+    analyze_multi_process_critical_path,
+    merge_process_traces,
+)
+from rocm_perf_lab.analysis.slack import slack_from_table
+from rocm_perf_lab.analysis.top_k_paths import top_k_paths_from_table
+from .utils import create_test_db
+
+
+def _rank_dbs():
+    # Rank 0 runs A then hands off to rank 1's C; both use queue id 1
+    rank0 = create_test_db(
+        dispatch_rows=[(1, 1, 1, 0, 10), (2, 2, 1, 100_000, 100_005)],
+        symbol_rows=[(1, "A", "A"), (2, "B", "B")],
+    )
+    rank1 = create_test_db(
+        dispatch_rows=[(1, 1, 1, 12, 40)],
+        symbol_rows=[(1, "C", "C")],
+    )
+    return [rank0, rank1]
+
+
+def test_queues_are_process_qualified():
+    merged = merge_process_traces(_rank_dbs(), align="shared", max_workers=1)
+
+    assert len(merged.queue_labels) == 2
+    assert merged.table.ids.tolist() == [1, 4, 2]
+    assert merged.processes.tolist() == [0, 1, 0]
+    assert sorted(merged.table.symbol_names) == ["A", "B", "C"]
+
+
+def test_cross_rank_critical_path():
+    res = analyze_multi_process_critical_path(_rank_dbs(), align="shared")
+
+    assert res.critical_path.critical_kernel_names == ["A", "C"]
+    assert res.critical_processes == [0, 1]
+    assert res.critical_local_ids == [1, 1]
+    assert res.critical_path.dominant_symbol_name == "C"
+
+
+def test_first_dispatch_alignment():
+    merged = merge_process_traces(_rank_dbs(), align="first-dispatch", max_workers=1)
+
+    assert merged.clock_offsets_ns == [0, -12]
+    assert merged.table.starts.tolist()[:2] == [0, 0]
+
+
+def test_overlapping_dispatch_ids_stay_distinct():
+    merged = merge_process_traces(_rank_dbs(), align="shared", max_workers=1)
+    table = merged.table
+
+    assert len(set(table.ids.tolist())) == len(table)
+    assert merged.id_offsets == [0, 3]
+    assert merged.local_ids(np.arange(len(table))).tolist() == [1, 1, 2]
+
+    res = analyze_multi_process_critical_path(_rank_dbs(), align="shared")
+    assert len(res.critical_path.dispatch_contributions) == 2
+
+    top = top_k_paths_from_table(table, 2)
+    assert top.paths[0].critical_kernel_ids == [1, 4]
+
+    slack = slack_from_table(table)
+    assert slack.near_critical_ids == [1, 4]
@@ -0,0 +1,41 @@
+from rocm_perf_lab.analysis.slack import analyze_slack
+from .utils import create_test_db
+
+
+def test_slack_on_parallel_streams():
+    db = create_test_db(
+        dispatch_rows=[
+            (1, 1, 1, 0, 10),
+            (2, 2, 1, 10, 30),
+            (3, 3, 2, 12, 17),  # side stream after A, no successor
+        ],
+        symbol_rows=[
+            (1, "A", "A"),
+            (2, "B", "B"),
+            (3, "C", "C"),
+        ],
+    )
+
+    res = analyze_slack(db, near_critical_threshold=0.1)
+
+    assert res.makespan_ns == 30
+    assert dict(zip(res.dispatch_ids.tolist(), res.slack_ns.tolist())) == {1: 0, 2: 0, 3: 15}
+    assert res.near_critical_ids == [1, 2]
+    assert res.zero_gain_symbols() == ["C"]
+    assert res.symbol_slack["C"]["min_slack_ns"] == 15
+
+
+def test_near_critical_threshold():
+    db = create_test_db(
+        dispatch_rows=[
+            (1, 1, 1, 0, 100),
+            (2, 2, 2, 0, 97),
+        ],
+        symbol_rows=[
+            (1, "A", "A"),
+            (2, "B", "B"),
+        ],
+    )
+
+    assert analyze_slack(db, near_critical_threshold=0.05).near_critical_ids == [1, 2]
+    assert analyze_slack(db, near_critical_threshold=0.01).near_critical_ids == [1]
@@ -0,0 +1,46 @@
+from rocm_perf_lab.analysis.critical_path import build_dispatch_graph, critical_path_from_table, read_dispatch_table
+from rocm_perf_lab.analysis.top_k_paths import analyze_top_k_paths, top_k_paths_from_table
+from .utils import create_synthetic_db, create_test_db
+
+
+def test_fork_reports_both_branches():
+    db = create_test_db(
+        dispatch_rows=[
+            (1, 1, 1, 0, 10),
+            (2, 2, 2, 11, 51),  # after A
+            (3, 3, 3, 11, 50),  # after A, nearly as long as B
+            (4, 4, 1, 52, 62),  # after B
+        ],
+        symbol_rows=[(1, "A", "A"), (2, "B", "B"), (3, "C", "C"), (4, "D", "D")],
+    )
+
+    res = analyze_top_k_paths(db, k=2)
+
+    assert res.lengths_ns == [60, 49]
+    assert [p.critical_kernel_ids for p in res.paths] == [[1, 2, 4], [1, 3]]
+    assert list(res.shared_symbols) == ["A"]
+    assert res.shared_symbols["A"] == 10 / 60
+
+
+def _all_path_lengths(table):
+    graph = build_dispatch_graph(table)
+    durations = table.durations.tolist()
+    succ = [sorted(set(graph.indices[graph.indptr[u]:graph.indptr[u + 1]].tolist())) for u in range(len(table))]
+
+    lengths = []
+    stack = [(s, durations[s]) for s in range(len(table)) if graph.indegree[s] == 0]
+    while stack:
+        u, length = stack.pop()
+        if not succ[u]:
+            lengths.append(length)
+        stack.extend((v, length + durations[v]) for v in succ[u])
+    return sorted(lengths, reverse=True)
+
+
+def test_matches_exhaustive_enumeration():
+    table = read_dispatch_table(create_synthetic_db(40, n_queues=3, seed=3))
+
+    res = top_k_paths_from_table(table, k=8)
+
+    assert res.lengths_ns == _all_path_lengths(table)[:8]
+    assert res.paths[0].critical_path_ns == critical_path_from_table(table).critical_path_ns
@@ -0,0 +1,51 @@
+import numpy as np
+
+from rocm_perf_lab.analysis.critical_path import critical_path_from_table, read_dispatch_table
+from rocm_perf_lab.analysis.what_if import speedup_ceiling, what_if_from_table
+from .utils import create_synthetic_db, create_test_db
+
+
+def _two_queue_db():
+    # Queue 1: A(100) ; queue 2: B(60) -> C(30), independent of A
+    return create_test_db(
+        dispatch_rows=[
+            (1, 1, 1, 0, 100),
+            (2, 2, 2, 0, 60),
+            (3, 3, 2, 60, 90),
+        ],
+        symbol_rows=[(1, "A", "A"), (2, "B", "B"), (3, "C", "C")],
+    )
+
+
+def test_scenarios_shift_dominance():
+    table = read_dispatch_table(_two_queue_db())
+
+    res = what_if_from_table(table, ["A", "B"], [[1.0, 1.0], [2.0, 1.0], [4.0, 2.0]])
+
+    assert res.baseline_makespan_ns == 100
+    assert res.makespan_ns.tolist() == [100.0, 90.0, 60.0]
+    assert res.dominant_symbols == ["A", "B", "B"]
+
+
+def test_ceiling_is_bounded_by_other_paths():
+    table = read_dispatch_table(_two_queue_db())
+
+    # 1 / (1 - fraction) would be unbounded for A; queue 2 still needs 90ns
+    assert speedup_ceiling(table, "A") == 100 / 90
+
+
+def test_ceiling_reuses_known_baseline():
+    table = read_dispatch_table(_two_queue_db())
+    baseline = critical_path_from_table(table).critical_path_ns
+
+    assert speedup_ceiling(table, "A", baseline_makespan_ns=baseline) == speedup_ceiling(table, "A")
+
+
+def test_identity_scenario_matches_critical_path():
+    table = read_dispatch_table(create_synthetic_db(2_000))
+
+    res = what_if_from_table(table, table.symbol_names, np.ones((3, len(table.symbol_names))))
+    cp = critical_path_from_table(table)
+
+    assert res.makespan_ns.tolist() == [cp.critical_path_ns] * 3
+    assert res.dominant_symbols == [cp.dominant_symbol_name] * 3
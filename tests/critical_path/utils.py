@@ -38,3 +38,34 @@ def create_test_db(dispatch_rows, symbol_rows):
     conn.commit()
     conn.close()
     return tmp.name
+
+
+def synthetic_dispatch_rows(n_dispatches, n_queues=4, n_symbols=16, seed=0):
+    """
+    Generate dispatch/symbol rows for n_dispatches kernels spread across
+    n_queues, with small random gaps so cross-queue edges get inferred.
+    """
+    import random
+
+    rng = random.Random(seed)
+    clocks = [0] * n_queues
+    dispatch_rows = []
+
+    for did in range(1, n_dispatches + 1):
+        queue = rng.randrange(n_queues)
+        start = clocks[queue] + rng.randrange(0, 2_000)
+        end = start + rng.randrange(1_000, 100_000)
+        clocks[queue] = end
+        dispatch_rows.append((did, rng.randrange(n_symbols) + 1, queue + 1, start, end))
+
+    symbol_rows = [
+        (sid, f"kernel_{sid}", f"_Z8kernel_{sid}v") for sid in range(1, n_symbols + 1)
+    ]
+    return dispatch_rows, symbol_rows
+
+
+def create_synthetic_db(n_dispatches, n_queues=4, n_symbols=16, seed=0):
+    dispatch_rows, symbol_rows = synthetic_dispatch_rows(
+        n_dispatches, n_queues=n_queues, n_symbols=n_symbols, seed=seed
+    )
+    return create_test_db(dispatch_rows=dispatch_rows, symbol_rows=symbol_rows)
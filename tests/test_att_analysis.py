@@ -0,0 +1,166 @@
+import json
+
+import numpy as np
+import pytest
+
+from rocm_perf_lab.analysis.att_analysis import (
+    analyze_att,
+    analyze_att_dispatches,
+    att_totals,
+    iter_att_code,
+    read_att_code,
+)
+
+
+def _row(i, isa, hits, latency, stall, idle):
+    return [isa, 0, i, f"kernel.cpp:{i}", 0, 0x1000 + 4 * i, hits, latency, stall, idle]
+
+
+# ISA text with brackets and commas, as real code.json rows carry
+_ROWS = [
+    _row(1, "s_load_dwordx2 s[0:1], s[4:5], 0x0", 10, 40, 0, 2),
+    _row(2, "global_load_dword v1, v[2:3], off", 10, 400, 300, 10),
+    _row(3, "s_waitcnt vmcnt(0)", 10, 20, 250, 0),
+    _row(4, "v_add_f32 v1, v1, v1", 30, 30, 0, 0),
+    _row(5, 'ds_read_b32 v2, v3 ; "], ["', 5, 60, 10, 0),
+    _row(6, "global_store_dword v[2:3], v1, off", 10, 200, 0, 5),
+]
+
+
+def _write(tmp_path, rows, **extra):
+    (tmp_path / "code.json").write_text(json.dumps({"version": 2, **extra, "code": rows, "isa": [["x"], ["y"]]}))
+    return tmp_path
+
+
+def _mkdir(path):
+    path.mkdir(parents=True)
+    return path
+
+
+def test_analysis_matches_row_by_row_reference(tmp_path):
+    result = analyze_att(_write(tmp_path, _ROWS))
+
+    hits = sum(r[6] for r in _ROWS)
+    cycles = sum(r[7] + r[8] + r[9] for r in _ROWS)
+    assert result.total_cycles == cycles
+    assert result.ipc == pytest.approx(hits / cycles)
+    assert result.stall_fraction == pytest.approx(sum(r[8] for r in _ROWS) / cycles)
+    assert result.instruction_mix == pytest.approx({"SALU": 20 / hits, "VMEM": 20 / hits, "VALU": 30 / hits, "LDS": 5 / hits})
+    assert result.avg_memory_latency == pytest.approx((400 + 200) / 2)
+
+
+def test_streaming_is_independent_of_chunk_and_block_size(tmp_path):
+    rows = [_row(i, _ROWS[i % len(_ROWS)][0], i % 7, i, i % 3, 1) for i in range(500)]
+    code_json = _write(tmp_path, rows, padding="x" * 100) / "code.json"
+    expected = read_att_code(code_json)
+
+    for chunk in (7, 64, 1000):
+        blocks = list(iter_att_code(code_json, block_rows=33, chunk_chars=chunk))
+        assert sum(len(b) for b in blocks) == len(rows)
+        assert all(len(b) <= 33 for b in blocks)
+        for name in ("isa_ids", "source_ids", "class_ids", "addresses", "hits", "latency", "stall", "idle"):
+            assert np.array_equal(np.concatenate([getattr(b, name) for b in blocks]), getattr(expected, name))
+
+    assert [expected.isa[i] for i in expected.isa_ids[:len(_ROWS)]] == [r[0] for r in _ROWS]
+
+
+def test_empty_or_missing_code_is_an_empty_result(tmp_path):
+    assert analyze_att(_write(tmp_path, [])).total_cycles == 0.0
+    (tmp_path / "code.json").write_text(json.dumps({"version": 2}))
+    assert analyze_att(tmp_path).instruction_mix == {}
+
+
+def test_truncated_code_json_raises(tmp_path):
+    text = json.dumps({"code": _ROWS})
+    (tmp_path / "code.json").write_text(text[: len(text) // 2])
+    with pytest.raises(ValueError):
+        analyze_att(tmp_path)
+
+
+def test_dispatches_and_shader_engines_merge_weighted(tmp_path):
+    att_dir = tmp_path / "att"
+    _write(_mkdir(att_dir / "ui_output_agent_1_dispatch_1"), _ROWS[:3])
+    _write(_mkdir(att_dir / "ui_output_agent_1_dispatch_2" / "se0"), _ROWS[3:5])
+    _write(_mkdir(att_dir / "ui_output_agent_1_dispatch_2" / "se1"), _ROWS[5:])
+    _write(_mkdir(tmp_path / "all"), _ROWS)
+
+    for workers in (1, 2):
+        run = analyze_att_dispatches(att_dir, max_workers=workers)
+        assert sorted(run.per_dispatch) == ["ui_output_agent_1_dispatch_1", "ui_output_agent_1_dispatch_2"]
+        assert run.combined == analyze_att(tmp_path / "all")
+        assert run.per_dispatch["ui_output_agent_1_dispatch_1"] == analyze_att(att_dir / "ui_output_agent_1_dispatch_1")
+
+    # A single dispatch dir is analyzed on its own
+    single = analyze_att_dispatches(att_dir / "ui_output_agent_1_dispatch_1")
+    assert list(single.per_dispatch) == ["ui_output_agent_1_dispatch_1"]
+
+
+def test_decoded_sidecar_is_reused_until_code_json_changes(tmp_path, monkeypatch):
+    from rocm_perf_lab.analysis import att_analysis
+    from rocm_perf_lab.profiler.profile_cache import tree_digest
+
+    code_json = _write(tmp_path, _ROWS) / "code.json"
+    digest = tree_digest(tmp_path)
+    first = analyze_att(tmp_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".code.json.bin", ".code.json.meta.json", "code.json"]
+    # Sidecars do not change what the dispatch dir hashes to
+    assert tree_digest(tmp_path) == digest
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("code.json parsed again")
+
+    monkeypatch.setattr(att_analysis, "iter_att_code", no_parse)
+    assert analyze_att(tmp_path) == first
+    cached = read_att_code(code_json)
+    assert [cached.isa[i] for i in cached.isa_ids] == [r[0] for r in _ROWS]
+    assert cached.hits.tolist() == [r[6] for r in _ROWS]
+    assert [cached.sources[i] for i in cached.source_ids] == [r[3] for r in _ROWS]
+
+    monkeypatch.undo()
+    _write(tmp_path, _ROWS[:2])
+    assert analyze_att(tmp_path).total_cycles == sum(r[7] + r[8] + r[9] for r in _ROWS[:2])
+
+
+def test_wait_stalls_are_attributed_to_the_memory_type_waited_on(tmp_path):
+    rows = [
+        _row(1, "global_load_dword v1, v[2:3], off", 10, 3000, 0, 0),
+        _row(2, "ds_read_b32 v2, v3", 10, 1000, 0, 0),
+        _row(3, "s_load_dwordx2 s[0:1], s[4:5], 0x0", 10, 500, 0, 0),
+        # Only the LDS and scalar loads count against lgkmcnt: split 1000:500
+        _row(4, "s_waitcnt lgkmcnt(0)", 10, 10, 300, 0),
+        _row(5, "s_waitcnt vmcnt(0) lgkmcnt(0)", 10, 10, 200, 0),
+        _row(6, "v_add_f32 v1, v1, v2", 10, 10, 100, 0),
+        # Nothing issued since the last waits: goes by the kernel's latencies
+        _row(7, "s_waitcnt_vscnt null, 0x0", 10, 10, 400, 0),
+        _row(8, "s_wait_dscnt 0x0", 10, 10, 0, 0),
+        _row(9, "s_waitcnt_depctr 0xffe3", 10, 10, 0, 0),
+    ]
+    result = analyze_att(_write(tmp_path, rows))
+
+    assert result.memory_latency == pytest.approx({"VMEM": 300, "LDS": 100, "SMEM": 50})
+    assert result.stall_breakdown == pytest.approx({"VMEM": 0.6, "LDS": 0.2, "SMEM": 0.1, "Other": 0.1})
+
+    # Streaming block by block matches the sidecar's single pass, also when
+    # waits and the operations they drain fall in different blocks
+    for sidecar in tmp_path.glob(".code.json.*"):
+        sidecar.unlink()
+    assert analyze_att(tmp_path) == result
+    for block_rows in (1, 2, 4):
+        streamed = att_totals(tmp_path / "code.json", use_sidecar=False, block_rows=block_rows).result()
+        assert streamed.memory_latency == pytest.approx(result.memory_latency)
+        assert streamed.stall_breakdown == pytest.approx(result.stall_breakdown)
+
+
+def test_classifier_separates_memory_types_by_waits():
+    from rocm_perf_lab.analysis.bottleneck_classifier import classify_bottleneck
+
+    def classify(breakdown, latency):
+        return classify_bottleneck(0.6, {"VALU": 0.6, "VMEM": 0.1}, None, 50.0, breakdown, latency)
+
+    lds = classify({"LDS": 0.7, "VMEM": 0.25, "Other": 0.05}, {"LDS": 400.0, "VMEM": 600.0})
+    assert (lds.primary, lds.secondary) == ("LDS Bank Conflicts", "Memory Latency Bound")
+    assert classify({"LDS": 0.7}, {"LDS": 60.0}).primary == "LDS Latency Bound"
+    assert classify({"SMEM": 0.8}, {"SMEM": 200.0}).primary == "Scalar Load Latency"
+    # Global memory latency without a high count-weighted average
+    assert classify({"VMEM": 0.9}, {"VMEM": 500.0}).primary == "Memory Latency Bound"
+    assert classify({"VMEM": 0.3, "Other": 0.7}, {}).primary == "Mixed / Unclear"
@@ -0,0 +1,101 @@
+import json
+
+from rocm_perf_lab.analysis.att_hotspots import build_hotspot_index, hot_source_lines
+from rocm_perf_lab.optimization.transform_loop_unroll import apply_loop_unroll
+from rocm_perf_lab.profiler.symbol_cache import default_symbol_cache
+
+
+def _row(addr, isa, source, hits, latency, stall):
+    return [isa, 0, 0, source, 0, addr, hits, latency, stall, 0]
+
+
+# A loop from 0x1004 to the backward branch at 0x1010 (simm16 -4 dwords)
+_ROWS = [
+    _row(0x1000, "s_load_dwordx2 s[0:1], s[4:5], 0x0", "k.hip:5", 1, 40, 5),
+    _row(0x1004, "global_load_dword v1, v[2:3], off", "k.hip:9", 64, 400, 20),
+    _row(0x1008, "s_waitcnt vmcnt(0)", "k.hip:9", 64, 10, 900),
+    _row(0x100C, "v_add_f32 v1, v1, v1", "k.hip:10", 64, 64, 0),
+    _row(0x1010, "s_cbranch_scc1 65532", "k.hip:8", 64, 64, 30),
+    _row(0x1014, "global_store_dword v[2:3], v1, off", "k.hip:12", 1, 200, 50),
+    _row(0x1018, "s_endpgm", "", 1, 1, 0),
+]
+
+
+def _write(path, rows):
+    path.mkdir(parents=True)
+    (path / "code.json").write_text(json.dumps({"version": 2, "code": rows}))
+
+
+def test_blocks_loops_and_lines_ranked_by_stall(tmp_path):
+    _write(tmp_path / "ui_output_agent_1_dispatch_1", _ROWS)
+    index = build_hotspot_index(tmp_path, top_k=3)
+
+    assert [i.address for i in index.by_stall] == [0x1008, 0x1014, 0x1010]
+    assert index.by_stall[0].source == "k.hip:9"
+    assert index.total_stall == sum(r[8] for r in _ROWS)
+
+    # Split at the branch target and after the branch
+    assert [(b.start, b.end) for b in index.blocks] == [(0x1004, 0x1010), (0x1014, 0x1018), (0x1000, 0x1000)]
+
+    loop = index.hot_loop()
+    assert (loop.start, loop.end, loop.stall) == (0x1004, 0x1010, 950)
+    assert [(l.line, l.stall) for l in loop.lines] == [(9, 920), (8, 30), (10, 0)]
+    assert [l.line for l in index.lines] == [9, 12, 8]
+
+
+def test_source_filter_applies_to_loop_lines(tmp_path):
+    rows = [r[:3] + ["other.hip:3"] + r[4:] if r[3] == "k.hip:8" else r for r in _ROWS]
+    _write(tmp_path / "d", rows)
+    index = build_hotspot_index(tmp_path / "d").for_source("k.hip")
+
+    assert [l.line for l in index.hot_loop().lines] == [9, 10]
+    assert [l.line for l in index.lines] == [9, 12, 5, 10]
+    assert all(l["file"] == "k.hip" for loop in index.to_dict()["loops"] for l in loop["lines"])
+
+
+def test_call_targets_are_demangled_through_symbol_cache(tmp_path):
+    rows = _ROWS[:4] + [_row(0x1010, "s_add_u32 s4, s4, _Z6helperPf@rel32@lo+4", "k.hip:10", 64, 64, 70)]
+    _write(tmp_path / "d", rows)
+    index = build_hotspot_index(tmp_path / "d")
+
+    assert "s_add_u32 s4, s4, helper(float*)@rel32@lo+4" in [i.isa for i in index.by_stall]
+    assert default_symbol_cache().lookup(["_Z6helperPf"]) == {"_Z6helperPf": "helper(float*)"}
+
+
+def test_dispatches_are_summed_per_address(tmp_path):
+    _write(tmp_path / "ui_output_agent_1_dispatch_1", _ROWS)
+    _write(tmp_path / "ui_output_agent_1_dispatch_2" / "se0", _ROWS[5:6])
+    index = build_hotspot_index(tmp_path)
+
+    assert [i.address for i in index.by_stall[:2]] == [0x1008, 0x1014]
+    assert index.by_stall[1].stall == 100
+
+
+def test_hot_source_lines_prefer_the_hottest_loop(tmp_path):
+    _write(tmp_path / "d", _ROWS)
+    hotspots = build_hotspot_index(tmp_path / "d").to_dict()
+
+    assert hot_source_lines(hotspots, "k.hip") == [9, 8, 10]
+    assert hot_source_lines(hotspots, "other.hip") == []
+    assert hot_source_lines(None, "k.hip") == []
+
+
+def test_unroll_targets_the_loop_holding_the_hot_line(tmp_path):
+    source = tmp_path / "k.hip"
+    source.write_text(
+        "__global__ void kern(float* a, int n) {\n"
+        "    for (int i = 0; i < 4; ++i) {\n"
+        "        a[i] = 0;\n"
+        "    }\n"
+        "    for (int j = 0; j < n; ++j) {\n"
+        "        a[j] += 1;\n"
+        "    }\n"
+        "}\n"
+    )
+
+    first, _ = apply_loop_unroll(source, 0.5, "kern")
+    hot, _ = apply_loop_unroll(source, 0.5, "kern", hot_lines=[6])
+
+    assert first.splitlines()[1].lstrip().startswith("#pragma unroll")
+    assert hot.splitlines()[4].lstrip().startswith("#pragma unroll")
+    assert "for (int i" in hot.splitlines()[1]
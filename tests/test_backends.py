@@ -0,0 +1,167 @@
+from pathlib import Path
+
+import pytest
+
+from rocm_perf_lab.analysis.att_analysis import analyze_att
+from rocm_perf_lab.profiler import backends, extended_pipeline
+from rocm_perf_lab.profiler.att_runner import run_att
+from rocm_perf_lab.profiler.backends import (
+    KernelFilter,
+    ProfilerBackend,
+    RecordedBackend,
+    Rocprofv3Backend,
+    SyntheticBackend,
+    parse_backend,
+    set_backend,
+)
+from rocm_perf_lab.profiler.extended_pipeline import build_extended_profile
+from rocm_perf_lab.profiler.pipeline import build_profile
+from rocm_perf_lab.profiler.rocprof_adapter import run_with_rocprof, run_with_rocprof_counters
+from rocm_perf_lab.profiler.workspace import RunWorkspace
+
+
+@pytest.fixture
+def backend():
+    def use(b):
+        set_backend(b)
+        return b
+
+    yield use
+    set_backend(None)
+
+
+def test_synthetic_backend_runs_whole_pipeline(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    backend(SyntheticBackend(n_dispatches=2_000, n_queues=4, n_symbols=8))
+
+    profile = build_profile("./app", runs=2, roofline=True, persist_rocpd=True)
+    assert profile["kernel"]["name"].startswith("kernel_")
+    assert profile["gpu"]["architecture"] == "gfx942"
+    assert profile["stability"]["cv"] == 0.0
+    assert {row["kernel"] for row in profile["kernel_roofline"]} >= {profile["kernel"]["name"]}
+
+    extended = build_extended_profile(
+        profile, att_dispatch_dir=run_att("./app"), rocpd_db_paths=profile["rocpd_db_paths"]
+    )
+    assert extended["critical_path"]["critical_path_ns"] > 0
+    assert extended["att"]["stall_fraction"] > 0
+    # Trace-wide totals come back aggregated by SQLite
+    assert len(extended["critical_path"]["symbol_time_ns"]) == 8
+    assert len(extended["critical_path"]["queue_idle_ns"]) == 4
+    # Top-K paths and the speedup ceiling are opt-in
+    assert "speedup_ceiling" not in extended["critical_path"]
+
+    paths = build_extended_profile(profile, rocpd_db_paths=profile["rocpd_db_paths"], path_analysis=True)
+    assert paths["critical_path"]["speedup_ceiling"] >= 1.0
+    assert len(paths["critical_path"]["top_path_lengths_ns"]) > 0
+
+
+def test_hotspot_failure_keeps_att_summary(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    backend(SyntheticBackend(n_dispatches=500))
+
+    def fail(*args, **kwargs):
+        raise ValueError("bad code.json")
+
+    monkeypatch.setattr(extended_pipeline, "build_hotspot_index", fail)
+    profile = build_profile("./app", runs=1)
+    extended = build_extended_profile(profile, att_dispatch_dir=run_att("./app"))
+
+    assert extended["att"]["hotspots"] == {}
+    assert extended["att"]["stall_fraction"] > 0
+    assert extended["bottleneck"]["primary"]
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class TraceOnly(ProfilerBackend):
+        def kernel_trace(self, cmd, output_dir, full_trace=False, debug=False):
+            pass
+
+    with pytest.raises(TypeError):
+        TraceOnly()
+
+
+def test_synthetic_output_is_deterministic():
+    a, b = SyntheticBackend(500, seed=3).dispatches(), SyntheticBackend(500, seed=3).dispatches()
+    assert all((a[k] == b[k]).all() for k in a)
+    assert not (SyntheticBackend(500, seed=4).dispatches()["start"] == a["start"]).all()
+
+
+def test_recorded_backend_replays_captures(tmp_path, backend):
+    # Capture a recording from the synthetic backend
+    source = SyntheticBackend(n_dispatches=300, n_symbols=6)
+    recording = tmp_path / "recording"
+    source.kernel_trace("./app", str(recording / "trace"))
+    source.counters("./app", ["SQ_WAVES", "SQ_INSTS_VALU"], str(recording / "counters"))
+    source.att("./app", recording / "att")
+
+    backend(RecordedBackend(recording))
+
+    first = run_with_rocprof("./anything")
+    second = run_with_rocprof("./anything", workspace=RunWorkspace(tmp_path / "persisted"))
+    assert (first.kernel_name, first.kernel_time_ms) == (second.kernel_name, second.kernel_time_ms)
+    assert len(second.db_paths) == 1
+
+    counters = run_with_rocprof_counters("./anything", ["SQ_WAVES"])
+    assert counters["SQ_WAVES"] > 0
+
+    workspace = RunWorkspace(tmp_path / "work")
+    att_dir = run_att("./anything", workspace, use_cache=False)
+    (dispatch_dir,) = workspace.outputs("att")
+    assert dispatch_dir.parent == att_dir
+    assert analyze_att(dispatch_dir).ipc > 0
+
+
+def test_recorded_backend_without_counters_yields_none(tmp_path, backend):
+    (tmp_path / "trace").mkdir()
+    backend(RecordedBackend(tmp_path))
+    assert run_with_rocprof_counters("./app", ["SQ_WAVES"]) is None
+
+
+def test_parse_backend_specs(tmp_path, monkeypatch):
+    assert isinstance(parse_backend("rocprofv3"), Rocprofv3Backend)
+    assert parse_backend("recorded:" + str(tmp_path)).root == Path(tmp_path)
+    synthetic = parse_backend("synthetic:5000:2")
+    assert (synthetic.n_dispatches, synthetic.n_queues) == (5000, 2)
+    with pytest.raises(ValueError):
+        parse_backend("nvprof")
+
+    monkeypatch.setenv("ROCM_PERF_LAB_BACKEND", "synthetic:10")
+    assert backends.get_backend().n_dispatches == 10
+
+
+def test_env_backend_parsed_once_per_value(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "_env_backends", {})
+    recording = tmp_path / "recording"
+    (recording / "trace").mkdir(parents=True)
+    monkeypatch.setenv("ROCM_PERF_LAB_BACKEND", "recorded:" + str(recording))
+
+    first = backends.get_backend()
+    assert backends.get_backend() is first
+    assert first.fingerprint() is first.fingerprint()
+
+    monkeypatch.setenv("ROCM_PERF_LAB_BACKEND", "synthetic:10")
+    assert backends.get_backend() is not first
+
+
+def test_kernel_filter_matches_base_name():
+    f = KernelFilter.for_kernel("void ns::gemm<float>(float*, int)", dispatch_range=(1, 1))
+    assert f.matches("gemm(float*, int)")
+    assert not f.matches("gemm_tail(float*)")
+    assert not f.matches("sgemm(float*)")
+    assert f.rocprof_args() == ["--kernel-include-regex", f.include_regex, "--kernel-iteration-range", "[1-1]"]
+    assert KernelFilter().rocprof_args() == []
+
+
+def test_rocprofv3_passes_kernel_filter(monkeypatch):
+    launched = []
+    monkeypatch.setattr(backends.subprocess, "run", lambda argv, **kw: launched.append(argv))
+    f = KernelFilter.for_kernel("gemm", dispatch_range=(2, 3))
+
+    Rocprofv3Backend().counters("./app", ["SQ_WAVES"], "out", kernel_filter=f)
+    Rocprofv3Backend().att("./app", Path("."), kernel_filter=f)
+
+    for argv in launched:
+        assert argv[argv.index("--kernel-include-regex") + 1] == f.include_regex
+        assert argv[argv.index("--kernel-iteration-range") + 1] == "[2-3]"
+        assert argv.index("--kernel-iteration-range") < argv.index("--")
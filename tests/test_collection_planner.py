@@ -0,0 +1,126 @@
+import glob
+
+import pytest
+
+from rocm_perf_lab.hal.factory import build_arch_from_agent_metadata
+from rocm_perf_lab.profiler.backends import SyntheticBackend, set_backend
+from rocm_perf_lab.profiler.collection_planner import plan_collection, run_collection
+
+
+def _gfx942():
+    return build_arch_from_agent_metadata({
+        "arch_name": "gfx942",
+        "cu_count": 304,
+        "simd_per_cu": 4,
+        "max_waves_per_cu": 32,
+        "wave_size": 64,
+        "max_clock_mhz": 2100,
+    })
+
+
+class _CountingBackend(SyntheticBackend):
+    def __init__(self):
+        super().__init__(n_dispatches=500, n_symbols=6)
+        self.launches = []
+        self.filters = []
+        self.counter_groups = []
+
+    def kernel_trace(self, cmd, output_dir, full_trace=False, debug=False):
+        self.launches.append("full-trace" if full_trace else "kernel-trace")
+        super().kernel_trace(cmd, output_dir, full_trace, debug)
+
+    def counters(self, cmd, metrics, output_dir, debug=False, kernel_filter=None):
+        self.launches.append("pmc")
+        self.counter_groups.append(list(metrics))
+        self.filters.append(kernel_filter)
+        super().counters(cmd, metrics, output_dir, debug, kernel_filter)
+
+    def att(self, cmd, workdir, debug=False, kernel_filter=None):
+        self.launches.append("att")
+        self.filters.append(kernel_filter)
+        super().att(cmd, workdir, debug, kernel_filter)
+
+
+@pytest.fixture
+def backend():
+    b = _CountingBackend()
+    set_backend(b)
+    yield b
+    set_backend(None)
+
+
+def test_plan_counts_each_pass_once():
+    plan = plan_collection(runs=3, roofline=True, critical_path=True, att=True, arch=_gfx942())
+
+    assert [(p.kind, p.launches) for p in plan.passes] == [
+        ("kernel-trace", 2),
+        ("full-trace", 1),
+        ("pmc", 1),
+        ("att", 1),
+    ]
+    assert plan.launches == 5
+    assert plan.describe().startswith("Collection plan: 5 app launches")
+    # The full trace's overhead keeps it out of the timing sample
+    assert "timing" not in plan.passes[1].consumers
+
+
+def test_counter_passes_wait_for_an_unknown_arch(monkeypatch):
+    from rocm_perf_lab.profiler import collection_planner
+
+    monkeypatch.setattr(collection_planner, "local_arch_name", lambda: None)
+    plan = plan_collection(runs=2, roofline=True)
+
+    assert plan.launches == 2
+    assert not plan.counters_planned
+    assert "2+ app launches" in plan.describe()
+
+
+def test_run_collection_launches_exactly_the_plan(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    plan = plan_collection(runs=3, roofline=True, critical_path=True, att=True, arch=_gfx942())
+
+    profile = run_collection("./app", plan, use_cache=True)
+
+    assert sorted(backend.launches) == sorted(p.kind for p in plan.passes for _ in range(p.launches))
+    assert backend.counter_groups == [p.counters for p in plan.passes if p.kind == "pmc"]
+    # Only the full trace is persisted, and it feeds critical-path analysis
+    assert len(glob.glob(".rocpd_profile/**/*_results.db", recursive=True)) == 1
+    assert profile["critical_path"]["critical_path_ns"] > 0
+    assert profile["roofline"] is not None
+    assert "stall_fraction" in profile["att"]
+
+    # Counters sample every kernel; ATT traces one dispatch of the dominant one
+    pmc_filter, att_filter = backend.filters
+    assert pmc_filter is None
+    assert len(profile["kernel_roofline"]) > 1
+    assert profile["kernel"]["name"] in [row["kernel"] for row in profile["kernel_roofline"]]
+    assert att_filter.matches(profile["critical_path"]["dominant_symbol"])
+    assert att_filter.dispatch_range == (1, 1)
+
+    # A second collection of the unchanged workload is served from the cache
+    backend.launches.clear()
+    assert run_collection("./app", plan, use_cache=True) == profile
+    assert backend.launches == []
+
+
+def test_roofline_limited_to_profiled_kernel(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    plan = plan_collection(runs=1, roofline=True, arch=_gfx942(), roofline_all_kernels=False)
+
+    profile = run_collection("./app", plan)
+
+    (pmc_filter,) = backend.filters
+    assert pmc_filter.matches(profile["kernel"]["name"])
+    assert [row["kernel"] for row in profile["kernel_roofline"]] == [profile["kernel"]["name"]]
+
+
+def test_counter_passes_replanned_for_the_traced_gpu(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    plan = plan_collection(runs=1, roofline=True, arch=_gfx942())
+    # Planned on another machine: the synthetic trace reports a gfx942
+    plan.arch_name = "gfx90a"
+    plan.passes[-1].counters = ["SQ_WAVES"]
+
+    run_collection("./app", plan)
+
+    assert backend.counter_groups == plan_collection(runs=1, roofline=True, arch=_gfx942()).counter_passes(_gfx942())
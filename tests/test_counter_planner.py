@@ -0,0 +1,103 @@
+from rocm_perf_lab.hal.cdna3 import CDNA3
+from rocm_perf_lab.hal.rdna2 import RDNA2
+from rocm_perf_lab.profiler import rocprof_adapter
+from rocm_perf_lab.profiler.counter_planner import counter_block, plan_counter_passes
+
+
+def _cdna3_limits():
+    return CDNA3(
+        arch_name="gfx942",
+        cu_count=304,
+        simd_per_cu=4,
+        max_waves_per_cu=32,
+        wave_size=64,
+        max_clock_mhz=2100,
+    ).counter_block_limits
+
+
+def test_counter_block():
+    assert counter_block("SQ_INSTS_VALU") == "SQ"
+    assert counter_block("SQC_ICACHE_HITS") == "SQ"
+    assert counter_block("TCC_HIT[3]") == "TCC"
+
+
+def test_roofline_counters_share_one_pass():
+    counters = [
+        "SQ_INSTS_VALU",
+        "SQ_INSTS_VALU_MFMA_MOPS_F32",
+        "TCC_EA0_RDREQ",
+        "TCC_EA0_WRREQ",
+        "TCC_EA0_RDREQ_32B",
+        "TCC_EA0_WRREQ_32B",
+    ]
+
+    assert plan_counter_passes(counters, _cdna3_limits()) == [counters]
+
+
+def test_passes_bounded_by_fullest_block():
+    counters = [f"TCC_C{i}" for i in range(6)] + ["GRBM_COUNT", "GRBM_GUI_ACTIVE", "FOO_A", "FOO_B"]
+
+    passes = plan_counter_passes(counters, _cdna3_limits())
+
+    # TCC needs 2 passes at 4 per pass; the unknown FOO block gets 1 slot per pass
+    assert passes == [
+        ["TCC_C0", "TCC_C1", "TCC_C2", "TCC_C3", "GRBM_COUNT", "GRBM_GUI_ACTIVE", "FOO_A"],
+        ["TCC_C4", "TCC_C5", "FOO_B"],
+    ]
+
+
+def test_run_counter_passes_merges(monkeypatch):
+    launches = []
+
+    def fake_run(cmd, metrics, debug=False, per_dispatch=False, kernel_filter=None):
+        launches.append(list(metrics))
+        return {m: 1.0 for m in metrics}
+
+    monkeypatch.setattr(rocprof_adapter, "run_with_rocprof_counters", fake_run)
+
+    counters = [f"TCC_C{i}" for i in range(5)]
+    merged = rocprof_adapter.run_counter_passes("./app", counters, _cdna3_limits())
+
+    assert len(launches) == 2
+    assert merged == {c: 1.0 for c in counters}
+
+
+def test_failed_pass_retried_per_block(monkeypatch):
+    launches = []
+
+    def fake_run(cmd, metrics, debug=False, per_dispatch=False, kernel_filter=None):
+        launches.append(list(metrics))
+        # The driver rejects SQ and TCC counters packed together
+        if {m.split("_")[0] for m in metrics} == {"SQ", "TCC"}:
+            return None
+        return {m: 1.0 for m in metrics}
+
+    monkeypatch.setattr(rocprof_adapter, "run_with_rocprof_counters", fake_run)
+
+    counters = ["SQ_INSTS_VALU", "TCC_EA0_RDREQ"]
+    merged = rocprof_adapter.run_counter_passes("./app", counters, _cdna3_limits())
+
+    assert launches == [counters, ["SQ_INSTS_VALU"], ["TCC_EA0_RDREQ"]]
+    assert merged == {c: 1.0 for c in counters}
+
+
+def test_single_block_failure_gives_up(monkeypatch):
+    monkeypatch.setattr(rocprof_adapter, "run_with_rocprof_counters", lambda *a, **k: None)
+
+    assert rocprof_adapter.run_counter_passes("./app", ["SQ_WAVES"], _cdna3_limits()) is None
+
+
+def test_rdna2_limits_follow_gfx10_block_layout():
+    limits = RDNA2(
+        arch_name="gfx1030",
+        cu_count=80,
+        simd_per_cu=2,
+        max_waves_per_cu=32,
+        wave_size=32,
+        max_clock_mhz=2250,
+    ).counter_block_limits
+
+    assert "TCC" not in limits and limits["GL2C"] == 4
+    assert {k: v for k, v in limits.items() if k not in ("GL1C", "GL2C")} == {
+        k: v for k, v in _cdna3_limits().items() if k != "TCC"
+    }
@@ -0,0 +1,163 @@
+import os
+
+from rocm_perf_lab.profiler import att_runner, pipeline, profile_cache
+from rocm_perf_lab.profiler.profile_cache import ProfileCache, gpu_fingerprint, profile_key
+
+
+def _binary(tmp_path, content=b"\x7fELF v1"):
+    exe = tmp_path / "bin" / "app"
+    exe.parent.mkdir(exist_ok=True)
+    exe.write_bytes(content)
+    exe.chmod(0o755)
+    return exe
+
+
+def test_key_follows_binary_content_env_and_options(tmp_path, monkeypatch):
+    exe = _binary(tmp_path)
+    key = profile_key("profile", cmd=f"{exe} --n 4", roofline=False)
+
+    assert profile_key("profile", cmd=f"{exe} --n 4", roofline=False) == key
+    assert profile_key("profile", cmd=f"{exe} --n 4", roofline=True) != key
+    assert profile_key("profile", cmd=f"{exe} --n 8", roofline=False) != key
+
+    monkeypatch.setenv("HIP_VISIBLE_DEVICES", "1")
+    assert profile_key("profile", cmd=f"{exe} --n 4", roofline=False) != key
+    monkeypatch.delenv("HIP_VISIBLE_DEVICES")
+
+    # A rebuilt binary, or a changed code object beside it, is a new key
+    (exe.parent / "kernels.hsaco").write_bytes(b"co")
+    with_co = profile_key("profile", cmd=f"{exe} --n 4", roofline=False)
+    assert with_co != key
+
+    exe.write_bytes(b"\x7fELF v2")
+    os.utime(exe, ns=(1, 1))
+    assert profile_key("profile", cmd=f"{exe} --n 4", roofline=False) not in (key, with_co)
+
+
+def test_key_follows_loaded_libraries_and_rocm_version(tmp_path, monkeypatch):
+    exe = _binary(tmp_path)
+    lib = tmp_path / "lib" / "libamdhip64.so"
+    lib.parent.mkdir()
+    lib.write_bytes(b"hip 6.2")
+    monkeypatch.setattr(profile_cache, "_shared_library_closure", lambda path: [lib])
+    monkeypatch.setenv("ROCM_PATH", str(tmp_path / "rocm"))
+    key = profile_key("profile", cmd=str(exe))
+
+    # An upgraded runtime library outside the binary's directory
+    lib.write_bytes(b"hip 6.3.0")
+    assert profile_key("profile", cmd=str(exe)) != key
+    key = profile_key("profile", cmd=str(exe))
+
+    (tmp_path / "rocm" / ".info").mkdir(parents=True)
+    (tmp_path / "rocm" / ".info" / "version").write_text("6.3.0-39\n")
+    assert profile_key("profile", cmd=str(exe)) != key
+
+
+def test_gpu_fingerprint_ignores_the_active_dpm_level(tmp_path, monkeypatch):
+    device = tmp_path / "drm" / "card0" / "device"
+    device.mkdir(parents=True)
+    monkeypatch.setattr(profile_cache, "_DRM_ROOT", tmp_path / "drm")
+    monkeypatch.setattr(profile_cache, "_KFD_NODES", tmp_path / "kfd")
+
+    def read(level, active):
+        (device / "power_dpm_force_performance_level").write_text(level + "\n")
+        (device / "pp_dpm_sclk").write_text(
+            "\n".join(f"{i}: {mhz}Mhz" + (" *" if i == active else "") for i, mhz in enumerate((500, 1400, 2100)))
+        )
+        return gpu_fingerprint()
+
+    # Under auto the active level only reflects load
+    assert read("auto", 0) == read("auto", 2)
+    assert read("auto", 0) != read("profile_peak", 0)
+
+    # Under manual it is the pinned clock
+    assert read("manual", 0) != read("manual", 2)
+
+
+def test_entries_carry_artifacts_and_evict_least_recently_used(tmp_path):
+    cache = ProfileCache(tmp_path / "profiles", max_bytes=2500)
+    db = tmp_path / "run_results.db"
+    db.write_bytes(b"x" * 1000)
+
+    stored = cache.put("a" * 64, {"runtime_ms": 1.0}, {"db": db})
+    assert stored.result == {"runtime_ms": 1.0}
+    assert stored.artifacts["db"].read_bytes() == db.read_bytes()
+
+    cache.put("b" * 64, {"runtime_ms": 2.0}, {"db": db})
+    assert cache.get("a" * 64) is not None  # now more recent than b
+
+    cache.put("c" * 64, {"runtime_ms": 3.0}, {"db": db})
+    assert cache.get("b" * 64) is None
+    assert not (tmp_path / "profiles" / "bb" / ("b" * 64)).exists()
+    assert cache.get("a" * 64).result == {"runtime_ms": 1.0}
+    assert cache.get("c" * 64).result == {"runtime_ms": 3.0}
+
+
+def _fake_build(calls, db=None):
+    def build(cmd, runs, use_rocprof, clock_mhz, debug, roofline, memory_bandwidth_gbps, persist_rocpd,
+              roofline_all_kernels=True, workspace=None, plan=None):
+        calls.append(cmd)
+        profile = {"runtime_ms": float(len(calls))}
+        if db is not None:
+            profile["rocpd_db_paths"] = [str(db)]
+        return profile
+
+    return build
+
+
+def test_build_profile_reuses_cached_result(tmp_path, monkeypatch):
+    exe = _binary(tmp_path)
+    calls = []
+    monkeypatch.setattr(pipeline, "_build_profile", _fake_build(calls))
+
+    first = pipeline.build_profile(str(exe), use_cache=True)
+    assert pipeline.build_profile(str(exe), use_cache=True) == first
+    assert len(calls) == 1
+
+    assert pipeline.build_profile(str(exe), use_cache=True, refresh=True)["runtime_ms"] == 2.0
+    assert pipeline.build_profile(str(exe), use_cache=True)["runtime_ms"] == 2.0
+
+    # Library callers opt in; the default neither reads nor writes the cache
+    assert pipeline.build_profile(str(exe))["runtime_ms"] == 3.0
+    assert pipeline.build_profile(str(exe), use_cache=True)["runtime_ms"] == 2.0
+
+    # Different analyses are a different entry
+    pipeline.build_profile(str(exe), use_cache=True, roofline=True)
+    assert len(calls) == 4
+
+
+def test_cached_profile_keeps_its_results_db(tmp_path, monkeypatch):
+    exe = _binary(tmp_path)
+    db = tmp_path / ".rocpd_profile" / "app_results.db"
+    db.parent.mkdir()
+    db.write_bytes(b"rocpd")
+    monkeypatch.setattr(pipeline, "_build_profile", _fake_build([], db))
+
+    pipeline.build_profile(str(exe), use_cache=True, persist_rocpd=True)
+    db.unlink()
+
+    cached = pipeline.build_profile(str(exe), use_cache=True, persist_rocpd=True)
+    (cached_db,) = cached["rocpd_db_paths"]
+    assert cached_db != str(db)
+    assert open(cached_db, "rb").read() == b"rocpd"
+
+
+def test_run_att_reuses_cached_dispatch_dir(tmp_path, monkeypatch):
+    exe = _binary(tmp_path)
+    calls = []
+
+    def fake_run_att(cmd, workspace, kernel_filter=None):
+        calls.append(cmd)
+        out = tmp_path / f"ui_output_agent_{len(calls)}"
+        out.mkdir()
+        (out / "code.json").write_text("{}")
+        return out
+
+    monkeypatch.setattr(att_runner, "_run_att", fake_run_att)
+
+    first = att_runner.run_att(str(exe), use_cache=True)
+    second = att_runner.run_att(str(exe), use_cache=True)
+
+    assert first == second
+    assert (second / "code.json").read_text() == "{}"
+    assert calls == [str(exe)]
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from rocm_perf_lab.profiler.rocpd_query import DispatchQuery, connect_readonly
+from tests.critical_path.utils import create_test_db
+
+
+def _query():
+    db = create_test_db(
+        dispatch_rows=[
+            (1, 1, 1, 0, 10),
+            (2, 2, 1, 15, 30),
+            (3, 1, 2, 0, 5),
+            (4, 1, 1, 40, 45),
+        ],
+        symbol_rows=[
+            (1, "A", "_Z1Av"),
+            (2, None, "_Z1Bv"),
+        ],
+    )
+    return DispatchQuery(connect_readonly(db))
+
+
+def test_kernel_names_and_order():
+    query = _query()
+
+    assert query.kernel_names() == {1: "A", 2: "B()"}
+    assert query.kernel_names([2]) == {2: "B()"}
+    assert [row[0] for row in query.ordered_dispatches()] == [1, 3, 2, 4]
+
+
+def test_symbol_totals_and_bounds():
+    query = _query()
+
+    assert query.symbol_totals() == {"A": (3, 20), "B()": (1, 15)}
+    assert query.time_bounds() == (0, 45)
+
+
+def test_queue_gap_stats():
+    stats = _query().queue_gap_stats()
+
+    assert stats[1]["gaps"] == 2
+    assert stats[1]["idle_ns"] == 15
+    assert stats[1]["max_gap_ns"] == 10
+    assert stats[2]["gaps"] == 0
+
+
+def test_connection_is_read_only(tmp_path):
+    db = tmp_path / "r.db"
+    sqlite3.connect(db).execute("CREATE TABLE t (x INTEGER);")
+
+    conn = connect_readonly(db)
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO t VALUES (1);")
@@ -0,0 +1,87 @@
+import json
+import sqlite3
+import tempfile
+
+from rocm_perf_lab.profiler import rocprof_adapter
+from rocm_perf_lab.profiler.rocprof_adapter import demangle_many, parse_rocpd_sqlite
+
+
+def _create_results_db(dispatch_rows, symbol_rows):
+    tmp = tempfile.NamedTemporaryFile(suffix="_results.db", delete=False)
+    conn = sqlite3.connect(tmp.name)
+    conn.executescript("""
+        CREATE TABLE rocpd_kernel_dispatch_test (
+            id INTEGER PRIMARY KEY, kernel_id INTEGER, agent_id INTEGER, start BIGINT, end BIGINT,
+            workgroup_size_x INTEGER, workgroup_size_y INTEGER, workgroup_size_z INTEGER,
+            grid_size_x INTEGER, grid_size_y INTEGER, grid_size_z INTEGER
+        );
+        CREATE TABLE rocpd_info_kernel_symbol_test (
+            id INTEGER PRIMARY KEY, kernel_name TEXT, display_name TEXT,
+            arch_vgpr_count INTEGER, sgpr_count INTEGER, group_segment_size INTEGER
+        );
+        CREATE TABLE rocpd_info_agent (id INTEGER PRIMARY KEY, name TEXT, extdata TEXT);
+    """)
+    conn.executemany(
+        "INSERT INTO rocpd_kernel_dispatch_test VALUES (?, ?, 1, ?, ?, 64, 1, 1, 4096, 1, 1);",
+        dispatch_rows,
+    )
+    conn.executemany("INSERT INTO rocpd_info_kernel_symbol_test VALUES (?, ?, ?, 32, 16, 0);", symbol_rows)
+    conn.execute(
+        "INSERT INTO rocpd_info_agent VALUES (1, 'GFX942', ?);",
+        (json.dumps({
+            "cu_count": 304,
+            "simd_per_cu": 4,
+            "max_waves_per_cu": 32,
+            "wave_front_size": 64,
+            "max_engine_clk_fcompute": 2100,
+        }),),
+    )
+    conn.commit()
+    conn.close()
+    return tmp.name
+
+
+def test_skips_runtime_kernels():
+    db = _create_results_db(
+        dispatch_rows=[
+            (1, 1, 0, 500),  # runtime fill
+            (2, 2, 500, 700),
+            (3, 2, 700, 1000),
+            (4, 3, 1000, 1100),
+            (5, 9, 1100, 5000),  # no symbol row
+        ],
+        symbol_rows=[
+            (1, "_Z22__amd_rocclr_fillBufferv", "__amd_rocclr_fillBuffer"),
+            (2, "_Z4gemmv", None),
+            (3, "_Z4copyv", "copy"),
+        ],
+    )
+
+    res = parse_rocpd_sqlite(db)
+
+    assert res.kernel_name == "gemm()"
+    assert res.kernel_time_ms == 300 / 1e6
+    assert res.block == (64, 1, 1)
+    assert res.agent_metadata["arch_name"] == "gfx942"
+
+
+def test_falls_back_to_longest_runtime_kernel():
+    db = _create_results_db(
+        dispatch_rows=[(1, 1, 0, 500), (2, 2, 500, 600)],
+        symbol_rows=[
+            (1, "_Z22__amd_rocclr_fillBufferv", "__amd_rocclr_fillBuffer"),
+            (2, "_Z7hipCopyv", None),
+        ],
+    )
+
+    assert parse_rocpd_sqlite(db).kernel_name == "__amd_rocclr_fillBuffer"
+
+
+def test_demangle_many_is_memoized(monkeypatch):
+    assert demangle_many(["_Z3foov", "not_mangled"]) == {"_Z3foov": "foo()", "not_mangled": "not_mangled"}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("c++filt spawned for a cached name")
+
+    monkeypatch.setattr(rocprof_adapter.subprocess, "run", fail)
+    assert demangle_many(["_Z3foov"]) == {"_Z3foov": "foo()"}
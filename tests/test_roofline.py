@@ -0,0 +1,125 @@
+import sqlite3
+import tempfile
+
+import numpy as np
+
+from rocm_perf_lab.analysis.roofline import kernel_roofline
+from rocm_perf_lab.hal.cdna3 import CDNA3
+from rocm_perf_lab.profiler.rocprof_adapter import WHOLE_APP_SYMBOL, parse_rocpd_dispatch_metrics
+
+
+def _arch():
+    return CDNA3(
+        arch_name="gfx942",
+        cu_count=304,
+        simd_per_cu=4,
+        max_waves_per_cu=32,
+        wave_size=64,
+        max_clock_mhz=2100,
+    )
+
+
+def _create_counter_db(dispatch_rows, samples, event_ids=True):
+    """dispatch_rows: (id, kernel_id, start, end, grid_x); samples: (dispatch id, counter, value)."""
+    tmp = tempfile.NamedTemporaryFile(suffix="_results.db", delete=False)
+    conn = sqlite3.connect(tmp.name)
+    conn.executescript("""
+        CREATE TABLE rocpd_kernel_dispatch_t (
+            id INTEGER PRIMARY KEY, event_id INTEGER, kernel_id INTEGER, start BIGINT, end BIGINT,
+            workgroup_size_x INTEGER, workgroup_size_y INTEGER, workgroup_size_z INTEGER,
+            grid_size_x INTEGER, grid_size_y INTEGER, grid_size_z INTEGER
+        );
+        CREATE TABLE rocpd_info_kernel_symbol_t (id INTEGER PRIMARY KEY, kernel_name TEXT, display_name TEXT);
+        CREATE TABLE rocpd_info_pmc_t (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE rocpd_pmc_event_t (id INTEGER PRIMARY KEY, event_id INTEGER, pmc_id INTEGER, value REAL);
+    """)
+    conn.executemany(
+        "INSERT INTO rocpd_kernel_dispatch_t VALUES (?, ? + 100, ?, ?, ?, 256, 1, 1, ?, 1, 1);",
+        [(did, did, kid, start, end, gx) for did, kid, start, end, gx in dispatch_rows],
+    )
+    conn.executemany(
+        "INSERT INTO rocpd_info_kernel_symbol_t VALUES (?, ?, ?);",
+        [(1, "_Z4gemmv", "gemm"), (2, "_Z4copyv", "copy")],
+    )
+    counters = sorted({c for _, c, _ in samples})
+    conn.executemany("INSERT INTO rocpd_info_pmc_t VALUES (?, ?);", list(enumerate(counters, start=1)))
+    pmc_id = {c: i for i, c in enumerate(counters, start=1)}
+    # Two partial samples per value (e.g. per XCC), summed per dispatch
+    conn.executemany(
+        "INSERT INTO rocpd_pmc_event_t (event_id, pmc_id, value) VALUES (?, ?, ?);",
+        [(did + 100, pmc_id[c], v / 2) for did, c, v in samples for _ in range(2)],
+    )
+    if not event_ids:
+        conn.execute("ALTER TABLE rocpd_kernel_dispatch_t DROP COLUMN event_id;")
+    conn.commit()
+    conn.close()
+    return tmp.name
+
+
+def test_counters_attributed_per_kernel_and_shape():
+    db = _create_counter_db(
+        dispatch_rows=[
+            (1, 1, 0, 1_000, 1024),
+            (2, 1, 1_000, 2_000, 1024),
+            (3, 1, 2_000, 6_000, 4096),
+            (4, 2, 6_000, 7_000, 1024),
+        ],
+        samples=[
+            (1, "SQ_INSTS_VALU", 100.0),
+            (2, "SQ_INSTS_VALU", 100.0),
+            (3, "SQ_INSTS_VALU", 400.0),
+            (4, "TCC_EA0_RDREQ", 10.0),
+            (4, "TCC_EA0_RDREQ_32B", 10.0),
+        ],
+    )
+    metrics = ["SQ_INSTS_VALU", "SQ_INSTS_VALU_MFMA_MOPS_F32", "TCC_EA0_RDREQ", "TCC_EA0_RDREQ_32B"]
+
+    counters = parse_rocpd_dispatch_metrics(db, metrics)
+
+    assert counters.dispatch_ids.tolist() == [1, 2, 3, 4]
+    assert counters.column("SQ_INSTS_VALU").tolist() == [100.0, 100.0, 400.0, 0.0]
+    assert counters.totals()["SQ_INSTS_VALU"] == 600.0
+
+    table = kernel_roofline(counters, _arch())
+
+    assert table.kernel_names == ["gemm", "gemm", "copy"]
+    assert table.grid[:, 0].tolist() == [4096, 1024, 1024]
+    assert table.dispatches.tolist() == [1, 2, 1]
+    assert table.flops.tolist() == [3200.0, 1600.0, 0.0]
+    assert table.bytes.tolist() == [0.0, 0.0, 320.0]
+    assert table.achieved_gflops[0] == 3200.0 / 4_000
+    assert table.bound == ["compute", "compute", "memory"]
+    assert table.find("gemm", grid=(1024, 1, 1)) == 1
+
+
+def test_merge_aligns_passes_by_dispatch_id():
+    rows = [(1, 1, 0, 10, 64), (2, 2, 10, 20, 64)]
+    first = parse_rocpd_dispatch_metrics(
+        _create_counter_db(rows, [(1, "SQ_INSTS_VALU", 5.0), (2, "SQ_INSTS_VALU", 7.0)]), ["SQ_INSTS_VALU"]
+    )
+    second = parse_rocpd_dispatch_metrics(
+        _create_counter_db(rows, [(2, "TCC_EA0_WRREQ", 3.0)]), ["TCC_EA0_WRREQ"]
+    )
+
+    merged = first.merge(second)
+
+    assert merged.metrics == ["SQ_INSTS_VALU", "TCC_EA0_WRREQ"]
+    np.testing.assert_array_equal(merged.values, [[5.0, 0.0], [7.0, 3.0]])
+
+
+def test_whole_app_fallback_without_event_ids():
+    db = _create_counter_db(
+        dispatch_rows=[(1, 1, 0, 1_000, 1024), (2, 2, 1_000, 3_000, 1024)],
+        samples=[(1, "SQ_INSTS_VALU", 100.0), (2, "SQ_INSTS_VALU", 300.0)],
+        event_ids=False,
+    )
+
+    counters = parse_rocpd_dispatch_metrics(db, ["SQ_INSTS_VALU", "TCC_EA0_RDREQ"])
+
+    assert counters.is_whole_app
+    assert counters.totals() == {"SQ_INSTS_VALU": 400.0, "TCC_EA0_RDREQ": 0.0}
+    assert counters.durations_ns.tolist() == [3_000]
+
+    table = kernel_roofline(counters, _arch())
+    assert table.kernel_names == [WHOLE_APP_SYMBOL]
+    assert table.flops.tolist() == [400.0 * _arch().fp32_valu_width]
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from rocm_perf_lab.profiler import runner
+from rocm_perf_lab.profiler.rocprof_adapter import RocprofResult
+
+
+def _result(ms):
+    return RocprofResult(
+        kernel_name="k", kernel_time_ms=ms, vgpr_per_thread=None, sgpr_per_wave=None,
+        lds_bytes=None, grid=None, block=None,
+    )
+
+
+class _InlineExecutor:
+    """Runs submitted work immediately, so a parse failure is seen before the next launch."""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def test_next_run_launches_while_previous_parses(monkeypatch):
+    parsing = threading.Event()
+    launched = threading.Event()
+    launches = []
+
+    def fake_launch(cmd, debug=False, workspace=None):
+        run = len(launches)
+        launches.append(run)
+        if run == 1:
+            # Run 0 must already be parsing in the background
+            assert parsing.wait(timeout=5)
+            launched.set()
+        return run
+
+    def fake_collect(run):
+        if run == 0:
+            parsing.set()
+            # ... and stays there until run 1 has launched
+            assert launched.wait(timeout=5)
+        return _result(float(run + 1))
+
+    monkeypatch.setattr(runner, "launch_rocprof", fake_launch)
+    monkeypatch.setattr(runner, "collect_rocprof", fake_collect)
+
+    res = runner.run_command("./app", runs=3, use_rocprof=True)
+
+    assert launches == [0, 1, 2]
+    assert res["mean_ms"] == 2.0
+    assert res["rocprof"].kernel_time_ms == 3.0
+
+
+def test_parse_failure_stops_launches(monkeypatch):
+    launches = []
+
+    def fake_launch(cmd, debug=False, workspace=None):
+        launches.append(cmd)
+        return len(launches)
+
+    def fake_collect(run):
+        raise RuntimeError("No valid kernel dispatch found")
+
+    monkeypatch.setattr(runner, "launch_rocprof", fake_launch)
+    monkeypatch.setattr(runner, "collect_rocprof", fake_collect)
+    monkeypatch.setattr(runner, "ThreadPoolExecutor", _InlineExecutor)
+
+    with pytest.raises(RuntimeError, match="No valid kernel dispatch"):
+        runner.run_command("./app", runs=5, use_rocprof=True)
+    assert launches == ["./app"]
+
+
+def test_launch_failure_keeps_parse_errors(monkeypatch):
+    launch_failed = threading.Event()
+    launches = []
+
+    def fake_launch(cmd, debug=False, workspace=None):
+        launches.append(cmd)
+        if len(launches) == 2:
+            launch_failed.set()
+            raise RuntimeError("rocprofv3 execution failed")
+        return 0
+
+    def fake_collect(run):
+        # Still parsing when the next launch fails
+        assert launch_failed.wait(timeout=5)
+        raise ValueError("corrupt results DB")
+
+    monkeypatch.setattr(runner, "launch_rocprof", fake_launch)
+    monkeypatch.setattr(runner, "collect_rocprof", fake_collect)
+
+    with pytest.raises(RuntimeError, match="execution failed") as excinfo:
+        runner.run_command("./app", runs=3, use_rocprof=True)
+    assert isinstance(excinfo.value.__cause__, ValueError)
+    assert len(launches) == 2
+
+
+def test_full_trace_run_left_out_of_timings(monkeypatch, tmp_path):
+    traced = []
+
+    def fake_launch(cmd, debug=False, workspace=None):
+        traced.append(workspace is not None)
+        return len(traced)
+
+    monkeypatch.setattr(runner, "launch_rocprof", fake_launch)
+    # The full trace is much slower than the kernel traces before it
+    monkeypatch.setattr(runner, "collect_rocprof", lambda run: _result(50.0 if run == 3 else 2.0))
+
+    res = runner.run_command("./app", runs=3, use_rocprof=True, workspace=runner.RunWorkspace(root=tmp_path))
+
+    assert traced == [False, False, True]
+    assert res["mean_ms"] == 2.0
+    assert res["rocprof"].kernel_time_ms == 50.0
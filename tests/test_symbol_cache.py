@@ -0,0 +1,62 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from rocm_perf_lab.profiler import symbol_cache
+from rocm_perf_lab.profiler.symbol_cache import SymbolCache, default_symbol_cache, demangle_many
+
+
+def test_demangled_names_persist_across_processes(monkeypatch):
+    assert demangle_many(["_Z3foov"]) == {"_Z3foov": "foo()"}
+
+    # A fresh process: empty memo, c++filt unavailable
+    monkeypatch.setattr(symbol_cache, "_DEMANGLED", {})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("c++filt spawned for a cached name")
+
+    monkeypatch.setattr(symbol_cache.subprocess, "run", fail)
+    assert demangle_many(["_Z3foov"]) == {"_Z3foov": "foo()"}
+    assert default_symbol_cache().lookup(["_Z3foov", "_Z3barv"]) == {"_Z3foov": "foo()"}
+
+
+def test_lru_eviction(tmp_path):
+    cache = SymbolCache(tmp_path / "symbols.db", max_entries=2)
+    cache.store({"a": "a()", "b": "b()"})
+
+    cache.lookup(["a"])
+    cache.store({"c": "c()"})
+
+    # "b" was least recently used
+    assert cache.lookup(["a", "b", "c"]) == {"a": "a()", "c": "c()"}
+
+
+def test_lookup_does_not_wait_on_writers(tmp_path):
+    cache = SymbolCache(tmp_path / "symbols.db")
+    cache.store({"a": "a()"})
+
+    writer = sqlite3.connect(tmp_path / "symbols.db", isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE;")
+    cache.conn.execute("PRAGMA busy_timeout = 0;")
+    try:
+        assert cache.lookup(["a"]) == {"a": "a()"}
+    finally:
+        writer.execute("ROLLBACK;")
+        writer.close()
+
+    # The deferred last_used bump lands once the lock is free
+    cache.flush()
+    assert cache._touched == {}
+
+
+def test_cache_shared_across_threads(tmp_path):
+    cache = SymbolCache(tmp_path / "symbols.db")
+    names = [f"_Z{i}kv" for i in range(20)]
+
+    def round_trip(i):
+        cache.store({names[i]: f"{i}()"})
+        return cache.lookup(names)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(round_trip, range(len(names))))
+
+    assert cache.lookup(names) == {name: f"{i}()" for i, name in enumerate(names)}
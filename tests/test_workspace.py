@@ -0,0 +1,69 @@
+import threading
+
+from typer.testing import CliRunner
+
+from rocm_perf_lab.cli.main import app
+from rocm_perf_lab.profiler.backends import SyntheticBackend, set_backend
+from rocm_perf_lab.profiler.pipeline import build_profile
+from rocm_perf_lab.profiler.workspace import RunWorkspace, prune_runs
+
+
+def test_passes_are_recorded_in_the_manifest(tmp_path):
+    workspace = RunWorkspace(tmp_path, cmd="./app")
+    assert not workspace.run_dir.exists()
+
+    first = workspace.new_pass("att")
+    (first / "ui_output_agent_1").mkdir()
+    workspace.record("att", first, [first / "ui_output_agent_1"])
+    second = workspace.new_pass("att")
+    workspace.record("att", second, [])
+
+    assert first != second
+    assert workspace.outputs("att") == []
+    assert workspace.outputs("full-trace") == []
+
+    reopened = RunWorkspace.open(workspace.run_dir)
+    assert reopened.run_id == workspace.run_id
+    assert [p["outputs"] for p in reopened._manifest["passes"]] == [[f"{first.name}/ui_output_agent_1"], []]
+    assert reopened.new_pass("pmc").name.startswith("03_")
+
+
+def test_runs_are_pruned_only_on_request(tmp_path):
+    for i in range(4):
+        RunWorkspace(tmp_path, run_id=f"20260101-00000{i}-1-a").new_pass("full-trace")
+    RunWorkspace(tmp_path, run_id="20260101-000009-1-a").new_pass("full-trace")
+    assert len(list((tmp_path / "runs").iterdir())) == 5
+
+    result = CliRunner().invoke(app, ["prune-runs", "--keep", "3", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert "Removed 2 run(s)." in result.stdout
+
+    remaining = sorted(p.name for p in (tmp_path / "runs").iterdir())
+    assert remaining == ["20260101-000002-1-a", "20260101-000003-1-a", "20260101-000009-1-a"]
+    assert prune_runs(tmp_path, keep=10) == []
+
+
+def test_concurrent_sessions_keep_their_own_traces(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    set_backend(SyntheticBackend(n_dispatches=200))
+    try:
+        workspaces = [RunWorkspace(cmd="./app") for _ in range(4)]
+        profiles = [None] * len(workspaces)
+
+        def session(i):
+            profiles[i] = build_profile(
+                "./app", runs=1, persist_rocpd=True, use_cache=False, workspace=workspaces[i]
+            )
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(len(workspaces))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        set_backend(None)
+
+    for workspace, profile in zip(workspaces, profiles):
+        (db,) = workspace.outputs("full-trace")
+        assert profile["rocpd_db_paths"] == [str(db)]
+    assert len({w.run_dir for w in workspaces}) == len(workspaces)